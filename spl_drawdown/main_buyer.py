@@ -1,52 +1,175 @@
-import http.server
 import os
-import socketserver
 import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timedelta, timezone
-from functools import reduce
-from typing import List
+from functools import partial, reduce
+from http.server import ThreadingHTTPServer
+from typing import Iterator, List, Optional
 
+from spl_drawdown.modules.price_stream import BirdeyePriceStream, PriceFeed
 from spl_drawdown.modules.swap import Swapper
+from spl_drawdown.modules.swap_standby import StandbyCandidate, SwapStandby
 from spl_drawdown.modules.token_charts import TokenCharts
 from spl_drawdown.modules.token_volumes import TokenVolumes
 from spl_drawdown.modules.wallet_info import Wallet
+from spl_drawdown.modules.wallet_state import WalletState
 from spl_drawdown.types.token_data import TokenData
 from spl_drawdown.types.wallet_data import WalletInfo
+from spl_drawdown.utils.http_client import get_http_client
 from spl_drawdown.utils.log import get_logger
+from spl_drawdown.utils.metrics import MetricsHandler, get_metrics
 from spl_drawdown.utils.settings import settings_key_values
+from spl_drawdown.utils.tracing import get_tracer, profile_to
 
 logger = get_logger()
 
 
 class SplDrawdown:
-    def __init__(self):
+    def __init__(self, price_feed: Optional[PriceFeed] = None):
+        """
+        Args:
+            price_feed (PriceFeed, optional): price source for streaming mode, e.g. a LocalPriceFeed.
+                Defaults to the Birdeye websocket when PRICE_STREAM is set.
+        """
         try:
             self.BIRDEYE_API_TOKEN = settings_key_values["BIRDEYE_API_TOKEN"]
             self.wallets = settings_key_values["wallets"]
             self.HELIUS_API_KEY = settings_key_values["HELIUS_API_KEY"]
             self.BET_AMOUNT_SOL = settings_key_values["BET_AMOUNT_SOL"]
             self.MIN_24HR_VOLUME = settings_key_values["MIN_24HR_VOLUME"]
+            self.ASYNC_CANDLES = settings_key_values["ASYNC_CANDLES"]
+            self.CANDLE_MAX_CONCURRENT_TOKENS = settings_key_values["CANDLE_MAX_CONCURRENT_TOKENS"]
+            self.CANDLE_MAX_CONCURRENT_WINDOWS = settings_key_values["CANDLE_MAX_CONCURRENT_WINDOWS"]
+            self.CANDLE_STORE_PATH = settings_key_values["CANDLE_STORE_PATH"]
+            self.BIRDEYE_RPS = settings_key_values["BIRDEYE_RPS"]
+            self.HELIUS_RPS = settings_key_values["HELIUS_RPS"]
+            self.JUPITER_RPS = settings_key_values["JUPITER_RPS"]
+            self.HTTP_CONNECT_TIMEOUT = settings_key_values["HTTP_CONNECT_TIMEOUT"]
+            self.HTTP_READ_TIMEOUT = settings_key_values["HTTP_READ_TIMEOUT"]
+            self.VERIFY_MAX_WORKERS = settings_key_values["VERIFY_MAX_WORKERS"]
+            self.VERIFICATION_CACHE_PATH = settings_key_values["VERIFICATION_CACHE_PATH"]
+            self.VERDICT_STATIC_TTL_HOURS = settings_key_values["VERDICT_STATIC_TTL_HOURS"]
+            self.VERDICT_HOLDER_TTL_HOURS = settings_key_values["VERDICT_HOLDER_TTL_HOURS"]
+            self.PRICE_STREAM = settings_key_values["PRICE_STREAM"]
+            self.PRICE_STREAM_URL = settings_key_values["PRICE_STREAM_URL"]
+            self.WALLET_RESYNC_SECONDS = settings_key_values["WALLET_RESYNC_SECONDS"]
+            self.SWAP_STANDBY = settings_key_values["SWAP_STANDBY"]
+            self.SEND_RPC_ENDPOINTS = settings_key_values["SEND_RPC_ENDPOINTS"]
+            self.SWAP_STANDBY_BAND = settings_key_values["SWAP_STANDBY_BAND"]
+            self.SWAP_STANDBY_MAX_AGE_SECONDS = settings_key_values["SWAP_STANDBY_MAX_AGE_SECONDS"]
+            self.SWAP_STANDBY_REFRESH_SECONDS = settings_key_values["SWAP_STANDBY_REFRESH_SECONDS"]
+            self.BIRDEYE_BASE_URL = settings_key_values["BIRDEYE_BASE_URL"]
+            self.HELIUS_RPC_URL = settings_key_values["HELIUS_RPC_URL"]
+            self.JUPITER_BASE_URL = settings_key_values["JUPITER_BASE_URL"]
+            self.TRACE_PATH = settings_key_values["TRACE_PATH"]
+            self.PROFILE_RUN_PATH = settings_key_values["PROFILE_RUN_PATH"]
         except KeyError:
             raise ValueError("Environment variable is required but not set")
 
-        self.TokenCharter = TokenCharts(BIRDEYE_API_TOKEN=self.BIRDEYE_API_TOKEN)
+        http = get_http_client()
+        http.timeout = (self.HTTP_CONNECT_TIMEOUT, self.HTTP_READ_TIMEOUT)
+        http.set_rate_limit("birdeye", requests_per_second=self.BIRDEYE_RPS)
+        http.set_rate_limit("helius", requests_per_second=self.HELIUS_RPS)
+        http.set_rate_limit("jupiter", requests_per_second=self.JUPITER_RPS)
+
+        self.metrics = get_metrics()
+        self.metrics.describe(name="run_stage_seconds", help_text="Duration of each stage of SplDrawdown.run")
+        self.metrics.describe(
+            name="buy_tick_to_send_seconds",
+            help_text="Time from the price that triggered a buy to the swap being sent",
+            buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0),
+        )
+        self.tracer = get_tracer()
+        self.tracer.enabled = bool(self.TRACE_PATH)
+        # Only the first run is profiled
+        self._profile_path = self.PROFILE_RUN_PATH
+
+        # TokenCharter follows the prices of the screened tokens, ScreenCharter screens on its own thread
+        self.TokenCharter = TokenCharts(BIRDEYE_API_TOKEN=self.BIRDEYE_API_TOKEN, base_url=self.BIRDEYE_BASE_URL)
+        self.ScreenCharter = TokenCharts(
+            BIRDEYE_API_TOKEN=self.BIRDEYE_API_TOKEN,
+            use_async_candles=self.ASYNC_CANDLES,
+            max_concurrent_tokens=self.CANDLE_MAX_CONCURRENT_TOKENS,
+            max_concurrent_windows=self.CANDLE_MAX_CONCURRENT_WINDOWS,
+            candle_store_path=self.CANDLE_STORE_PATH,
+            base_url=self.BIRDEYE_BASE_URL,
+        )
+        self._screen_executor = ThreadPoolExecutor(max_workers=1)
+        self._screen_future: Optional[Future] = None
+        # Tokens that passed the last verification, reused by the next get_tokens
+        self.verified_tokens = dict()
         self.bought_tokens = dict()
+        # Written by one buy worker per wallet
+        self._bought_tokens_lock = threading.Lock()
 
-        # test wallet balances
-        S = Swapper(HELIUS_API_KEY=self.HELIUS_API_KEY)
+        self.W = Wallet(
+            HELIUS_API_KEY=self.HELIUS_API_KEY,
+            BIRDEYE_API_TOKEN=self.BIRDEYE_API_TOKEN,
+            helius_rpc_url=self.HELIUS_RPC_URL,
+        )
+
+        # test wallet balances, the snapshot is reused by every buy
+        self.wallet_states = dict()
+        # One confirmation tracker and broadcaster for all wallets so signatures are polled in one batch
+        self.Confirmations = None
+        self.Broadcaster = None
         for w in self.wallets:
             self.bought_tokens[w.public_key] = dict()
-            balance = S.get_balance_with_retry(pubkey=w.key_pair.pubkey()) / 1e9
             logger.info("Wallet pubkey: {p}".format(p=w.public_key))
-            logger.info(f"Wallet balance: {balance} SOL")
+            Swap = Swapper(
+                HELIUS_API_KEY=self.HELIUS_API_KEY,
+                Confirmations=self.Confirmations,
+                send_endpoints=self.SEND_RPC_ENDPOINTS,
+                Broadcaster=self.Broadcaster,
+                helius_rpc_url=self.HELIUS_RPC_URL,
+                jupiter_base_url=self.JUPITER_BASE_URL,
+            )
+            self.Confirmations = Swap.Confirmations
+            self.Broadcaster = Swap.Broadcaster
+            self.wallet_states[w.public_key] = WalletState(
+                wallet=w,
+                Swap=Swap,
+                W=self.W,
+                resync_seconds=self.WALLET_RESYNC_SECONDS,
+            )
+            self.wallet_states[w.public_key].sync()
 
-        self.TokenVols = TokenVolumes(BIRDEYE_API_TOKEN=self.BIRDEYE_API_TOKEN, HELIUS_API_KEY=self.HELIUS_API_KEY)
-        self.W = Wallet(
-            HELIUS_API_KEY=self.HELIUS_API_KEY,
+        self.TokenVols = TokenVolumes(
             BIRDEYE_API_TOKEN=self.BIRDEYE_API_TOKEN,
+            HELIUS_API_KEY=self.HELIUS_API_KEY,
+            max_workers=self.VERIFY_MAX_WORKERS,
+            verification_cache_path=self.VERIFICATION_CACHE_PATH,
+            static_ttl_hours=self.VERDICT_STATIC_TTL_HOURS,
+            holder_ttl_hours=self.VERDICT_HOLDER_TTL_HOURS,
+            base_url=self.BIRDEYE_BASE_URL,
+            helius_rpc_url=self.HELIUS_RPC_URL,
         )
 
+        self._buy_lock = threading.Lock()
+        self._breakout_executor = ThreadPoolExecutor(max_workers=1)
+        self._pending_breakouts = set()
+
+        # Swaps for tokens close to their ATH are built ahead so a buy only signs and sends
+        self.Standby = None
+        if self.SWAP_STANDBY:
+            self.Standby = SwapStandby(
+                band=self.SWAP_STANDBY_BAND,
+                max_age_seconds=self.SWAP_STANDBY_MAX_AGE_SECONDS,
+                refresh_seconds=self.SWAP_STANDBY_REFRESH_SECONDS,
+            )
+            self.Standby.start(get_candidates=self._get_standby_candidates)
+
+        # Polling in run() stays on as the fallback, streamed prices keep quotes fresh so polling skips them.
+        # Started last since breakouts buy through everything above.
+        if price_feed is None and self.PRICE_STREAM:
+            price_feed = BirdeyePriceStream(
+                BIRDEYE_API_TOKEN=self.BIRDEYE_API_TOKEN, url=self.PRICE_STREAM_URL or None
+            )
+        if price_feed is not None:
+            self.TokenCharter.start_price_stream(price_feed=price_feed, on_breakout=self.on_breakout)
+
     @property
     def wallets(self) -> List[WalletInfo]:
         return self._wallets
@@ -57,24 +180,101 @@ class SplDrawdown:
 
     def run(self):
         logger.info("----------------------------Starting Run----------------------------")
-        if self.TokenVols.can_run():
-            tokens_in_scope = self.TokenVols.get_tokens(min_volume=self.MIN_24HR_VOLUME)
+        profile_path, self._profile_path = self._profile_path, ""
+        with profile_to(path=profile_path), self._stage(name="run"):
+            if self._screen_future is not None and self._screen_future.done():
+                self._apply_screen(future=self._screen_future)
+                self._screen_future = None
+            elif self._screen_future is None and self.TokenVols.can_run():
+                # The screen runs on its own thread, out of reach of the run profile, so it gets its own file
+                screen = self._screen_executor.submit(
+                    self.tracer.wrap(self._screen_tokens), profile_path=self._get_screen_profile_path(profile_path)
+                )
+                if self.TokenCharter.token_list:
+                    # Prices of the current list keep being polled while the new list is screened
+                    logger.info("Re-screening tokens in the background")
+                    self._screen_future = screen
+                else:
+                    self._apply_screen(future=screen)
+
+            with self._stage(name="update_current_prices"):
+                self.TokenCharter.update_current_prices()
+            self.TokenCharter._print_data_short()
+
+            tokens_to_buy = self.TokenCharter.get_tokens_to_buy()
+
+            with self._stage(name="buy_tokens"):
+                self.buy_tokens(tokens_to_buy=tokens_to_buy)
+        self.metrics.set("token_list_size", len(self.TokenCharter.token_list))
+        if self.TRACE_PATH:
+            self.tracer.export(path=self.TRACE_PATH)
+        logger.info("----------------------------Run End----------------------------")
+
+    def _screen_tokens(self, profile_path: str = "") -> List[TokenData]:
+        """Volume list, verification and candle screen, reusing the results of the previous screen
+
+        Args:
+            profile_path (str, optional): cProfile the screen to this file. Defaults to no profile.
+        """
+        with profile_to(path=profile_path):
+            with self._stage(name="get_tokens"):
+                tokens_in_scope = self.TokenVols.get_tokens(
+                    min_volume=self.MIN_24HR_VOLUME, verified=self.verified_tokens
+                )
             logger.info("Len tokens = {t}".format(t=len(tokens_in_scope)))
-            self.TokenCharter.token_list = tokens_in_scope
-            self.TokenCharter.populate_token_list()
+            self.verified_tokens = {x.mint_address: x for x in tokens_in_scope}
+            with self._stage(name="populate_token_list"):
+                self.ScreenCharter.rescreen_token_list(tokens=tokens_in_scope)
+        return self.ScreenCharter.token_list
+
+    @staticmethod
+    def _get_screen_profile_path(profile_path: str) -> str:
+        """run.prof -> run.screen.prof, empty when the run is not profiled"""
+        if not profile_path:
+            return ""
+        root, ext = os.path.splitext(profile_path)
+        return "{r}.screen{e}".format(r=root, e=ext)
+
+    def _apply_screen(self, future: Future):
+        """Replace the monitored token list with the result of _screen_tokens"""
+        try:
+            tokens = future.result()
+        except Exception as e:
+            logger.error("Error screening tokens {e}".format(e=e))
+            # Try again on the next run
+            self.TokenVols.last_run_date = None
+            return
+        self.TokenCharter.replace_token_list(tokens=tokens)
+        with self._stage(name="update_current_prices"):
             self.TokenCharter.update_current_prices()
-            self.TokenCharter._print_data()
+        self.TokenCharter._print_data()
+        with self._stage(name="clean_token_list"):
             self.TokenCharter.clean_token_list()
 
-        self.TokenCharter.update_current_prices()
-        self.TokenCharter._print_data_short()
+    @contextmanager
+    def _stage(self, name: str) -> Iterator[None]:
+        """Time a stage of run into the run_stage_seconds metric and a trace span"""
+        with self.metrics.time("run_stage_seconds", stage=name):
+            with self.tracer.span(name, tokens=len(self.TokenCharter.token_list)):
+                yield
 
-        tokens_to_buy = [
-            x for x in self.TokenCharter.token_list if x.current_price_usd and x.current_price_usd > x.ath_price_usd
-        ]
+    def on_breakout(self, token: TokenData):
+        """Queue a buy for a token whose streamed price crossed its ATH, called from the price feed thread"""
+        if token.mint_address in self._pending_breakouts:
+            return
+        if all(self.is_bought(wallet=x, mint_address=token.mint_address) for x in self.wallets):
+            return
+        logger.info("Breakout {s}: {p} > {a}".format(s=token.symbol, p=token.current_price_usd, a=token.ath_price_usd))
+        self._pending_breakouts.add(token.mint_address)
+        self._breakout_executor.submit(self._buy_breakout, token=token)
 
-        self.buy_tokens(tokens_to_buy=tokens_to_buy)
-        logger.info("----------------------------Run End----------------------------")
+    def _buy_breakout(self, token: TokenData):
+        try:
+            self.buy_tokens(tokens_to_buy=[token])
+        except Exception as e:
+            logger.error("Error buying breakout {e}".format(e=e))
+        finally:
+            self._pending_breakouts.discard(token.mint_address)
 
     def buy_tokens(self, tokens_to_buy: List[TokenData]):
         """Buy tokens in tokens_to_buy
@@ -84,55 +284,139 @@ class SplDrawdown:
         """
         if not tokens_to_buy or len(tokens_to_buy) == 0:
             return
+        # Streamed breakouts and the polling run share wallets and bought_tokens
+        with self._buy_lock:
+            self._buy_tokens(tokens_to_buy=tokens_to_buy)
+
+    def _buy_tokens(self, tokens_to_buy: List[TokenData]):
         logger.info("Tokens to Buy")
 
         self._prune_bought_tokens()
 
-        Swap = Swapper(HELIUS_API_KEY=self.HELIUS_API_KEY)
+        # One worker per wallet, tokens are still bought in order within a wallet
+        with ThreadPoolExecutor(max_workers=max(1, len(self.wallets))) as executor:
+            futures = [
+                executor.submit(
+                    self.tracer.wrap(self._buy_tokens_for_wallet), wallet=wallet, tokens_to_buy=tokens_to_buy
+                )
+                for wallet in self.wallets
+            ]
+            for wallet, future in zip(self.wallets, futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.error("Error buying for {w}: {e}".format(w=wallet.public_key, e=e))
 
-        for wallet in self.wallets:
-            holding_tokens = self.W.get_token_accounts(pub_key=wallet.public_key)
-            holding_tokens = [x.mint for x in holding_tokens]
-            logger.info("Holding Tokens: {l}".format(l=holding_tokens))
-
-            for token in tokens_to_buy:
-                balance = Swap.get_balance_with_retry(pubkey=wallet.key_pair.pubkey()) / 1e9
-                logger.info(f"Wallet balance: {balance} SOL")
-                if token.mint_address in holding_tokens or token.mint_address in self.bought_tokens[wallet.public_key]:
-                    logger.info("Skipping {t}, purchased already".format(t=token.symbol))
-                    continue
+        self.remove_common_holdings()
 
-                if balance <= 2.0:
-                    logger.error("Insufficient balance")
-                    buy_amount = 0.001
-                elif self.BET_AMOUNT_SOL + 2.0 > balance:
-                    logger.error("Insufficient balance")
-                    buy_amount = round(balance - 2.0, 2)
-                elif balance / 4.0 > self.BET_AMOUNT_SOL:
-                    logger.error("Balance more than quadruple")
-                    buy_amount = round(balance / 4.0, 2)
-                else:
-                    buy_amount = self.BET_AMOUNT_SOL
-                logger.info("Buying token {s}: {t}. Amount: {a}".format(s=token.symbol, t=token.name, a=buy_amount))
+    def _buy_tokens_for_wallet(self, wallet: WalletInfo, tokens_to_buy: List[TokenData]):
+        """Buy tokens_to_buy in order with wallet
+
+        Args:
+            wallet (WalletInfo): wallet to buy with
+            tokens_to_buy (List[TokenData]): _description_
+        """
+        # Each wallet state has its own Swapper and rpc client
+        state = self.wallet_states[wallet.public_key]
+
+        for token in tokens_to_buy:
+            state.sync_if_stale()
+            logger.info(f"Wallet balance: {state.balance_sol} SOL")
+            if state.holds(mint_address=token.mint_address) or self.is_bought(
+                wallet=wallet, mint_address=token.mint_address
+            ):
+                logger.info("Skipping {t}, purchased already".format(t=token.symbol))
+                continue
+
+            buy_amount = self._get_buy_amount(balance=state.balance_sol)
+            logger.info("Buying token {s}: {t}. Amount: {a}".format(s=token.symbol, t=token.name, a=buy_amount))
+            on_done = partial(self._on_buy_confirmed, wallet, token)
+            with self.tracer.span("buy", mint=token.mint_address, symbol=token.symbol, wallet=wallet.public_key):
                 try:
-                    is_successful = Swap.place_buy_order(
-                        OUTPUT_MINT=token.mint_address, AMOUNT_IN_SOL=buy_amount, KEY_PAIR=wallet.key_pair
-                    )
-                    if is_successful:
-                        self.bought_tokens[wallet.public_key][token.mint_address] = datetime.now(timezone.utc)
+                    # Confirmations arrive in the background, the buy is booked as soon as it is sent
+                    confirmation = None
+                    prepared = None
+                    if self.Standby:
+                        prepared = self.Standby.take(
+                            mint_address=token.mint_address, public_key=wallet.public_key, amount_sol=buy_amount
+                        )
+                    if prepared is not None:
+                        confirmation = state.Swap.submit_prepared_buy(
+                            prepared=prepared, KEY_PAIR=wallet.key_pair, on_done=on_done
+                        )
+                    if confirmation is None:
+                        confirmation = state.Swap.submit_buy_order(
+                            OUTPUT_MINT=token.mint_address,
+                            AMOUNT_IN_SOL=buy_amount,
+                            KEY_PAIR=wallet.key_pair,
+                            on_done=on_done,
+                        )
                 except Exception as e:
                     logger.error("Error buying {e}".format(e=e))
+                    confirmation = None
+
+            if confirmation is not None:
+                if token.current_price_time is not None:
+                    tick_to_send = (datetime.now(timezone.utc) - token.current_price_time).total_seconds()
+                    self.metrics.observe("buy_tick_to_send_seconds", tick_to_send)
+                state.record_spend(amount_sol=buy_amount)
+                with self._bought_tokens_lock:
+                    self.bought_tokens[wallet.public_key][token.mint_address] = datetime.now(timezone.utc)
+            else:
+                # A failed swap may still have spent fees or landed late, reload before the next buy
+                state.mark_stale()
+
+    def _on_buy_confirmed(self, wallet: WalletInfo, token: TokenData, is_confirmed: bool):
+        """Add a confirmed buy to the holdings or undo the booking of one that did not confirm,
+        called from the confirmation tracker thread"""
+        if is_confirmed:
+            logger.info("Buy confirmed {s} for {w}".format(s=token.symbol, w=wallet.public_key))
+            self.wallet_states[wallet.public_key].add_holding(mint_address=token.mint_address)
+            return
+        logger.error("Buy not confirmed {s} for {w}".format(s=token.symbol, w=wallet.public_key))
+        with self._bought_tokens_lock:
+            self.bought_tokens[wallet.public_key].pop(token.mint_address, None)
+        self.wallet_states[wallet.public_key].mark_stale()
+
+    def _get_buy_amount(self, balance: float, log: bool = True) -> float:
+        """SOL to spend on one buy, keeps 2 SOL in the wallet and bets at most a quarter of the balance"""
+        if balance <= 2.0:
+            if log:
+                logger.error("Insufficient balance")
+            return 0.001
+        elif self.BET_AMOUNT_SOL + 2.0 > balance:
+            if log:
+                logger.error("Insufficient balance")
+            return round(balance - 2.0, 2)
+        elif balance / 4.0 > self.BET_AMOUNT_SOL:
+            if log:
+                logger.error("Balance more than quadruple")
+            return round(balance / 4.0, 2)
+        return self.BET_AMOUNT_SOL
+
+    def _get_standby_candidates(self) -> List[StandbyCandidate]:
+        """Tokens within the standby band with every wallet that would buy them"""
+        candidates = list()
+        for token in self.TokenCharter.token_list:
+            if not self.Standby.is_in_band(token=token):
+                continue
+            for wallet in self.wallets:
+                state = self.wallet_states[wallet.public_key]
+                if state.holds(mint_address=token.mint_address) or self.is_bought(
+                    wallet=wallet, mint_address=token.mint_address
+                ):
                     continue
+                candidates.append((token, state, self._get_buy_amount(balance=state.balance_sol, log=False)))
+        return candidates
 
-        time.sleep(30)
-        self.remove_common_holdings()
+    def is_bought(self, wallet: WalletInfo, mint_address: str) -> bool:
+        with self._bought_tokens_lock:
+            return mint_address in self.bought_tokens[wallet.public_key]
 
     def remove_common_holdings(self):
         all_holdings = list()
         for wallet in self.wallets:
-            holding_tokens = self.W.get_token_accounts(pub_key=wallet.public_key)
-            holding_tokens = [x.mint for x in holding_tokens]
-            all_holdings.append(holding_tokens)
+            all_holdings.append(self.wallet_states[wallet.public_key].get_holdings())
         common_items = list(reduce(lambda x, y: set(x).intersection(y), all_holdings))
         logger.info("Common Holdings: {f}".format(f=common_items))
         self.TokenCharter.remove_from_token_list(mints_to_remove=common_items)
@@ -141,20 +425,21 @@ class SplDrawdown:
         """Remove tokens purchased more than 6 hours ago"""
         current_utc = datetime.now(timezone.utc)
         threshold = current_utc - timedelta(minutes=minutes_til_stale)
-        for pub_key in self.bought_tokens:
-            self.bought_tokens[pub_key] = {k: v for k, v in self.bought_tokens[pub_key].items() if v >= threshold}
+        with self._bought_tokens_lock:
+            for pub_key in self.bought_tokens:
+                self.bought_tokens[pub_key] = {k: v for k, v in self.bought_tokens[pub_key].items() if v >= threshold}
 
 
 def run_server():
+    """Metrics on /metrics, every other path answers the Cloud Run health check"""
     port = int(os.getenv("PORT", 8080))
-    handler = http.server.SimpleHTTPRequestHandler
-    with socketserver.TCPServer(("", port), handler) as httpd:
-        logger.info(f"Serving HTTP on port {port}")
+    with ThreadingHTTPServer(("", port), MetricsHandler) as httpd:
+        logger.info(f"Serving metrics on port {port}")
         httpd.serve_forever()
 
 
 if __name__ == "__main__":
-    # Start HTTP server in a separate thread
+    # Start the metrics and health server in a separate thread
     server_thread = threading.Thread(target=run_server, daemon=True)
     server_thread.start()
 
@@ -162,7 +447,11 @@ if __name__ == "__main__":
     while True:
         try:
             S.run()
-            time.sleep(60)
+            # Wake up when the next quote is due instead of a fixed minute
+            time.sleep(S.TokenCharter.get_seconds_until_next_quote())
         except KeyboardInterrupt:
             logger.info("\nStopped by user")
+            S.TokenCharter.stop_price_stream()
+            if S.Standby:
+                S.Standby.stop()
             break
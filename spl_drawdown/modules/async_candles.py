@@ -0,0 +1,222 @@
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+import aiohttp
+
+from spl_drawdown.types.candle_data import CandleData
+from spl_drawdown.utils.http_client import HttpClient
+from spl_drawdown.utils.log import get_logger
+
+logger = get_logger()
+
+
+@dataclass
+class CandleRequest:
+    mint_address: str
+    start_date: datetime
+    end_date: datetime
+
+
+def get_candle_windows(start_date: datetime, end_date: datetime, interval: str) -> List[Tuple[int, int]]:
+    """Split a date range into the (time_from, time_to) windows requested from /defi/v3/ohlcv
+
+    Birdeye returns at most ~100 candles per call, so ranges are walked 99 periods at a time.
+
+    Args:
+        start_date (datetime): first candle time
+        end_date (datetime): last candle time
+        interval (str): "H" or "D"
+
+    Returns:
+        List[Tuple[int, int]]: unix time windows in chronological order
+    """
+    step = timedelta(hours=1) if interval == "H" else timedelta(days=1)
+    windows = list()
+    temp_end_time = start_date
+    while temp_end_time < end_date:
+        temp_end_time = min(start_date + step * 99, end_date)
+        windows.append((int(start_date.timestamp()), int(temp_end_time.timestamp())))
+        start_date = temp_end_time + step
+    return windows
+
+
+def parse_candle_items(items: List[dict]) -> List[CandleData]:
+    """Convert /defi/v3/ohlcv items into CandleData"""
+    return [
+        CandleData(
+            time=datetime.fromtimestamp(each["unix_time"]),
+            open=each["o"],
+            high=each["h"],
+            low=each["l"],
+            close=each["c"],
+            volume=each["v_usd"],
+        )
+        for each in items
+    ]
+
+
+class AsyncCandleFetcher:
+    def __init__(
+        self,
+        headers: dict,
+        http: HttpClient,
+        max_concurrent_tokens: int = 8,
+        max_concurrent_windows: int = 4,
+        timeout_seconds: float = 30.0,
+        max_attempts: int = 3,
+        retry_wait_seconds: float = 2.0,
+        base_url: str = "https://public-api.birdeye.so",
+    ):
+        self.headers = headers
+        self.http = http
+        self.url = "{b}/defi/v3/ohlcv".format(b=base_url)
+        self.max_concurrent_tokens = max_concurrent_tokens
+        self.max_concurrent_windows = max_concurrent_windows
+        self.timeout_seconds = timeout_seconds
+        self.max_attempts = max_attempts
+        self.retry_wait_seconds = retry_wait_seconds
+
+    def fetch(
+        self,
+        candle_requests: List[CandleRequest],
+        interval: str = "H",
+        on_page: Optional[Callable[[str, List[CandleData]], None]] = None,
+    ) -> Dict[str, List[CandleData]]:
+        """Fetch candles for every request concurrently
+
+        Args:
+            candle_requests (List[CandleRequest]): one request per token
+            interval (str, optional): "H" or "D". Defaults to "H".
+            on_page (Callable, optional): called with (mint_address, candles) for each window, in window order
+                per token, instead of the candles being collected
+
+        Returns:
+            Dict[str, List[CandleData]]: candles keyed by mint address, same content as
+                TokenCharts.get_candle_data_hourly / get_candle_data_daily
+        """
+        if not candle_requests:
+            return dict()
+        return asyncio.run(self._fetch_all(candle_requests=candle_requests, interval=interval, on_page=on_page))
+
+    async def _fetch_all(
+        self,
+        candle_requests: List[CandleRequest],
+        interval: str,
+        on_page: Optional[Callable[[str, List[CandleData]], None]],
+    ) -> Dict[str, List[CandleData]]:
+        token_semaphore = asyncio.Semaphore(self.max_concurrent_tokens)
+        timeout = aiohttp.ClientTimeout(total=self.timeout_seconds)
+        async with aiohttp.ClientSession(headers=self.headers, timeout=timeout) as session:
+            results = await asyncio.gather(
+                *[
+                    self._fetch_token(
+                        session=session,
+                        token_semaphore=token_semaphore,
+                        candle_request=each,
+                        interval=interval,
+                        on_page=on_page,
+                    )
+                    for each in candle_requests
+                ]
+            )
+        return {each.mint_address: candles for each, candles in zip(candle_requests, results)}
+
+    async def _fetch_token(
+        self,
+        session: aiohttp.ClientSession,
+        token_semaphore: asyncio.Semaphore,
+        candle_request: CandleRequest,
+        interval: str,
+        on_page: Optional[Callable[[str, List[CandleData]], None]],
+    ) -> List[CandleData]:
+        async with token_semaphore:
+            windows = get_candle_windows(
+                start_date=candle_request.start_date, end_date=candle_request.end_date, interval=interval
+            )
+            window_semaphore = asyncio.Semaphore(self.max_concurrent_windows)
+            tasks = [
+                asyncio.ensure_future(
+                    self._fetch_window(
+                        session=session,
+                        window_semaphore=window_semaphore,
+                        mint_address=candle_request.mint_address,
+                        interval=interval,
+                        window=window,
+                    )
+                )
+                for window in windows
+            ]
+
+            # Windows are consumed in order while later ones are still in flight
+            results = list()
+            candle_count = 0
+            for task in tasks:
+                try:
+                    page = await task
+                except Exception as e:
+                    logger.info("Candle fetch failed for {t}: {e}".format(t=candle_request.mint_address, e=e))
+                    page = None
+                # Same behaviour as the synchronous path: stop at the first failed window
+                if page is None:
+                    break
+                candle_count += len(page)
+                if on_page:
+                    on_page(candle_request.mint_address, page)
+                else:
+                    results.extend(page)
+
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        logger.info("{i} candles fetched for {t}".format(i=candle_count, t=candle_request.mint_address))
+        return results
+
+    async def _fetch_window(
+        self,
+        session: aiohttp.ClientSession,
+        window_semaphore: asyncio.Semaphore,
+        mint_address: str,
+        interval: str,
+        window: Tuple[int, int],
+    ) -> List[CandleData]:
+        params = {
+            "address": mint_address,
+            "type": "1H" if interval == "H" else "1D",
+            "currency": "usd",
+            "time_from": window[0],
+            "time_to": window[1],
+        }
+        async with window_semaphore:
+            attempt = 0
+            while True:
+                attempt += 1
+                try:
+                    await self.http.limit_async("birdeye")
+                    with self.http.track(provider="birdeye", endpoint="/defi/v3/ohlcv", mint=mint_address):
+                        async with session.get(self.url, params=params) as response:
+                            if response.status == 429 or response.status >= 500:
+                                raise aiohttp.ClientResponseError(
+                                    response.request_info, response.history, status=response.status
+                                )
+                            if response.status != 200:
+                                text = await response.text()
+                                logger.info("Response failed for {t}: {e}".format(t=mint_address, e=text))
+                                self.http.metrics.inc(
+                                    "http_errors_total", provider="birdeye", endpoint="/defi/v3/ohlcv"
+                                )
+                                return None
+                            response_json = await response.json(content_type=None)
+                    break
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    if attempt >= self.max_attempts:
+                        raise
+                    await asyncio.sleep(self.retry_wait_seconds)
+
+        if not response_json or "data" not in response_json or "items" not in response_json["data"]:
+            logger.info("No OCLHV data for {t}: {e}".format(t=mint_address, e=response_json))
+            return None
+
+        return parse_candle_items(items=response_json["data"]["items"])
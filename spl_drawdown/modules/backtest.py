@@ -0,0 +1,492 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from datetime import datetime, timezone
+from functools import partial
+from itertools import product
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from spl_drawdown.modules.candle_store import CandleStore
+from spl_drawdown.types.backtest_result import BacktestResult, BacktestTrade
+from spl_drawdown.types.candle_data import CandleData
+from spl_drawdown.types.screen_params import ScreenParams
+from spl_drawdown.utils.log import get_logger
+
+logger = get_logger()
+
+HOUR_SECONDS = 3600
+DAY_HOURS = 24
+DAY_SECONDS = DAY_HOURS * HOUR_SECONDS
+LOCAL_EPOCH = datetime(1970, 1, 1)
+
+
+class ReplayData:
+    """Hourly open, close and volume of many tokens on a shared hour grid starting at midnight UTC, NaN where a
+    token has no candle, plus the high, low and close of its daily candles per UTC day when they were loaded"""
+
+    __slots__ = ("mints", "start_time", "open", "close", "volume", "daily_high", "daily_low", "daily_close")
+
+    def __init__(
+        self,
+        mints: List[str],
+        start_time: int,
+        open: np.ndarray,
+        close: np.ndarray,
+        volume: np.ndarray,
+        daily_high: Optional[np.ndarray] = None,
+        daily_low: Optional[np.ndarray] = None,
+        daily_close: Optional[np.ndarray] = None,
+    ):
+        self.mints = mints
+        self.start_time = start_time
+        self.open = open
+        self.close = close
+        self.volume = volume
+        self.daily_high = daily_high
+        self.daily_low = daily_low
+        self.daily_close = daily_close
+
+    @classmethod
+    def from_candles(
+        cls,
+        candles_by_mint: Dict[str, List[CandleData]],
+        daily_candles_by_mint: Optional[Dict[str, List[CandleData]]] = None,
+    ) -> "ReplayData":
+        """Lay out hourly and, if given, Birdeye daily candles per mint
+
+        The grid starts at midnight UTC of the first candle and ends on a UTC day, mints without hourly
+        candles are left out.
+        """
+        mints = [k for k, v in candles_by_mint.items() if v]
+        if not mints:
+            empty = np.empty((0, 0), dtype=np.float64)
+            daily = None if daily_candles_by_mint is None else empty
+            return cls(
+                mints=[],
+                start_time=0,
+                open=empty,
+                close=empty,
+                volume=empty,
+                daily_high=daily,
+                daily_low=daily,
+                daily_close=daily,
+            )
+
+        times = {k: cls._get_times(candles=candles_by_mint[k]) for k in mints}
+        daily_times = dict()
+        if daily_candles_by_mint is not None:
+            daily_times = {
+                k: cls._get_times(candles=daily_candles_by_mint[k]) for k in mints if daily_candles_by_mint.get(k)
+            }
+        all_times = list(times.values()) + list(daily_times.values())
+
+        start_time = min(int(x.min()) for x in all_times)
+        start_time -= start_time % DAY_SECONDS
+        days = (max(int(x.max()) for x in all_times) - start_time) // DAY_SECONDS + 1
+
+        shape = (len(mints), days * DAY_HOURS)
+        open, close, volume = np.full(shape, np.nan), np.full(shape, np.nan), np.full(shape, np.nan)
+        for row, mint in enumerate(mints):
+            hours = (times[mint] - start_time) // HOUR_SECONDS
+            open[row, hours] = [x.open for x in candles_by_mint[mint]]
+            close[row, hours] = [x.close for x in candles_by_mint[mint]]
+            volume[row, hours] = [x.volume for x in candles_by_mint[mint]]
+        data = cls(mints=mints, start_time=start_time, open=open, close=close, volume=volume)
+        if daily_candles_by_mint is None:
+            return data
+
+        shape = (len(mints), days)
+        data.daily_high, data.daily_low, data.daily_close = (np.full(shape, np.nan) for _ in range(3))
+        for row, mint in enumerate(mints):
+            if mint not in daily_times:
+                continue
+            candles = daily_candles_by_mint[mint]
+            columns = (daily_times[mint] - start_time) // DAY_SECONDS
+            data.daily_high[row, columns] = [x.high for x in candles]
+            data.daily_low[row, columns] = [x.low for x in candles]
+            data.daily_close[row, columns] = [x.close for x in candles]
+        return data
+
+    @staticmethod
+    def _get_times(candles: List[CandleData]) -> np.ndarray:
+        return np.fromiter((x.time.timestamp() for x in candles), dtype=np.int64, count=len(candles))
+
+    @classmethod
+    def from_store(
+        cls, store: CandleStore, start_date: datetime, end_date: datetime, mints: Optional[List[str]] = None
+    ) -> "ReplayData":
+        """Hourly and daily candles between start_date and end_date from a CandleStore, all stored mints by default"""
+        mints = mints if mints is not None else store.get_mints(interval="H")
+        logger.info("Loading stored candles of {i} tokens".format(i=len(mints)))
+        return cls.from_candles(
+            candles_by_mint={
+                x: store.get_candles(mint=x, interval="H", start_date=start_date, end_date=end_date) for x in mints
+            },
+            daily_candles_by_mint={
+                x: store.get_candles(mint=x, interval="D", start_date=start_date, end_date=end_date) for x in mints
+            },
+        )
+
+    @property
+    def hours(self) -> int:
+        return self.close.shape[1]
+
+    @property
+    def days(self) -> int:
+        return self.hours // DAY_HOURS
+
+    @property
+    def has_daily_candles(self) -> bool:
+        return self.daily_high is not None
+
+    def time_at(self, hour: int) -> datetime:
+        return datetime.fromtimestamp(self.start_time + hour * HOUR_SECONDS, tz=timezone.utc)
+
+    def get_hour(self, value: datetime) -> int:
+        return (int(value.timestamp()) - self.start_time) // HOUR_SECONDS
+
+
+class ReplayEngine:
+    def __init__(self, data: ReplayData, horizons_hours: Sequence[int] = (24, 72, 168), hourly_only: bool = False):
+        """Replays the drawdown screen and the ATH breakout trigger over stored candles
+
+        The simulated clock screens once per UTC day like TokenVols.can_run, at midnight UTC on the candles
+        completed by then, with the rules of TokenCharts.populate_token_list and clean_token_list. Tokens that
+        pass are watched until the next screen and bought at the first hourly close above their ATH, the close
+        standing in for the quote of update_current_prices. Every mint is bought at most once.
+
+        Like the live screen, a token has to pass the daily pass on Birdeye's "D" candles, whose high / low span
+        every trade of the day, and then the hourly pass on hourly candles condensed into days. The live daily
+        pass also sees the UTC day that just opened, the replay leaves it out as its stored candle covers hours
+        after the screen. The hourly pass splits days on local dates, in the timezone of this process, as
+        DailyCandleAggregator does, so it matches a live screen running in the same timezone.
+
+        All tokens are screened at once on token x day arrays, a screen costs the same for 10 or 10,000 tokens.
+
+        Args:
+            data (ReplayData): hourly candles, and the daily candles unless hourly_only
+            horizons_hours (Sequence[int], optional): hours after the entry the return is measured at.
+                Defaults to 1, 3 and 7 days.
+            hourly_only (bool, optional): screen on the hourly pass alone, which passes tokens the live screen
+                drops on the daily pass. Defaults to False.
+
+        Raises:
+            ValueError: data has no daily candles and hourly_only is False
+        """
+        if not hourly_only and not data.has_daily_candles:
+            raise ValueError("No daily candles to replay the daily pass with, load them or set hourly_only")
+        self.data = data
+        self.horizons_hours = tuple(horizons_hours)
+        self.hourly_only = hourly_only
+
+        # Candle times are local, DailyCandleAggregator skips a candle not after the one before it, which drops
+        # the repeated hour when daylight saving time ends
+        local_times = [datetime.fromtimestamp(data.start_time + x * HOUR_SECONDS) for x in range(data.hours)]
+        wall_seconds = np.array([(x - LOCAL_EPOCH).total_seconds() for x in local_times], dtype=np.int64)
+        valid_hours = ~np.isnan(data.close)
+        latest = np.maximum.accumulate(np.where(valid_hours, wall_seconds, np.iinfo(np.int64).min), axis=1)
+        taken_hours = valid_hours.copy()
+        taken_hours[:, 1:] &= wall_seconds[1:] > latest[:, :-1]
+        self._condense_segments(
+            dates=np.array([x.toordinal() for x in local_times], dtype=np.int64), taken=taken_hours
+        )
+
+        # Volumes of taken candles first, for the last-24-candles volume check
+        self._hour_counts = np.cumsum(taken_hours, axis=1, dtype=np.int32)
+        self._compact_volume = np.take_along_axis(data.volume, np.argsort(~taken_hours, axis=1, kind="stable"), axis=1)
+
+        # Last close at or before each hour, the price a quote would have returned
+        last_valid = np.where(valid_hours, np.arange(data.hours), 0)
+        np.maximum.accumulate(last_valid, axis=1, out=last_valid)
+        self._close_filled = np.take_along_axis(data.close, last_valid, axis=1)
+
+    def _condense_segments(self, dates: np.ndarray, taken: np.ndarray):
+        """Condense the hours into segments, the runs of hours sharing a UTC day and a local date
+
+        A screen window starts and ends at midnight UTC, so the days DailyCandleAggregator builds from it
+        are whole segments. As in the aggregator, a day's high / low come from the hourly opens and closes
+        and only its first 24 candles count. A local day cut by the start of the window is counted from there,
+        so the first segment of every UTC day is also kept without that limit.
+
+        Args:
+            dates (np.ndarray): local date ordinal of every hour
+            taken (np.ndarray): candles the aggregator takes, by token and hour
+        """
+        hours = self.data.hours
+        open, close = self.data.open, self.data.close
+        utc_days = np.arange(hours) // DAY_HOURS
+        new_date = np.r_[True, dates[1:] != dates[:-1]]
+        starts = np.flatnonzero(new_date | np.r_[True, utc_days[1:] != utc_days[:-1]])
+        self._segment_dates = dates[starts]
+        # First segment of every UTC day, and the segment count last
+        self._day_segments = np.searchsorted(utc_days[starts], np.arange(self.data.days + 1))
+
+        # Candles of each local day up to each hour
+        counts = np.cumsum(taken, axis=1, dtype=np.int32)
+        date_index = np.cumsum(new_date) - 1
+        counts_before = (counts - taken)[:, np.flatnonzero(new_date)]
+        kept = taken & (counts - counts_before[:, date_index] <= DAY_HOURS)
+
+        self._segments = self._reduce_hours(open=open, close=close, mask=kept, starts=starts)
+        first_segments = self._day_segments[:-1]
+        self._first_segments = tuple(
+            x[:, first_segments] for x in self._reduce_hours(open=open, close=close, mask=taken, starts=starts)
+        )
+
+    @staticmethod
+    def _reduce_hours(
+        open: np.ndarray, close: np.ndarray, mask: np.ndarray, starts: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """High, low, last close and candle count of the masked hours of every run of hours from starts"""
+        high = np.fmax.reduceat(np.where(mask, np.fmax(open, close), np.nan), starts, axis=1)
+        low = np.fmin.reduceat(np.where(mask, np.fmin(open, close), np.nan), starts, axis=1)
+        count = np.add.reduceat(mask, starts, axis=1, dtype=np.int32)
+        last = np.where(mask, np.arange(close.shape[1]), 0)
+        np.maximum.accumulate(last, axis=1, out=last)
+        ends = np.r_[starts[1:], close.shape[1]] - 1
+        last_close = np.take_along_axis(close, last[:, ends], axis=1)
+        last_close[count == 0] = np.nan
+        return high, low, last_close, count
+
+    def _get_days(self, day: int, candle_days: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """High, low and close of the days DailyCandleAggregator builds from the hours of the screen window"""
+        first_day = max(0, day - candle_days)
+        first, end = self._day_segments[first_day], self._day_segments[day]
+        high, low, close, count = (x[:, first:end].copy() for x in self._segments)
+        for x, first_segment in zip((high, low, close, count), self._first_segments):
+            x[:, 0] = first_segment[:, first_day]
+
+        dates = self._segment_dates[first:end]
+        groups = np.flatnonzero(np.r_[True, dates[1:] != dates[:-1]])
+        if len(groups) == len(dates):
+            return high, low, close
+
+        # Days split at midnight UTC, close is the last close of the last segment with candles
+        last = np.where(count > 0, np.arange(len(dates)), 0)
+        np.maximum.accumulate(last, axis=1, out=last)
+        ends = np.r_[groups[1:], len(dates)] - 1
+        close = np.take_along_axis(close, last[:, ends], axis=1)
+        close[np.add.reduceat(count, groups, axis=1) == 0] = np.nan
+        return np.fmax.reduceat(high, groups, axis=1), np.fmin.reduceat(low, groups, axis=1), close
+
+    def screen(self, day: int, params: ScreenParams) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Screen every token at midnight UTC of day, on the candles of the candle_days before it
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: passed mask, ATH price and drawdown percent per token
+        """
+        first_day = max(0, day - params.candle_days)
+        high, low, close = self._get_days(day=day, candle_days=params.candle_days)
+        passed, ath, drawdown = self._screen_days(high=high, low=low, close=close, params=params)
+        variation = self._get_volume_variation(hour=day * DAY_HOURS, first_hour=first_day * DAY_HOURS)
+        passed &= variation >= params.min_volume_variation
+        if not self.hourly_only:
+            daily_passed, _, _ = self._screen_days(
+                high=self.data.daily_high[:, first_day:day],
+                low=self.data.daily_low[:, first_day:day],
+                close=self.data.daily_close[:, first_day:day],
+                params=params,
+            )
+            passed &= daily_passed
+        return passed, ath, drawdown
+
+    @staticmethod
+    def _screen_days(
+        high: np.ndarray, low: np.ndarray, close: np.ndarray, params: ScreenParams
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """TokenCharts._screen_token_list on daily candles, without the volume check of the hourly pass"""
+        width = high.shape[1]
+        # Candles are consecutive by index, not by calendar day, so days without candles are moved to the end
+        valid = ~np.isnan(close)
+        order = np.argsort(~valid, axis=1, kind="stable")
+        high, low, close = (np.take_along_axis(x, order, axis=1) for x in (high, low, close))
+        counts = valid.sum(axis=1)
+        positions = np.arange(width)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            ath = np.fmax.reduce(high, axis=1)
+            # Latest candle with the ATH, like CandleSeries.get_ath
+            ath_index = width - 1 - np.argmax((high == ath[:, None])[:, ::-1], axis=1)
+            after = (positions > ath_index[:, None]) & (positions < counts[:, None])
+            low_after = np.fmin.reduce(np.where(after, low, np.nan), axis=1)
+            drawdown = (ath - low_after) / ath
+
+            below = after & (close < (ath * (1.0 - params.dip_percent))[:, None])
+            starts = width - params.consecutive_closes + 1
+            if starts > 0:
+                run = below[:, :starts].copy()
+                for offset in range(1, params.consecutive_closes):
+                    run &= below[:, offset:][:, :starts]
+                has_run = run.any(axis=1)
+            else:
+                has_run = np.zeros(len(counts), dtype=bool)
+
+            passed = (
+                (counts >= params.min_candles)
+                & (ath >= params.min_ath_price_usd)
+                & (low_after > 0)
+                & (drawdown >= params.min_drawdown_percent)
+                & has_run
+            )
+        return passed, ath, drawdown
+
+    def _get_volume_variation(self, hour: int, first_hour: int, last_hours: int = DAY_HOURS) -> np.ndarray:
+        """TokenCharts.verify_volume_authenticity per token: last_hours candles before hour, less the last one"""
+        if hour == 0:
+            return np.zeros(len(self.data.mints))
+        counts = self._hour_counts[:, hour - 1]
+        first_counts = self._hour_counts[:, first_hour - 1] if first_hour > 0 else np.zeros_like(counts)
+        indexes = counts[:, None] - last_hours + np.arange(last_hours - 1)
+        in_scope = indexes >= first_counts[:, None]
+        volumes = np.where(
+            in_scope, np.take_along_axis(self._compact_volume, np.clip(indexes, 0, None), axis=1), np.nan
+        )
+
+        n = in_scope.sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.nansum(volumes, axis=1) / n
+            variance = np.nansum((volumes - mean[:, None]) ** 2, axis=1) / (n - 1)
+            variation = np.sqrt(variance) / mean
+        return np.where((n >= 2) & (mean != 0), variation, 0.0)
+
+    def _is_cleaned(self, price: np.ndarray, ath: np.ndarray, params: ScreenParams) -> np.ndarray:
+        """TokenCharts.clean_token_list per token, NaN prices are kept"""
+        with np.errstate(invalid="ignore"):
+            too_far = (price != 0) & (ath - price > params.max_ath_gap_usd) & (price < params.max_gap_price_usd)
+            too_low = (price != 0) & (price < params.min_price_usd)
+        return too_far | too_low
+
+    def run(
+        self,
+        params: Optional[ScreenParams] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+    ) -> BacktestResult:
+        """Replay the screen and the trigger day by day between start_date and end_date
+
+        Args:
+            params (ScreenParams, optional): Defaults to the live thresholds.
+            start_date (datetime, optional): first screen. Defaults to the first day with enough candles.
+            end_date (datetime, optional): last screen. Defaults to the end of the data.
+
+        Returns:
+            BacktestResult: trades in entry order
+        """
+        params = params or ScreenParams()
+        result = BacktestResult(params=params)
+        first_day = max(1, self.data.get_hour(start_date) // DAY_HOURS if start_date else params.min_candles)
+        last_day = min(self.data.days, self.data.get_hour(end_date) // DAY_HOURS + 1 if end_date else self.data.days)
+        bought = np.zeros(len(self.data.mints), dtype=bool)
+
+        for day in range(first_day, last_day):
+            hour = day * DAY_HOURS
+            passed, ath, drawdown = self.screen(day=day, params=params)
+            watched = passed & ~bought & ~self._is_cleaned(self._close_filled[:, hour - 1], ath, params)
+            result.screens += 1
+            result.watched += int(watched.sum())
+
+            rows = np.flatnonzero(watched)
+            if not len(rows):
+                continue
+            end = hour + DAY_HOURS
+            with np.errstate(invalid="ignore"):
+                breakouts = self.data.close[rows, hour:end] > ath[rows, None]
+            for row, row_breakouts in zip(rows, breakouts):
+                if not row_breakouts.any():
+                    continue
+                offset = int(np.argmax(row_breakouts))
+                bought[row] = True
+                result.trades.append(
+                    self._get_trade(
+                        row=row, hour=hour + offset, screen_hour=hour, ath=ath[row], drawdown=drawdown[row]
+                    )
+                )
+
+        result.trades.sort(key=lambda x: x.entry_time)
+        return result
+
+    def _get_trade(self, row: int, hour: int, screen_hour: int, ath: float, drawdown: float) -> BacktestTrade:
+        """Trade bought at the close of hour, the quote arrives once the hour is over"""
+        entry_price = float(self.data.close[row, hour])
+        returns = dict()
+        for horizon in self.horizons_hours:
+            exit_hour = hour + horizon
+            returns[horizon] = (
+                float(self._close_filled[row, exit_hour]) / entry_price - 1.0 if exit_hour < self.data.hours else None
+            )
+        start = hour + 1
+        end = min(hour + max(self.horizons_hours, default=0), self.data.hours - 1) + 1
+        max_close = np.fmax.reduce(self.data.close[row, start:end]) if end > start else np.nan
+        return BacktestTrade(
+            mint_address=self.data.mints[row],
+            screened_at=self.data.time_at(screen_hour),
+            entry_time=self.data.time_at(hour + 1),
+            entry_price_usd=entry_price,
+            ath_price_usd=float(ath),
+            drawdown_percent=float(drawdown),
+            returns=returns,
+            max_return=None if np.isnan(max_close) else float(max_close) / entry_price - 1.0,
+        )
+
+    def sweep(
+        self,
+        param_grid: List[ScreenParams],
+        max_workers: Optional[int] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+    ) -> List[BacktestResult]:
+        """run for every ScreenParams in param_grid across a process pool, results in param_grid order
+
+        Each worker gets the candles once when it starts instead of with every task.
+        """
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_worker,
+            initargs=(self.data, self.horizons_hours, self.hourly_only),
+        ) as executor:
+            return list(executor.map(partial(_run_worker, start_date=start_date, end_date=end_date), param_grid))
+
+
+def get_param_grid(base: Optional[ScreenParams] = None, **values: Sequence) -> List[ScreenParams]:
+    """Every combination of values, e.g. get_param_grid(min_drawdown_percent=[0.6, 0.7], dip_percent=[0.5, 0.6])"""
+    base = base or ScreenParams()
+    keys = list(values)
+    return [replace(base, **dict(zip(keys, x))) for x in product(*(values[k] for k in keys))]
+
+
+_worker_engine: Optional[ReplayEngine] = None
+
+
+def _init_worker(data: ReplayData, horizons_hours: Sequence[int], hourly_only: bool):
+    global _worker_engine
+    _worker_engine = ReplayEngine(data=data, horizons_hours=horizons_hours, hourly_only=hourly_only)
+
+
+def _run_worker(params: ScreenParams, start_date: Optional[datetime], end_date: Optional[datetime]) -> BacktestResult:
+    return _worker_engine.run(params=params, start_date=start_date, end_date=end_date)
+
+
+if __name__ == "__main__":
+    import os
+    from datetime import timedelta
+
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    CANDLE_STORE_PATH = os.environ.get("CANDLE_STORE_PATH", "spl_drawdown/data/candle_store.sqlite")
+    end_date = datetime.now(timezone.utc)
+    data = ReplayData.from_store(
+        store=CandleStore(path=CANDLE_STORE_PATH), start_date=end_date - timedelta(days=730), end_date=end_date
+    )
+    engine = ReplayEngine(data=data)
+    logger.info(engine.run())
+
+    results = engine.sweep(
+        param_grid=get_param_grid(
+            min_drawdown_percent=[0.6, 0.7, 0.8], dip_percent=[0.5, 0.6, 0.7], min_volume_variation=[0.2, 0.3, 0.4]
+        )
+    )
+    results.sort(key=lambda x: x.get_mean_return(hours=72) or float("-inf"), reverse=True)
+    for each in results:
+        logger.info(each)
@@ -0,0 +1,78 @@
+from collections import deque
+from datetime import date
+from typing import List, Optional
+
+from spl_drawdown.types.candle_data import CandleData
+
+
+class DailyCandleAggregator:
+    def __init__(self, keep_last_hours: int = 24, max_hours_per_day: int = 24):
+        """Condense chronologically ordered hourly candles into daily candles in a single pass
+
+        Hourly candles are consumed page by page and only the running values of the current day
+        are kept, plus the last keep_last_hours hourly candles for the volume authenticity check.
+
+        A day's high / low are taken from the hourly opens and closes, its open from the first hour and
+        its close from the last hour, matching TokenCharts.condense_candles_to_days.
+
+        Args:
+            keep_last_hours (int, optional): hourly candles to keep. Defaults to 24.
+            max_hours_per_day (int, optional): hourly candles used per day. Defaults to 24.
+        """
+        self.max_hours_per_day = max_hours_per_day
+        self.last_hours = deque(maxlen=keep_last_hours)
+        self.daily_candles: List[CandleData] = list()
+        self._last_time = None
+        self._day: Optional[date] = None
+        self._day_candle: Optional[CandleData] = None
+        self._day_hours = 0
+        self._day_volume = 0.0
+
+    def add_candles(self, candles: List[CandleData]):
+        for each in candles:
+            self.add_candle(each)
+
+    def add_candle(self, candle: CandleData):
+        # Pages replayed by a retried request arrive again from the start, skip anything already seen
+        if self._last_time is not None and candle.time <= self._last_time:
+            return
+        self._last_time = candle.time
+        self.last_hours.append(candle)
+
+        day = candle.time.date()
+        if day != self._day:
+            self._close_day()
+            self._day = day
+            self._day_candle = CandleData(
+                time=candle.time,
+                open=candle.open,
+                high=max(candle.open, candle.close),
+                low=min(candle.open, candle.close),
+                close=candle.close,
+            )
+            self._day_hours = 1
+            self._day_volume = candle.volume
+            return
+
+        if self._day_hours >= self.max_hours_per_day:
+            return
+        self._day_hours += 1
+        self._day_candle.high = max(self._day_candle.high, candle.open, candle.close)
+        self._day_candle.low = min(self._day_candle.low, candle.open, candle.close)
+        self._day_candle.close = candle.close
+        self._day_volume += candle.volume
+
+    def _close_day(self):
+        if self._day_candle is None:
+            return
+        self._day_candle.volume = round(self._day_volume, 0)
+        self.daily_candles.append(self._day_candle)
+        self._day_candle = None
+
+    def get_last_hours(self) -> List[CandleData]:
+        return list(self.last_hours)
+
+    def finish(self) -> List[CandleData]:
+        """Close the current day and return all daily candles"""
+        self._close_day()
+        return self.daily_candles
@@ -0,0 +1,151 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, List, Optional, Tuple
+
+from spl_drawdown.types.candle_data import CandleData
+from spl_drawdown.utils.log import get_logger
+
+logger = get_logger()
+
+
+class CandleStore:
+    def __init__(self, path: str):
+        """On-disk OHLCV store keyed by mint + interval
+
+        Candles are kept alongside the contiguous range they cover, so callers only need
+        to request the tail after the last stored candle.
+
+        Args:
+            path (str): sqlite file, created if missing
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS candles (
+                    mint TEXT NOT NULL,
+                    interval TEXT NOT NULL,
+                    unix_time INTEGER NOT NULL,
+                    open REAL,
+                    high REAL,
+                    low REAL,
+                    close REAL,
+                    volume REAL,
+                    PRIMARY KEY (mint, interval, unix_time)
+                ) WITHOUT ROWID
+                """)
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS coverage (
+                    mint TEXT NOT NULL,
+                    interval TEXT NOT NULL,
+                    covered_from INTEGER NOT NULL,
+                    covered_to INTEGER NOT NULL,
+                    PRIMARY KEY (mint, interval)
+                )
+                """)
+
+    def get_mints(self, interval: str) -> List[str]:
+        """Mints with stored candles of interval"""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT mint FROM coverage WHERE interval = ? ORDER BY mint", (interval,)
+            ).fetchall()
+        return [x[0] for x in rows]
+
+    def get_coverage(self, mint: str, interval: str) -> Optional[Tuple[int, int]]:
+        """(covered_from, covered_to) unix times of the contiguous stored range, None if nothing stored"""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT covered_from, covered_to FROM coverage WHERE mint = ? AND interval = ?", (mint, interval)
+            ).fetchone()
+        return row
+
+    def save_candles(self, mint: str, interval: str, candles: List[CandleData], covered_from: int):
+        """Upsert candles and extend the covered range
+
+        Args:
+            mint (str): mint address
+            interval (str): "H" or "D"
+            candles (List[CandleData]): candles fetched from covered_from onwards
+            covered_from (int): unix time the fetch started at
+        """
+        if not candles:
+            return
+        rows = [(mint, interval, int(x.time.timestamp()), x.open, x.high, x.low, x.close, x.volume) for x in candles]
+        covered_to = max(x[2] for x in rows)
+        with self._lock, self._connection:
+            self._connection.executemany("INSERT OR REPLACE INTO candles VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            existing = self._connection.execute(
+                "SELECT covered_from, covered_to FROM coverage WHERE mint = ? AND interval = ?", (mint, interval)
+            ).fetchone()
+            if existing and existing[0] <= covered_from <= existing[1]:
+                covered_from = existing[0]
+                covered_to = max(covered_to, existing[1])
+            self._connection.execute(
+                "INSERT OR REPLACE INTO coverage VALUES (?, ?, ?, ?)", (mint, interval, covered_from, covered_to)
+            )
+
+    def get_candles(self, mint: str, interval: str, start_date: datetime, end_date: datetime) -> List[CandleData]:
+        """Stored candles between start_date and end_date inclusive, oldest first"""
+        with self._lock:
+            rows = self._connection.execute(
+                """
+                SELECT unix_time, open, high, low, close, volume FROM candles
+                WHERE mint = ? AND interval = ? AND unix_time BETWEEN ? AND ?
+                ORDER BY unix_time
+                """,
+                (mint, interval, int(start_date.timestamp()), int(end_date.timestamp())),
+            ).fetchall()
+        return [self._to_candle(row=x) for x in rows]
+
+    def iter_candles(
+        self, mint: str, interval: str, start_date: datetime, end_date: datetime, page_size: int = 500
+    ) -> Iterator[List[CandleData]]:
+        """Same as get_candles, yielded page_size candles at a time"""
+        time_from = int(start_date.timestamp())
+        time_to = int(end_date.timestamp())
+        while True:
+            with self._lock:
+                rows = self._connection.execute(
+                    """
+                    SELECT unix_time, open, high, low, close, volume FROM candles
+                    WHERE mint = ? AND interval = ? AND unix_time BETWEEN ? AND ?
+                    ORDER BY unix_time
+                    LIMIT ?
+                    """,
+                    (mint, interval, time_from, time_to, page_size),
+                ).fetchall()
+            if not rows:
+                return
+            yield [self._to_candle(row=x) for x in rows]
+            time_from = rows[-1][0] + 1
+
+    @staticmethod
+    def _to_candle(row: tuple) -> CandleData:
+        return CandleData(
+            time=datetime.fromtimestamp(row[0]),
+            open=row[1],
+            high=row[2],
+            low=row[3],
+            close=row[4],
+            volume=row[5],
+        )
+
+    def prune(self, max_age_days: int = 400):
+        """Remove candles older than max_age_days"""
+        threshold = int((datetime.now(timezone.utc) - timedelta(days=max_age_days)).timestamp())
+        with self._lock, self._connection:
+            deleted = self._connection.execute("DELETE FROM candles WHERE unix_time < ?", (threshold,)).rowcount
+            self._connection.execute(
+                "UPDATE coverage SET covered_from = ? WHERE covered_from < ?", (threshold, threshold)
+            )
+            self._connection.execute("DELETE FROM coverage WHERE covered_to < ?", (threshold,))
+        if deleted:
+            logger.info("Pruned {i} stored candles".format(i=deleted))
@@ -0,0 +1,140 @@
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from solana.rpc.api import Client
+from solders.signature import Signature
+from solders.transaction_status import TransactionConfirmationStatus
+
+from spl_drawdown.utils.http_client import HttpClient, get_http_client
+from spl_drawdown.utils.log import get_logger
+
+logger = get_logger()
+
+# on_done(signature, is_confirmed)
+ConfirmationCallback = Callable[[Signature, bool], None]
+
+
+@dataclass
+class PendingSignature:
+    signature: Signature
+    future: Future
+    expires_at: float
+    on_done: Optional[ConfirmationCallback] = None
+
+
+class ConfirmationTracker:
+    def __init__(
+        self,
+        client: Client,
+        http: Optional[HttpClient] = None,
+        poll_interval_seconds: float = 1.0,
+        timeout_seconds: float = 90.0,
+        batch_size: int = 256,
+    ):
+        """Confirms sent transactions in the background with batched getSignatureStatuses calls
+
+        Args:
+            client (Client): rpc client
+            http (HttpClient, optional): used for the helius rate limit and metrics. Defaults to the shared client.
+            poll_interval_seconds (float, optional): wait between polls. Defaults to 1.0.
+            timeout_seconds (float, optional): a signature not confirmed by then counts as failed,
+                the blockhash of a swap expires after ~60-90s. Defaults to 90.0.
+            batch_size (int, optional): signatures per getSignatureStatuses call, 256 at most. Defaults to 256.
+        """
+        self.client = client
+        self.http = http or get_http_client()
+        self.poll_interval_seconds = poll_interval_seconds
+        self.timeout_seconds = timeout_seconds
+        self.batch_size = batch_size
+        self._pending: Dict[Signature, PendingSignature] = dict()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def track(self, signature: Signature, on_done: Optional[ConfirmationCallback] = None) -> Future:
+        """Follow signature until it is confirmed, failed or timed out
+
+        Args:
+            signature (Signature): sent transaction
+            on_done (ConfirmationCallback, optional): called from the tracker thread with the outcome
+
+        Returns:
+            Future: resolves to True once confirmed, False if the transaction failed or timed out
+        """
+        future = Future()
+        future.set_running_or_notify_cancel()
+        with self._lock:
+            self._pending[signature] = PendingSignature(
+                signature=signature,
+                future=future,
+                expires_at=time.monotonic() + self.timeout_seconds,
+                on_done=on_done,
+            )
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="ConfirmationTracker", daemon=True)
+                self._thread.start()
+        self._wake.set()
+        return future
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._thread = None
+                    return
+                signatures = list(self._pending)
+
+            for i in range(0, len(signatures), self.batch_size):
+                end = i + self.batch_size
+                try:
+                    self._poll(signatures=signatures[i:end])
+                except Exception as e:
+                    logger.info("Error getting signature statuses: {e}".format(e=e))
+            self._expire()
+
+            self._wake.wait(timeout=self.poll_interval_seconds)
+            self._wake.clear()
+
+    def _poll(self, signatures: List[Signature]):
+        self.http.limit("helius")
+        with self.http.track(provider="helius", endpoint="getSignatureStatuses"):
+            statuses = self.client.get_signature_statuses(signatures).value
+        for signature, status in zip(signatures, statuses):
+            if status is None:
+                continue
+            if status.err is not None:
+                logger.error("Transaction failed: https://solscan.io/tx/{t} {e}".format(t=signature, e=status.err))
+                self._resolve(signature=signature, is_confirmed=False)
+            elif status.confirmation_status in (
+                TransactionConfirmationStatus.Confirmed,
+                TransactionConfirmationStatus.Finalized,
+            ):
+                logger.info("Transaction confirmed: https://solscan.io/tx/{t}".format(t=signature))
+                self._resolve(signature=signature, is_confirmed=True)
+
+    def _expire(self):
+        now = time.monotonic()
+        with self._lock:
+            expired = [x.signature for x in self._pending.values() if x.expires_at <= now]
+        for signature in expired:
+            logger.error("Transaction not confirmed in time: https://solscan.io/tx/{t}".format(t=signature))
+            self._resolve(signature=signature, is_confirmed=False)
+
+    def _resolve(self, signature: Signature, is_confirmed: bool):
+        with self._lock:
+            pending = self._pending.pop(signature, None)
+        if pending is None:
+            return
+        pending.future.set_result(is_confirmed)
+        if pending.on_done:
+            try:
+                pending.on_done(signature, is_confirmed)
+            except Exception as e:
+                logger.error("Error in confirmation callback: {e}".format(e=e))
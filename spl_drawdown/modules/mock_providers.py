@@ -0,0 +1,533 @@
+import base64
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from solders.hash import Hash
+from solders.message import MessageV0
+from solders.pubkey import Pubkey
+from solders.signature import Signature
+from solders.system_program import TransferParams, transfer
+from solders.transaction import VersionedTransaction
+
+from spl_drawdown.utils.log import get_logger
+
+logger = get_logger()
+
+# Authorities accepted by TokenVolumes
+VALID_AUTHORITY = "TSLvdd1pWpHVjahSpsvCXUbgwsL3JAcvokwaKt1eokM"
+
+
+class SyntheticUniverse:
+    def __init__(self, size: int = 1000, seed: int = 0, reject_rate: float = 0.2, breakout_rate: float = 0.02):
+        """Deterministic token universe served by MockProviderServer
+
+        Every value is derived from the seed and the mint, so any candle window, quote or security lookup
+        is consistent across requests without storing candles. Tokens peak somewhere in the last year and
+        decay towards a random drawdown, a share of them fails one verification check and a share trades
+        above its ATH so runs also exercise buys.
+
+        Args:
+            size (int, optional): number of tokens in /defi/v3/token/list. Defaults to 1000.
+            seed (int, optional): Defaults to 0.
+            reject_rate (float, optional): share of tokens failing one of the TokenVolumes checks. Defaults to 0.2.
+            breakout_rate (float, optional): share of tokens quoted above their ATH. Defaults to 0.02.
+        """
+        self.size = size
+        self.seed = seed
+        self.reject_rate = reject_rate
+        self.breakout_rate = breakout_rate
+        self.created_at = int(time.time())
+        self.mints = [self._get_mint(index=i) for i in range(size)]
+        self._index = {x: i for i, x in enumerate(self.mints)}
+
+    def _get_mint(self, index: int) -> str:
+        digest = hashlib.sha256("{s}-{i}".format(s=self.seed, i=index).encode()).digest()
+        return str(Pubkey.from_bytes(digest))
+
+    def _unit(self, mint: str, key: str) -> float:
+        """Uniform value in [0, 1) fixed per seed, mint and key"""
+        digest = hashlib.blake2b("{s}-{m}-{k}".format(s=self.seed, m=mint, k=key).encode(), digest_size=8).digest()
+        return int.from_bytes(digest, "big") / 2**64
+
+    def __contains__(self, mint: str) -> bool:
+        return mint in self._index
+
+    def get_failed_check(self, mint: str) -> Optional[str]:
+        """Check the token is set up to fail, None for a token that passes every check"""
+        r = self._unit(mint=mint, key="check")
+        if r >= self.reject_rate:
+            return None
+        checks = ["update_authority", "ownership", "security", "market"]
+        return checks[int(r / self.reject_rate * len(checks))]
+
+    def get_volume(self, mint: str) -> float:
+        """24h volume, falling with the rank of the token so the list is sorted by volume"""
+        rank = self._index[mint]
+        return 100000.0 + 20000000.0 * (1.0 - rank / self.size)
+
+    def get_price(self, mint: str, unix_time: float) -> float:
+        """Price at unix_time: a 30 day rise to the ATH, then a decay towards the drawdown"""
+        base = 0.01 + 0.99 * self._unit(mint=mint, key="base")
+        peak_time = self.created_at - (20 + 280 * self._unit(mint=mint, key="peak")) * 86400
+        drawdown = 0.3 + 0.65 * self._unit(mint=mint, key="drawdown")
+        days_from_peak = (unix_time - peak_time) / 86400
+        if days_from_peak < 0:
+            shape = max(0.3, 1.0 + 0.7 * days_from_peak / 30)
+        else:
+            shape = (1.0 - drawdown) + drawdown * math.exp(-days_from_peak / 5)
+        hour = unix_time / 3600
+        return base * shape * (1.0 + 0.02 * math.sin(hour * 1.3 + 10 * self._unit(mint=mint, key="phase")))
+
+    def get_candles(self, mint: str, interval: str, time_from: int, time_to: int) -> List[dict]:
+        """/defi/v3/ohlcv items between time_from and time_to, nothing after now"""
+        step = 3600 if interval == "1H" else 86400
+        time_to = min(time_to, int(time.time()))
+        start = time_from - time_from % step
+        if start < time_from:
+            start += step
+        items = list()
+        for unix_time in range(start, time_to + 1, step):
+            samples = [self.get_price(mint=mint, unix_time=unix_time + x) for x in range(0, step + 1, 3600)]
+            volume = 500.0 + 20000.0 * self._unit(mint=mint, key="volume-{t}".format(t=unix_time))
+            items.append(
+                {
+                    "o": samples[0],
+                    "h": max(samples) * 1.01,
+                    "l": min(samples) * 0.99,
+                    "c": samples[-1],
+                    "v": volume / samples[-1],
+                    "v_usd": volume * step / 3600,
+                    "unix_time": unix_time,
+                    "address": mint,
+                    "type": interval,
+                    "currency": "usd",
+                }
+            )
+        return items
+
+    def get_current_price(self, mint: str) -> float:
+        now = time.time()
+        if self._unit(mint=mint, key="breakout") < self.breakout_rate:
+            # Above any close since the ATH
+            peak_time = self.created_at - (20 + 280 * self._unit(mint=mint, key="peak")) * 86400
+            return self.get_price(mint=mint, unix_time=peak_time) * 1.1
+        return self.get_price(mint=mint, unix_time=now)
+
+    def get_token_item(self, mint: str) -> dict:
+        """/defi/v3/token/list item"""
+        index = self._index[mint]
+        return {
+            "address": mint,
+            "name": "Synthetic {i}".format(i=index),
+            "symbol": "SYN{i}".format(i=index),
+            "decimals": 6,
+            "volume_24h_usd": self.get_volume(mint=mint),
+            "trade_24h_count": 1000 + index,
+            "liquidity": 250000.0,
+            "price": self.get_current_price(mint=mint),
+        }
+
+    def get_asset(self, mint: str) -> Optional[dict]:
+        """getAsset result"""
+        if mint not in self:
+            return None
+        authorities = [{"address": VALID_AUTHORITY, "scopes": ["full"]}]
+        if self.get_failed_check(mint=mint) == "update_authority":
+            authorities.append({"address": self._get_mint(index=-1), "scopes": ["metadata"]})
+        return {"interface": "FungibleToken", "id": mint, "authorities": authorities, "mutable": True, "burnt": False}
+
+    def get_creation_time(self, mint: str) -> int:
+        return self.created_at - int((60 + 300 * self._unit(mint=mint, key="created")) * 86400)
+
+    def get_creation_info(self, mint: str) -> dict:
+        """/defi/token_creation_info data"""
+        owner = VALID_AUTHORITY
+        if self.get_failed_check(mint=mint) == "ownership":
+            owner = self._get_mint(index=-2)
+        return {
+            "tokenAddress": mint,
+            "decimals": 6,
+            "owner": owner,
+            "blockUnixTime": self.get_creation_time(mint=mint),
+        }
+
+    def get_security(self, mint: str) -> dict:
+        """/defi/token_security data"""
+        return {
+            "creatorAddress": VALID_AUTHORITY,
+            "metaplexUpdateAuthority": VALID_AUTHORITY,
+            "creationTime": self.get_creation_time(mint=mint),
+            "freezeable": False,
+            "top10HolderPercent": 0.7 if self.get_failed_check(mint=mint) == "security" else 0.2,
+        }
+
+    def get_markets(self, mint: str) -> List[dict]:
+        """/defi/v2/markets items"""
+        source = "Orca" if self.get_failed_check(mint=mint) == "market" else "Raydium"
+        created = datetime.fromtimestamp(self.get_creation_time(mint=mint), tz=timezone.utc)
+        return [
+            {
+                "address": self._get_mint(index=self.size + self._index[mint]),
+                "name": "{m}-SOL".format(m=mint[:4]),
+                "source": source,
+                "liquidity": 400000.0,
+                "volume24h": self.get_volume(mint=mint),
+                "createdAt": created.strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+            }
+        ]
+
+
+class MockProviderServer:
+    def __init__(
+        self,
+        universe: Optional[SyntheticUniverse] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_seconds: float = 0.0,
+        latency_jitter_seconds: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        error_rate: float = 0.0,
+        wallet_balance_sol: float = 100.0,
+        seed: int = 0,
+    ):
+        """Local stand-in for Birdeye, Helius rpc and Jupiter, see the BIRDEYE_BASE_URL, HELIUS_RPC_URL and
+        JUPITER_BASE_URL settings
+
+        Every path is served from one port: /defi/... as Birdeye, /v6/... as Jupiter and any other POST as
+        Helius json-rpc. Each request waits latency_seconds plus an exponential jitter, then fails with a 429
+        or a 5xx at the given rates before it is answered. Swaps are recorded so sent transactions confirm
+        and the bought mint shows up in getTokenAccounts.
+
+        Args:
+            universe (SyntheticUniverse, optional): tokens to serve. Defaults to 1000 tokens.
+            host (str, optional): Defaults to "127.0.0.1".
+            port (int, optional): 0 picks a free port. Defaults to 0.
+            latency_seconds (float, optional): added to every request. Defaults to 0.0.
+            latency_jitter_seconds (float, optional): mean of the exponential latency on top. Defaults to 0.0.
+            rate_limit_rate (float, optional): share of requests answered with a 429. Defaults to 0.0.
+            error_rate (float, optional): share of requests answered with a 500, 502 or 503. Defaults to 0.0.
+            wallet_balance_sol (float, optional): getBalance of every wallet. Defaults to 100.0.
+            seed (int, optional): seed of the injected faults. Defaults to 0.
+        """
+        self.universe = universe or SyntheticUniverse()
+        self.latency_seconds = latency_seconds
+        self.latency_jitter_seconds = latency_jitter_seconds
+        self.rate_limit_rate = rate_limit_rate
+        self.error_rate = error_rate
+        self.wallet_balance_sol = wallet_balance_sol
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        # endpoint -> status -> count, endpoint -> seconds spent answering
+        self._status_counts: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self._latencies: Dict[str, List[float]] = defaultdict(list)
+        self._first_request: Optional[float] = None
+        self._last_request: Optional[float] = None
+        # serialized message -> (owner, mint) of swaps built by /v6/swap
+        self._swaps: Dict[bytes, Tuple[str, str]] = dict()
+        self._holdings: Dict[str, set] = defaultdict(set)
+        self._signatures: set = set()
+        self._swap_count = 0
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out in separate writes, with Nagle each keep-alive response waits ~40ms
+            # for the client's delayed ack
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                server._handle(handler=self)
+
+            def do_POST(self):
+                server._handle(handler=self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return "http://{h}:{p}".format(h=host, p=port)
+
+    def start(self) -> "MockProviderServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True, name="mock-providers")
+        self._thread.start()
+        logger.info("Mock providers serving on {u}".format(u=self.url))
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _handle(self, handler: BaseHTTPRequestHandler):
+        start = time.monotonic()
+        parts = urlsplit(handler.path)
+        params = dict(parse_qsl(parts.query))
+        length = int(handler.headers.get("Content-Length") or 0)
+        body = json.loads(handler.rfile.read(length)) if length else None
+        endpoint = "{m} {p}".format(m=handler.command, p=parts.path)
+        if isinstance(body, dict) and "jsonrpc" in body:
+            endpoint += " {r}".format(r=body.get("method"))
+
+        delay = self.latency_seconds
+        with self._lock:
+            if self.latency_jitter_seconds > 0:
+                delay += self._random.expovariate(1.0 / self.latency_jitter_seconds)
+            fault = self._random.random()
+            error_status = self._random.choice([500, 502, 503])
+        if delay > 0:
+            time.sleep(delay)
+
+        if fault < self.rate_limit_rate:
+            status, response = 429, {"success": False, "message": "Too many requests"}
+        elif fault < self.rate_limit_rate + self.error_rate:
+            status, response = error_status, {"success": False, "message": "Injected error"}
+        else:
+            try:
+                status, response = self._route(method=handler.command, path=parts.path, params=params, body=body)
+            except Exception as e:
+                logger.error("Mock providers failed on {e}: {x}".format(e=endpoint, x=e))
+                status, response = 500, {"success": False, "message": str(e)}
+
+        content = json.dumps(response).encode("utf-8")
+        # Counted before the client gets the response, so stats read after a request include it
+        now = time.monotonic()
+        with self._lock:
+            self._status_counts[endpoint][status] += 1
+            self._latencies[endpoint].append(now - start)
+            if self._first_request is None:
+                self._first_request = start
+            self._last_request = now
+
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(content)))
+        handler.end_headers()
+        handler.wfile.write(content)
+
+    def _route(self, method: str, path: str, params: dict, body: Optional[dict]) -> Tuple[int, dict]:
+        if path.startswith("/defi/"):
+            return self._birdeye(path=path, params=params, body=body)
+        if path.startswith("/v6/"):
+            return self._jupiter(path=path, params=params, body=body)
+        if method == "POST" and isinstance(body, dict) and "jsonrpc" in body:
+            return 200, self._rpc(body=body)
+        return 404, {"success": False, "message": "Not found"}
+
+    def _birdeye(self, path: str, params: dict, body: Optional[dict]) -> Tuple[int, dict]:
+        universe = self.universe
+        mint = params.get("address")
+        if path == "/defi/v3/token/list":
+            min_volume = float(params.get("min_volume_24h_usd", 0))
+            offset = int(params.get("offset", 0))
+            limit = int(params.get("limit", 100))
+            mints = [x for x in universe.mints if universe.get_volume(mint=x) >= min_volume]
+            end = offset + limit
+            items = [universe.get_token_item(mint=x) for x in mints[offset:end]]
+            return 200, {"success": True, "data": {"items": items, "has_next": end < len(mints)}}
+        if path == "/defi/multi_price":
+            mints = [x for x in (body or dict()).get("list_address", "").split(",") if x]
+            data = dict()
+            for each in mints:
+                if each not in universe:
+                    data[each] = None
+                    continue
+                price = universe.get_current_price(mint=each)
+                data[each] = {"value": price, "updateUnixTime": int(time.time()), "priceInNative": price / 150.0}
+            return 200, {"success": True, "data": data}
+        if mint is not None and mint not in universe:
+            return 200, {"success": True, "data": None}
+        if path == "/defi/v3/ohlcv":
+            items = universe.get_candles(
+                mint=mint,
+                interval=params.get("type", "1H"),
+                time_from=int(params["time_from"]),
+                time_to=int(params["time_to"]),
+            )
+            return 200, {"success": True, "data": {"items": items}}
+        if path == "/defi/ohlcv":
+            price = universe.get_price(mint=mint, unix_time=int(params["time_from"]))
+            return 200, {"success": True, "data": {"items": [{"unixTime": int(params["time_from"]), "c": price}]}}
+        if path == "/defi/token_security":
+            return 200, {"success": True, "data": universe.get_security(mint=mint)}
+        if path == "/defi/token_creation_info":
+            return 200, {"success": True, "data": universe.get_creation_info(mint=mint)}
+        if path == "/defi/v2/markets":
+            items = universe.get_markets(mint=mint)
+            return 200, {"success": True, "data": {"items": items, "total": len(items)}}
+        return 404, {"success": False, "message": "Not found"}
+
+    def _jupiter(self, path: str, params: dict, body: Optional[dict]) -> Tuple[int, dict]:
+        if path == "/v6/quote":
+            amount = int(params["amount"])
+            price = self.universe.get_current_price(mint=params["outputMint"]) or 1.0
+            out_amount = int(amount / 1e9 * 150.0 / price * 1e6)
+            return 200, {
+                "inputMint": params["inputMint"],
+                "inAmount": str(amount),
+                "outputMint": params["outputMint"],
+                "outAmount": str(out_amount),
+                "otherAmountThreshold": str(int(out_amount * (1 - int(params.get("slippageBps", 0)) / 10000))),
+                "swapMode": "ExactIn",
+                "slippageBps": int(params.get("slippageBps", 0)),
+                "priceImpactPct": "0.001",
+                "routePlan": [],
+            }
+        if path == "/v6/swap":
+            quote = body["quoteResponse"]
+            owner = Pubkey.from_string(body["userPublicKey"])
+            with self._lock:
+                self._swap_count += 1
+                blockhash = Hash(hashlib.sha256("swap-{i}".format(i=self._swap_count).encode()).digest())
+            # A transfer stands in for the swap instructions, only the fee payer has to sign
+            ix = transfer(TransferParams(from_pubkey=owner, to_pubkey=owner, lamports=int(quote["inAmount"])))
+            message = MessageV0.try_compile(owner, [ix], [], blockhash)
+            with self._lock:
+                self._swaps[bytes(message)] = (str(owner), quote["outputMint"])
+            unsigned_tx = VersionedTransaction.populate(message, [Signature.default()])
+            return 200, {
+                "swapTransaction": base64.b64encode(bytes(unsigned_tx)).decode("utf-8"),
+                "lastValidBlockHeight": 300000150,
+                "prioritizationFeeLamports": 50000,
+            }
+        return 404, {"success": False, "message": "Not found"}
+
+    def _rpc(self, body: dict) -> dict:
+        method = body.get("method")
+        params = body.get("params")
+        response = {"jsonrpc": "2.0", "id": body.get("id")}
+        context = {"slot": 300000000}
+        if method == "getAsset":
+            response["result"] = self.universe.get_asset(mint=params["id"])
+        elif method == "getAssetBatch":
+            response["result"] = [self.universe.get_asset(mint=x) for x in params["ids"]]
+        elif method == "getTokenAccounts":
+            with self._lock:
+                mints = sorted(self._holdings[params["owner"]])
+            accounts = [{"address": x, "mint": x, "owner": params["owner"], "amount": 10**9} for x in mints]
+            response["result"] = {"total": len(accounts), "limit": 100, "page": 1, "token_accounts": accounts}
+        elif method == "getBalance":
+            response["result"] = {"context": context, "value": int(self.wallet_balance_sol * 1e9)}
+        elif method == "getLatestBlockhash":
+            response["result"] = {
+                "context": context,
+                "value": {"blockhash": str(Hash.default()), "lastValidBlockHeight": 300000150},
+            }
+        elif method == "sendTransaction":
+            signed_tx = VersionedTransaction.from_bytes(base64.b64decode(params[0]))
+            signature = str(signed_tx.signatures[0])
+            with self._lock:
+                swap = self._swaps.pop(bytes(signed_tx.message), None)
+                if swap is not None:
+                    self._holdings[swap[0]].add(swap[1])
+                    self._signatures.add(signature)
+                elif signature not in self._signatures:
+                    response["error"] = {"code": -32002, "message": "Unknown transaction"}
+                    return response
+            response["result"] = signature
+        elif method == "getSignatureStatuses":
+            confirmed = {
+                "slot": 300000001,
+                "confirmations": None,
+                "err": None,
+                "status": {"Ok": None},
+                "confirmationStatus": "confirmed",
+            }
+            with self._lock:
+                statuses = [dict(confirmed) if x in self._signatures else None for x in params[0]]
+            response["result"] = {"context": context, "value": statuses}
+        else:
+            response["error"] = {"code": -32601, "message": "Method not found"}
+        return response
+
+    def get_stats(self) -> Dict[str, dict]:
+        """Per endpoint request count, statuses and p50 / p95 / p99 latency in ms, plus a "total" entry with the
+        throughput since the first request"""
+        with self._lock:
+            status_counts = {k: dict(v) for k, v in self._status_counts.items()}
+            latencies = {k: sorted(v) for k, v in self._latencies.items()}
+            elapsed = (self._last_request - self._first_request) if self._first_request is not None else 0.0
+
+        stats = dict()
+        for endpoint in sorted(latencies):
+            stats[endpoint] = self._summarize(status_counts=status_counts[endpoint], latencies=latencies[endpoint])
+        total_counts = defaultdict(int)
+        for each in status_counts.values():
+            for status, count in each.items():
+                total_counts[status] += count
+        total = self._summarize(status_counts=total_counts, latencies=sorted(x for v in latencies.values() for x in v))
+        total["requests_per_second"] = round(total["requests"] / elapsed, 1) if elapsed else None
+        stats["total"] = total
+        return stats
+
+    @staticmethod
+    def _summarize(status_counts: Dict[int, int], latencies: List[float]) -> dict:
+        def percentile(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 1)
+
+        return {
+            "requests": sum(status_counts.values()),
+            "statuses": dict(sorted(status_counts.items())),
+            "p50_ms": percentile(0.5),
+            "p95_ms": percentile(0.95),
+            "p99_ms": percentile(0.99),
+        }
+
+
+if __name__ == "__main__":
+    # One full SplDrawdown.run() against the mock, e.g.
+    # MOCK_TOKENS=2000 MOCK_LATENCY_MS=80 MOCK_RATE_LIMIT_RATE=0.02 python -m spl_drawdown.modules.mock_providers
+    import os
+
+    from dotenv import load_dotenv
+    from solders.keypair import Keypair
+
+    load_dotenv()
+    server = MockProviderServer(
+        universe=SyntheticUniverse(size=int(os.environ.get("MOCK_TOKENS", 1000))),
+        latency_seconds=float(os.environ.get("MOCK_LATENCY_MS", 0)) / 1000,
+        latency_jitter_seconds=float(os.environ.get("MOCK_JITTER_MS", 0)) / 1000,
+        rate_limit_rate=float(os.environ.get("MOCK_RATE_LIMIT_RATE", 0)),
+        error_rate=float(os.environ.get("MOCK_ERROR_RATE", 0)),
+        port=int(os.environ.get("MOCK_PORT", 0)),
+    ).start()
+
+    # Nothing may reach the real providers or the on-disk caches
+    os.environ["BIRDEYE_BASE_URL"] = server.url
+    os.environ["HELIUS_RPC_URL"] = server.url
+    os.environ["JUPITER_BASE_URL"] = server.url
+    os.environ["SEND_RPC_ENDPOINTS"] = ""
+    os.environ["PRICE_STREAM"] = "false"
+    os.environ["VERIFICATION_CACHE_PATH"] = ""
+    os.environ["CANDLE_STORE_PATH"] = ""
+    os.environ.setdefault("BET_AMOUNT_SOL", "0.5")
+    os.environ.setdefault("MIN_24HR_VOLUME", "500000")
+    # Configured wallets only ever sign against the mock
+    if not os.environ.get("SOLANA_PRIVATE_KEY1"):
+        os.environ["SOLANA_PRIVATE_KEY1"] = str(Keypair())
+
+    from spl_drawdown.main_buyer import SplDrawdown
+
+    S = SplDrawdown()
+    start = time.monotonic()
+    S.run()
+    logger.info("Full run took {s:.1f}s".format(s=time.monotonic() - start))
+    for endpoint, stats in server.get_stats().items():
+        logger.info("{e}: {s}".format(e=endpoint, s=stats))
+    server.stop()
@@ -0,0 +1,110 @@
+import heapq
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from spl_drawdown.types.token_data import TokenData
+
+
+class PriceRefreshScheduler:
+    def __init__(
+        self,
+        refresh_tiers: Optional[List[Tuple[float, int]]] = None,
+        default_refresh_seconds: int = 600,
+        retry_seconds: int = 60,
+    ):
+        """Keeps every token in a heap keyed by the time its quote is next due
+
+        Tokens closer to their ATH are refreshed more often. Entries are never removed from the heap,
+        an entry is skipped when popped if the token was rescheduled or dropped since.
+
+        Args:
+            refresh_tiers (List[Tuple[float, int]], optional): (max current_per_from_ath, refresh seconds),
+                checked in order. Defaults to 60s up to 20%, 120s up to 30% and 300s up to 50% from ATH.
+            default_refresh_seconds (int, optional): refresh for tokens further from ATH. Defaults to 600.
+            retry_seconds (int, optional): wait before quoting a token again after its quote failed or was
+                missing, see schedule_retry. Defaults to 60.
+        """
+        self.refresh_tiers = refresh_tiers or [(0.2, 60), (0.3, 120), (0.5, 300)]
+        self.default_refresh_seconds = default_refresh_seconds
+        self.retry_seconds = retry_seconds
+        self._heap: List[Tuple[float, str]] = list()
+        self._due: Dict[str, float] = dict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def get_refresh_seconds(self, current_per_from_ath: float) -> int:
+        for max_per_from_ath, refresh_seconds in self.refresh_tiers:
+            if current_per_from_ath <= max_per_from_ath:
+                return refresh_seconds
+        return self.default_refresh_seconds
+
+    def get_due_time(self, token: TokenData) -> float:
+        """Unix time the token's quote is next due, tokens without a price are due right away"""
+        if token.current_price_time is None or token.current_price_usd is None or token.current_per_from_ath is None:
+            return 0.0
+        return token.current_price_time.timestamp() + self.get_refresh_seconds(token.current_per_from_ath)
+
+    def schedule(self, token: TokenData):
+        """(Re)compute the due time of token, called whenever its quote changes"""
+        due = self.get_due_time(token=token)
+        with self._lock:
+            self._push(mint_address=token.mint_address, due=due)
+
+    def schedule_retry(self, token: TokenData, now: Optional[datetime] = None):
+        """Schedule a token left without a quote retry_seconds from now
+
+        Its due time would otherwise be in the past, so one unquotable mint would wake the polling loop at
+        its shortest sleep on every cycle.
+        """
+        due = (now or datetime.now(timezone.utc)).timestamp() + self.retry_seconds
+        with self._lock:
+            self._push(mint_address=token.mint_address, due=due)
+
+    def sync(self, tokens: List[TokenData]):
+        """Track exactly the tokens in tokens"""
+        dues = {x.mint_address: self.get_due_time(token=x) for x in tokens}
+        with self._lock:
+            self._due = {k: v for k, v in self._due.items() if k in dues}
+            for mint_address, due in dues.items():
+                current = self._due.get(mint_address)
+                # A token still without a price keeps the wait set by schedule_retry
+                if current is not None and due == 0.0:
+                    continue
+                if current != due:
+                    self._push(mint_address=mint_address, due=due)
+            # Drop stale entries once they outnumber the live ones
+            if len(self._heap) > 2 * len(self._due) + 64:
+                self._heap = [(v, k) for k, v in self._due.items()]
+                heapq.heapify(self._heap)
+
+    def pop_due(self, now: Optional[datetime] = None) -> List[str]:
+        """Remove and return the mints whose quote is due
+
+        Popped mints are not due again until they are rescheduled.
+        """
+        now_ts = (now or datetime.now(timezone.utc)).timestamp()
+        due_mints = list()
+        with self._lock:
+            while self._heap and self._heap[0][0] < now_ts:
+                due, mint_address = heapq.heappop(self._heap)
+                if self._due.get(mint_address) != due:
+                    continue
+                del self._due[mint_address]
+                due_mints.append(mint_address)
+        return due_mints
+
+    def get_next_due(self) -> Optional[datetime]:
+        """Time the next quote is due, None if nothing is scheduled"""
+        with self._lock:
+            while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+                heapq.heappop(self._heap)
+            if not self._heap:
+                return None
+            return datetime.fromtimestamp(self._heap[0][0], tz=timezone.utc)
+
+    def _push(self, mint_address: str, due: float):
+        self._due[mint_address] = due
+        heapq.heappush(self._heap, (due, mint_address))
@@ -0,0 +1,166 @@
+import asyncio
+import json
+import queue
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Callable, List, Optional
+
+import websockets
+
+from spl_drawdown.utils.log import get_logger
+
+logger = get_logger()
+
+# on_price(mint_address, price_usd, price_time)
+PriceCallback = Callable[[str, float, datetime], None]
+
+
+class PriceFeed(ABC):
+    """Pushes live prices to a callback from a background thread
+
+    Subclasses implement _run, which delivers prices with _emit until stop() is called.
+    """
+
+    def __init__(self):
+        self.mints: List[str] = list()
+        self.on_price: Optional[PriceCallback] = None
+        self.last_price_time: Optional[datetime] = None
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, on_price: PriceCallback):
+        if self._thread is not None:
+            return
+        self.on_price = on_price
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name=type(self).__name__, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def set_mints(self, mints: List[str]):
+        """Replace the subscribed mints"""
+        self.mints = list(dict.fromkeys(mints))
+
+    def is_live(self, max_silence_seconds: float = 120.0) -> bool:
+        """True if a price arrived in the last max_silence_seconds"""
+        if self.last_price_time is None:
+            return False
+        return (datetime.now(timezone.utc) - self.last_price_time).total_seconds() <= max_silence_seconds
+
+    def _emit(self, mint_address: str, price_usd: float):
+        """Deliver a price, stamped with the time it was received"""
+        self.last_price_time = datetime.now(timezone.utc)
+        if self.on_price is None:
+            return
+        try:
+            self.on_price(mint_address, price_usd, self.last_price_time)
+        except Exception as e:
+            logger.error("Error handling price for {t}: {e}".format(t=mint_address, e=e))
+
+    @abstractmethod
+    def _run(self):
+        """Deliver prices with _emit until the feed is stopped, runs on the feed thread"""
+
+
+class LocalPriceFeed(PriceFeed):
+    """In-process stand-in for the websocket feed, prices are pushed by hand"""
+
+    def __init__(self):
+        super().__init__()
+        self._prices = queue.Queue()
+
+    def push(self, mint_address: str, price_usd: float):
+        self._prices.put((mint_address, price_usd))
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                mint_address, price_usd = self._prices.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if mint_address in self.mints:
+                self._emit(mint_address=mint_address, price_usd=price_usd)
+
+
+class BirdeyePriceStream(PriceFeed):
+    def __init__(
+        self,
+        BIRDEYE_API_TOKEN: str,
+        url: Optional[str] = None,
+        max_mints: int = 100,
+        reconnect_wait_seconds: float = 5.0,
+    ):
+        """Birdeye SUBSCRIBE_PRICE websocket, 1m usd price updates for every subscribed mint
+
+        Args:
+            BIRDEYE_API_TOKEN (str): api key
+            url (str, optional): websocket url. Defaults to the solana price socket.
+            max_mints (int, optional): mints per complex query, the rest are left to polling. Defaults to 100.
+            reconnect_wait_seconds (float, optional): wait before reconnecting. Defaults to 5.0.
+        """
+        super().__init__()
+        self.url = url or f"wss://public-api.birdeye.so/socket/solana?x-api-key={BIRDEYE_API_TOKEN}"
+        self.max_mints = max_mints
+        self.reconnect_wait_seconds = reconnect_wait_seconds
+        self._mints_changed = threading.Event()
+
+    def set_mints(self, mints: List[str]):
+        super().set_mints(mints)
+        if len(self.mints) > self.max_mints:
+            logger.info("Streaming {a} of {b} mints".format(a=self.max_mints, b=len(self.mints)))
+        self._mints_changed.set()
+
+    def _run(self):
+        asyncio.run(self._stream())
+
+    async def _stream(self):
+        while not self._stopped.is_set():
+            try:
+                async with websockets.connect(
+                    self.url, origin="ws://public-api.birdeye.so", subprotocols=["echo-protocol"]
+                ) as socket:
+                    logger.info("Price stream connected")
+                    self._mints_changed.set()
+                    await self._consume(socket)
+            except Exception as e:
+                logger.info("Price stream disconnected: {e}".format(e=e))
+            if not self._stopped.is_set():
+                await asyncio.sleep(self.reconnect_wait_seconds)
+
+    async def _consume(self, socket):
+        while not self._stopped.is_set():
+            if self._mints_changed.is_set():
+                self._mints_changed.clear()
+                await self._subscribe(socket)
+            try:
+                message = await asyncio.wait_for(socket.recv(), timeout=1.0)
+            except asyncio.TimeoutError:
+                continue
+            self._handle_message(message)
+
+    async def _subscribe(self, socket):
+        mints = self.mints[: self.max_mints]
+        await socket.send(json.dumps({"type": "UNSUBSCRIBE_PRICE"}))
+        if not mints:
+            return
+        query = " OR ".join("(address = {m} AND chartType = 1m AND currency = usd)".format(m=x) for x in mints)
+        await socket.send(json.dumps({"type": "SUBSCRIBE_PRICE", "data": {"queryType": "complex", "query": query}}))
+        logger.info("Subscribed to {i} prices".format(i=len(mints)))
+
+    def _handle_message(self, message: str):
+        try:
+            message_json = json.loads(message)
+        except ValueError:
+            return
+        if message_json.get("type") != "PRICE_DATA" or not message_json.get("data"):
+            return
+        data = message_json["data"]
+        if data.get("address") is None or data.get("c") is None:
+            return
+        self._emit(mint_address=data["address"], price_usd=data["c"])
@@ -1,46 +1,106 @@
 import base64
-from time import sleep
+import threading
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from typing import Callable, List, Optional
 
 import requests
-from solana.rpc.api import Client
 from solders.keypair import Keypair
+from solders.signature import Signature
 from solders.transaction import VersionedTransaction
 from tenacity import retry, stop_after_attempt, wait_exponential
 
+from spl_drawdown.modules.confirmation_tracker import ConfirmationTracker
+from spl_drawdown.modules.tx_broadcaster import TransactionBroadcaster
+from spl_drawdown.types.prepared_swap import PreparedSwap
+from spl_drawdown.utils.http_client import get_http_client
 from spl_drawdown.utils.log import get_logger
+from spl_drawdown.utils.rpc_client import get_rpc_client
 
 logger = get_logger()
 
 
 class Swapper:
-    def __init__(self, HELIUS_API_KEY: str):
+    def __init__(
+        self,
+        HELIUS_API_KEY: str,
+        Confirmations: Optional[ConfirmationTracker] = None,
+        send_endpoints: Optional[List[str]] = None,
+        Broadcaster: Optional[TransactionBroadcaster] = None,
+        helius_rpc_url: str = "https://mainnet.helius-rpc.com",
+        jupiter_base_url: str = "https://quote-api.jup.ag",
+    ):
+        """
+        Args:
+            HELIUS_API_KEY (str): _description_
+            Confirmations (ConfirmationTracker, optional): shared tracker. Defaults to a new one.
+            send_endpoints (List[str], optional): extra rpc urls every transaction is also sent to
+            Broadcaster (TransactionBroadcaster, optional): shared broadcaster, takes precedence over send_endpoints
+            helius_rpc_url (str, optional): rpc url without the api key. Defaults to Helius mainnet.
+            jupiter_base_url (str, optional): Defaults to the Jupiter quote api.
+        """
         # Configuration
-        self.RPC_ENDPOINT = f"https://mainnet.helius-rpc.com/?api-key={HELIUS_API_KEY}"
+        self.RPC_ENDPOINT = f"{helius_rpc_url}/?api-key={HELIUS_API_KEY}"
+        self.jupiter_base_url = jupiter_base_url
         self.sol_mint = "So11111111111111111111111111111111111111112"  # SOL
 
         self.COMMITMENT = "confirmed"  # Commitment level for RPC calls
         self.MAX_SOL_CHUNK = 10.0
-        # Initialize Solana client
+        self.http = get_http_client()
+        # Initialize Solana client, on the pooled session
         try:
-            self.client = Client(self.RPC_ENDPOINT, commitment=self.COMMITMENT)
+            self.client = get_rpc_client(endpoint=self.RPC_ENDPOINT, commitment=self.COMMITMENT, http=self.http)
         except Exception as e:
             raise Exception(f"Failed to connect to Helius RPC: {e}")
+        # Share one tracker between Swappers so their signatures are polled together
+        self.Confirmations = Confirmations or ConfirmationTracker(client=self.client, http=self.http)
+        self.Broadcaster = Broadcaster
+        if self.Broadcaster is None and send_endpoints:
+            self.Broadcaster = TransactionBroadcaster(endpoints=[self.RPC_ENDPOINT] + send_endpoints, http=self.http)
 
     @retry(stop=stop_after_attempt(5), wait=wait_exponential(multiplier=1, min=1, max=10))
     def get_balance_with_retry(self, pubkey):
         """Fetch wallet balance with retry logic."""
         try:
-            return self.client.get_balance(pubkey, commitment=self.COMMITMENT).value
+            self.http.limit("helius")
+            with self.http.track(provider="helius", endpoint="getBalance"):
+                return self.client.get_balance(pubkey, commitment=self.COMMITMENT).value
         except Exception as e:
             raise Exception(f"RPC error during balance check: {e}")
 
     def place_buy_order(self, OUTPUT_MINT: str, AMOUNT_IN_SOL: float, KEY_PAIR: Keypair):
-        """Place a buy order for 0.01 SOL worth of the target token."""
+        """Place a buy order for 0.01 SOL worth of the target token and wait for its confirmation."""
+        future = self.submit_buy_order(OUTPUT_MINT=OUTPUT_MINT, AMOUNT_IN_SOL=AMOUNT_IN_SOL, KEY_PAIR=KEY_PAIR)
+        if future is None:
+            return False
+        return future.result()
+
+    def submit_buy_order(
+        self,
+        OUTPUT_MINT: str,
+        AMOUNT_IN_SOL: float,
+        KEY_PAIR: Keypair,
+        on_done: Optional[Callable[[bool], None]] = None,
+    ) -> Optional[Future]:
+        """Send every chunk of a buy order without waiting for confirmations
+
+        Args:
+            OUTPUT_MINT (str): token to buy
+            AMOUNT_IN_SOL (float): SOL to spend
+            KEY_PAIR (Keypair): wallet to buy with
+            on_done (Callable[[bool], None], optional): called with the outcome once every sent chunk is settled
+
+        Returns:
+            Optional[Future]: resolves to True once every sent chunk is settled and one of them confirmed,
+                None if nothing was sent. Chunks after a failed send are not sent, the ones before it can
+                still land, so the order stays booked until they settle.
+        """
         LAMPORTS_PER_SOL = 1_000_000_000
         AMOUNT = int(AMOUNT_IN_SOL * LAMPORTS_PER_SOL)
         full_chunk = int(self.MAX_SOL_CHUNK * LAMPORTS_PER_SOL)
         chunk_amounts = self.get_chunk_amounts(total_amount=AMOUNT, chunk_amount=full_chunk)
 
+        confirmations = list()
         try:
             logger.info("----Start Buy----")
             logger.info(KEY_PAIR.pubkey())
@@ -49,16 +109,49 @@ class Swapper:
                 # Get quote
                 quote = self.get_quote(input_mint=self.sol_mint, output_mint=OUTPUT_MINT, amount=buy_amount)
 
-                # Execute swap
-                txid = self.execute_swap(quote=quote, key_pair=KEY_PAIR)
-                logger.info(f"Buy order successful: https://solscan.io/tx/{txid}")
-                sleep(2)
+                # Send swap, confirmed in the background
+                txid = self.send_swap(quote=quote, key_pair=KEY_PAIR)
+                confirmations.append(self._track(txid=txid))
             logger.info("----End Buy----")
-            return True
 
         except Exception as e:
             logger.error(f"Error in place_buy_order: {e}")
-            return False
+            if confirmations:
+                logger.error(
+                    "Sent {i} of {n} chunks of {t}".format(i=len(confirmations), n=len(chunk_amounts), t=OUTPUT_MINT)
+                )
+
+        if not confirmations:
+            return None
+        return self._combine_confirmations(confirmations=confirmations, on_done=on_done)
+
+    @staticmethod
+    def _combine_confirmations(
+        confirmations: List[Future], on_done: Optional[Callable[[bool], None]] = None
+    ) -> Future:
+        """Future that resolves once every confirmation is settled, to True if any of them is True
+
+        One confirmed chunk is enough for the token to be held, so the buy is only undone when none landed.
+        """
+        combined = Future()
+        combined.set_running_or_notify_cancel()
+        remaining = [len(confirmations)]
+        lock = threading.Lock()
+
+        def on_confirmation(_: Future):
+            with lock:
+                remaining[0] -= 1
+                if remaining[0] > 0:
+                    return
+            is_confirmed = any(x.result() for x in confirmations)
+            # on_done first, so the booking is settled by the time a waiter sees the result
+            if on_done:
+                on_done(is_confirmed)
+            combined.set_result(is_confirmed)
+
+        for each in confirmations:
+            each.add_done_callback(on_confirmation)
+        return combined
 
     def get_chunk_amounts(self, total_amount: int, chunk_amount: int):
         """_summary_"""
@@ -78,14 +171,14 @@ class Swapper:
     def get_quote(self, input_mint: str, output_mint: str, amount: int) -> dict:
         """Get a swap quote from Jupiter API."""
         try:
-            url = "https://quote-api.jup.ag/v6/quote"
+            url = "{b}/v6/quote".format(b=self.jupiter_base_url)
             params = {
                 "inputMint": input_mint,
                 "outputMint": output_mint,
                 "amount": amount,
                 "slippageBps": 200,  # 2.0% slippage
             }
-            response = requests.get(url, params=params)
+            response = self.http.get("jupiter", url, params=params)
             response.raise_for_status()
             quote_data = response.json()
             if not quote_data.get("inAmount") or not quote_data.get("outAmount"):
@@ -97,7 +190,7 @@ class Swapper:
     def create_swap(self, quote: dict, user_public_key: str) -> str:
         """Create a swap transaction using Jupiter API."""
         try:
-            url = "https://quote-api.jup.ag/v6/swap"
+            url = "{b}/v6/swap".format(b=self.jupiter_base_url)
             payload = {
                 "quoteResponse": quote,
                 "userPublicKey": user_public_key,
@@ -110,7 +203,7 @@ class Swapper:
                     }
                 },
             }
-            response = requests.post(url, json=payload)
+            response = self.http.post("jupiter", url, json=payload)
             response.raise_for_status()
             swap_data = response.json()
             if not swap_data.get("swapTransaction"):
@@ -126,36 +219,97 @@ class Swapper:
         except requests.exceptions.RequestException as e:
             raise Exception(f"Failed to create swap: {e}")
 
+    def execute_swap(self, quote: dict, key_pair: Keypair) -> Signature:
+        """Sign and send the swap transaction with priority fee, then wait for its confirmation."""
+        txid = self.send_swap(quote=quote, key_pair=key_pair)
+        if not self._track(txid=txid).result():
+            raise Exception(f"Transaction not confirmed: https://solscan.io/tx/{txid}")
+        return txid
+
     @retry(stop=stop_after_attempt(5), wait=wait_exponential(multiplier=1, min=1, max=10))
-    def execute_swap(self, quote: dict, key_pair: Keypair) -> str:
-        """Sign and send the swap transaction with priority fee."""
+    def send_swap(self, quote: dict, key_pair: Keypair) -> Signature:
+        """Sign and send the swap transaction with priority fee, see ConfirmationTracker for the confirmation."""
         try:
             # Create swap transaction
             swap_transaction = self.create_swap(quote=quote, user_public_key=str(key_pair.pubkey()))
+            return self.sign_and_send(swap_transaction=swap_transaction, key_pair=key_pair)
+
+        except Exception as e:
+            logger.error(f"Error in send_swap: {e}")
+            raise
+
+    def _track(self, txid: Signature) -> Future:
+        """Follow txid on the confirmation tracker, broadcast transactions also report their landing"""
+        return self.Confirmations.track(
+            signature=txid, on_done=self.Broadcaster.record_landing if self.Broadcaster else None
+        )
 
-            # Decode the base64 transaction
-            transaction_bytes = base64.b64decode(swap_transaction)
-            logger.info(f"Decoded transaction length: {len(transaction_bytes)}")
+    def sign_and_send(self, swap_transaction: str, key_pair: Keypair) -> Signature:
+        """Sign and send a base64 swap transaction from create_swap."""
+        # Decode the base64 transaction
+        transaction_bytes = base64.b64decode(swap_transaction)
+        logger.info(f"Decoded transaction length: {len(transaction_bytes)}")
 
-            # Deserialize as a VersionedTransaction
-            unsigned_tx = VersionedTransaction.from_bytes(transaction_bytes)
-            logger.info(f"Deserialized transaction instructions: {len(unsigned_tx.message.instructions)}")
+        # Deserialize as a VersionedTransaction
+        unsigned_tx = VersionedTransaction.from_bytes(transaction_bytes)
+        logger.info(f"Deserialized transaction instructions: {len(unsigned_tx.message.instructions)}")
 
-            # Create and sign the transaction
-            signed_tx = VersionedTransaction(unsigned_tx.message, [key_pair])
-            logger.info(f"Final transaction instructions: {len(signed_tx.message.instructions)}")
+        # Create and sign the transaction
+        signed_tx = VersionedTransaction(unsigned_tx.message, [key_pair])
+        logger.info(f"Final transaction instructions: {len(signed_tx.message.instructions)}")
 
-            # Send the transaction
-            txid = self.client.send_transaction(signed_tx).value
-            logger.info(f"Transaction sent: https://solscan.io/tx/{txid}")
+        # Send the transaction
+        if self.Broadcaster:
+            txid = self.Broadcaster.broadcast(signed_tx=signed_tx)
+            logger.info("Broadcast stats: {s}".format(s=self.Broadcaster.get_stats()))
+        else:
+            self.http.limit("helius")
+            with self.http.track(provider="helius", endpoint="sendTransaction"):
+                txid = self.client.send_transaction(signed_tx).value
+        logger.info(f"Transaction sent: https://solscan.io/tx/{txid}")
+        return txid
 
-            # Confirm the transaction
-            self.client.confirm_transaction(txid, commitment=self.COMMITMENT)
-            return txid
+    def prepare_buy(self, OUTPUT_MINT: str, AMOUNT_IN_SOL: float, public_key: str) -> Optional[PreparedSwap]:
+        """Quote and build, but do not sign, a single chunk buy
 
+        Args:
+            OUTPUT_MINT (str): token to buy
+            AMOUNT_IN_SOL (float): SOL to spend, orders above MAX_SOL_CHUNK are not prepared
+            public_key (str): wallet that will sign
+
+        Returns:
+            Optional[PreparedSwap]: unsigned swap, None if the order needs more than one chunk
+        """
+        if AMOUNT_IN_SOL > self.MAX_SOL_CHUNK:
+            return None
+        amount = int(AMOUNT_IN_SOL * 1_000_000_000)
+        quote = self.get_quote(input_mint=self.sol_mint, output_mint=OUTPUT_MINT, amount=amount)
+        swap_transaction = self.create_swap(quote=quote, user_public_key=public_key)
+        return PreparedSwap(
+            mint_address=OUTPUT_MINT,
+            public_key=public_key,
+            amount_lamports=amount,
+            quote=quote,
+            swap_transaction=swap_transaction,
+            built_at=datetime.now(timezone.utc),
+        )
+
+    def submit_prepared_buy(
+        self, prepared: PreparedSwap, KEY_PAIR: Keypair, on_done: Optional[Callable[[bool], None]] = None
+    ) -> Optional[Future]:
+        """Sign and send a swap from prepare_buy, same result as submit_buy_order
+
+        Returns:
+            Optional[Future]: resolves to True once confirmed, None if it could not be sent
+        """
+        try:
+            logger.info("----Start Prepared Buy----")
+            txid = self.sign_and_send(swap_transaction=prepared.swap_transaction, key_pair=KEY_PAIR)
+            logger.info("----End Prepared Buy----")
         except Exception as e:
-            logger.error(f"Error in execute_swap: {e}")
-            raise
+            logger.error(f"Error in submit_prepared_buy: {e}")
+            return None
+        return self._combine_confirmations(confirmations=[self._track(txid=txid)], on_done=on_done)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,127 @@
+import threading
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from spl_drawdown.modules.wallet_state import WalletState
+from spl_drawdown.types.prepared_swap import PreparedSwap
+from spl_drawdown.types.token_data import TokenData
+from spl_drawdown.utils.log import get_logger
+from spl_drawdown.utils.metrics import get_metrics
+
+logger = get_logger()
+
+# (token, wallet state to buy with, SOL to spend)
+StandbyCandidate = Tuple[TokenData, WalletState, float]
+
+
+class SwapStandby:
+    def __init__(self, band: float = 0.05, max_age_seconds: float = 45.0, refresh_seconds: float = 15.0):
+        """Keeps unsigned Jupiter swaps ready for tokens trading close to their ATH
+
+        Swaps carry a recent blockhash, so a prepared swap is only used while younger than max_age_seconds
+        and is rebuilt once it would expire before the next refresh.
+
+        Args:
+            band (float, optional): max current_per_from_ath of a token to prepare. Defaults to 0.05.
+            max_age_seconds (float, optional): max age of a prepared swap at use. Defaults to 45.0.
+            refresh_seconds (float, optional): wait between refreshes. Defaults to 15.0.
+        """
+        self.band = band
+        self.max_age_seconds = max_age_seconds
+        self.refresh_seconds = refresh_seconds
+        self.stats = {"built": 0, "rebuilt": 0, "failed": 0, "used": 0, "missed": 0, "expired": 0}
+        self.metrics = get_metrics()
+        self.metrics.describe(
+            name="swap_standby_total",
+            help_text="Prepared swaps by outcome: built, rebuilt, failed, used, missed or expired",
+        )
+        self.metrics.describe(name="swap_standby_prepared", help_text="Prepared swaps held after the last refresh")
+        self._prepared: Dict[Tuple[str, str], PreparedSwap] = dict()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def is_in_band(self, token: TokenData) -> bool:
+        return token.current_per_from_ath is not None and token.current_per_from_ath <= self.band
+
+    def start(self, get_candidates: Callable[[], List[StandbyCandidate]]):
+        """Refresh the prepared swaps from get_candidates every refresh_seconds in a background thread"""
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, args=(get_candidates,), name="SwapStandby", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def _run(self, get_candidates: Callable[[], List[StandbyCandidate]]):
+        while not self._stopped.is_set():
+            try:
+                self.refresh(candidates=get_candidates())
+            except Exception as e:
+                logger.error("Error refreshing swap standby: {e}".format(e=e))
+            self._stopped.wait(timeout=self.refresh_seconds)
+
+    def refresh(self, candidates: List[StandbyCandidate]):
+        """Prepare a swap for every candidate, dropping the ones no longer wanted"""
+        wanted = {(token.mint_address, state.wallet.public_key) for token, state, _ in candidates}
+        with self._lock:
+            self._prepared = {k: v for k, v in self._prepared.items() if k in wanted}
+
+        now = datetime.now(timezone.utc)
+        for token, state, amount_sol in candidates:
+            key = (token.mint_address, state.wallet.public_key)
+            with self._lock:
+                existing = self._prepared.get(key)
+            if (
+                existing is not None
+                and existing.amount_lamports == int(amount_sol * 1_000_000_000)
+                and (now - existing.built_at).total_seconds() + self.refresh_seconds < self.max_age_seconds
+            ):
+                continue
+
+            try:
+                prepared = state.Swap.prepare_buy(
+                    OUTPUT_MINT=token.mint_address, AMOUNT_IN_SOL=amount_sol, public_key=state.wallet.public_key
+                )
+            except Exception as e:
+                logger.info("Could not prepare swap for {s}: {e}".format(s=token.symbol, e=e))
+                self._count("failed")
+                continue
+            if prepared is None:
+                continue
+            with self._lock:
+                self._prepared[key] = prepared
+            self._count("rebuilt" if existing is not None else "built")
+
+        with self._lock:
+            prepared_count = len(self._prepared)
+        self.metrics.set("swap_standby_prepared", prepared_count)
+        if candidates:
+            logger.info("Swap standby: {i} prepared, stats {s}".format(i=prepared_count, s=self.get_stats()))
+
+    def take(self, mint_address: str, public_key: str, amount_sol: float) -> Optional[PreparedSwap]:
+        """Remove and return the prepared swap for mint_address and public_key if it is still usable"""
+        with self._lock:
+            prepared = self._prepared.pop((mint_address, public_key), None)
+        if prepared is None or prepared.amount_lamports != int(amount_sol * 1_000_000_000):
+            self._count("missed")
+            return None
+        if (datetime.now(timezone.utc) - prepared.built_at).total_seconds() > self.max_age_seconds:
+            self._count("expired")
+            return None
+        self._count("used")
+        return prepared
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.stats)
+
+    def _count(self, stat: str):
+        with self._lock:
+            self.stats[stat] += 1
+        self.metrics.inc("swap_standby_total", outcome=stat)
@@ -1,25 +1,82 @@
 import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from statistics import mean, stdev
-from time import sleep
-from typing import List
+from typing import Callable, Dict, List, Optional, Tuple
 
-import requests
+from more_itertools import chunked
 from requests.exceptions import HTTPError, RequestException, SSLError
 from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_fixed
 
+from spl_drawdown.modules.async_candles import (
+    AsyncCandleFetcher,
+    CandleRequest,
+    get_candle_windows,
+    parse_candle_items,
+)
+from spl_drawdown.modules.candle_aggregator import DailyCandleAggregator
+from spl_drawdown.modules.candle_store import CandleStore
+from spl_drawdown.modules.price_refresh_scheduler import PriceRefreshScheduler
+from spl_drawdown.modules.price_stream import PriceFeed
 from spl_drawdown.types.candle_data import CandleData
+from spl_drawdown.types.candle_series import CandleSeries
+from spl_drawdown.types.screen_params import ScreenParams
 from spl_drawdown.types.token_data import TokenData
-from spl_drawdown.utils.log import get_logger
+from spl_drawdown.utils.http_client import get_http_client
+from spl_drawdown.utils.log import LazyMessage, get_logger
+from spl_drawdown.utils.memory import get_deep_size
+from spl_drawdown.utils.metrics import get_metrics
+from spl_drawdown.utils.tracing import get_tracer
 
 logger = get_logger()
 
 
 class TokenCharts:
-    def __init__(self, BIRDEYE_API_TOKEN: str):
+    def __init__(
+        self,
+        BIRDEYE_API_TOKEN: str,
+        use_async_candles: bool = False,
+        max_concurrent_tokens: int = 8,
+        max_concurrent_windows: int = 4,
+        candle_store_path: Optional[str] = None,
+        quote_chunk_size: int = 100,
+        max_quote_workers: int = 4,
+        screen_params: Optional[ScreenParams] = None,
+        base_url: str = "https://public-api.birdeye.so",
+    ):
         self.BIRDEYE_API_TOKEN = BIRDEYE_API_TOKEN
+        self.base_url = base_url
         self.headers = {"accept": "application/json", "x-chain": "solana", "X-API-KEY": self.BIRDEYE_API_TOKEN}
+        self.PriceFeed: Optional[PriceFeed] = None
+        self.on_breakout: Optional[Callable[[TokenData], None]] = None
+        self.PriceScheduler = PriceRefreshScheduler()
+        self.metrics = get_metrics()
+        self.tracer = get_tracer()
+        self.metrics.describe(
+            name="quote_staleness_seconds",
+            help_text="Age of the current price of each token when tokens to buy are picked",
+            buckets=(1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0),
+        )
         self.token_list = list()
+        # Outcome of the last screen of every mint, "passed" or the pass it failed, see rescreen_token_list
+        self.screen_outcomes: Dict[str, str] = dict()
+        # Daily candles of the tokens that passed, by pass and mint: Birdeye's for "D", condensed for "H"
+        self.daily_series: Dict[str, Dict[str, CandleSeries]] = {"D": dict(), "H": dict()}
+        self.http = get_http_client()
+        self.use_async_candles = use_async_candles
+        self.CandleFetcher = AsyncCandleFetcher(
+            headers=self.headers,
+            http=self.http,
+            max_concurrent_tokens=max_concurrent_tokens,
+            max_concurrent_windows=max_concurrent_windows,
+            base_url=base_url,
+        )
+        self.CandleStore = CandleStore(path=candle_store_path) if candle_store_path else None
+        # /defi/multi_price accepts at most 100 addresses per call
+        self.quote_chunk_size = quote_chunk_size
+        self.max_quote_workers = max_quote_workers
+        # Screening thresholds, shared with the offline replay in modules/backtest.py
+        self.screen_params = screen_params or ScreenParams()
 
     @property
     def token_list(self) -> List[TokenData]:
@@ -28,6 +85,59 @@ class TokenCharts:
     @token_list.setter
     def token_list(self, value: List[TokenData]):
         self._token_list = value
+        self._tokens_by_mint = {x.mint_address: x for x in value}
+        self.PriceScheduler.sync(tokens=value)
+        if self.PriceFeed:
+            self.PriceFeed.set_mints(mints=list(self._tokens_by_mint))
+
+    def replace_token_list(self, tokens: List[TokenData]):
+        """Swap in a freshly screened token list, tokens already followed keep their current price"""
+        for token in tokens:
+            current = self._tokens_by_mint.get(token.mint_address)
+            if current is not None and current.current_price_usd is not None:
+                self._set_current_price(
+                    token=token, price_usd=current.current_price_usd, price_time=current.current_price_time
+                )
+        self.token_list = tokens
+
+    def start_price_stream(self, price_feed: PriceFeed, on_breakout: Callable[[TokenData], None]):
+        """Follow the prices of token_list on price_feed, on_breakout is called from the feed thread
+        for every price above a token's ath_price_usd
+
+        Args:
+            price_feed (PriceFeed): live price source
+            on_breakout (Callable[[TokenData], None]): called with the token that broke out
+        """
+        self.on_breakout = on_breakout
+        self.PriceFeed = price_feed
+        self.PriceFeed.set_mints(mints=list(self._tokens_by_mint))
+        self.PriceFeed.start(on_price=self.apply_price)
+
+    def stop_price_stream(self):
+        if self.PriceFeed:
+            self.PriceFeed.stop()
+
+    def apply_price(self, mint_address: str, price_usd: float, price_time: datetime):
+        """Set a streamed price on the token and report a breakout"""
+        token = self._tokens_by_mint.get(mint_address)
+        if token is None:
+            return
+        self._set_current_price(token=token, price_usd=price_usd, price_time=price_time)
+        self.PriceScheduler.schedule(token=token)
+        if self.on_breakout and self.is_breakout(token=token):
+            self.on_breakout(token)
+
+    @staticmethod
+    def is_breakout(token: TokenData) -> bool:
+        return bool(token.current_price_usd and token.ath_price_usd and token.current_price_usd > token.ath_price_usd)
+
+    def get_tokens_to_buy(self) -> List[TokenData]:
+        current_time = datetime.now(timezone.utc)
+        for each in self.token_list:
+            if each.current_price_time is not None:
+                age = (current_time - each.current_price_time).total_seconds()
+                self.metrics.observe("quote_staleness_seconds", age)
+        return [x for x in self.token_list if self.is_breakout(token=x)]
 
     def remove_from_token_list(self, mints_to_remove: List[str]):
         """_summary_
@@ -45,36 +155,143 @@ class TokenCharts:
 
     def populate_token_list(self):
         """Populates self.token_list: List[TokenData]"""
+        if self.CandleStore:
+            self.CandleStore.prune()
         self.populate_token_list_interval(interval="D")
         for each in self.token_list:
-            each.ath_price_time = None
-            each.ath_price_usd = None
-            each.drawdown_price_usd = None
-            each.drawdown_price_time = None
-            each.drawdown_percent = None
-            each.drawdown_consecutive_days_start = None
-            each.drawdown_percent = None
-            each.ath_price_usd = None
-            each.candle_data = None
+            self._reset_screen_metrics(token=each)
 
         self.populate_token_list_interval(interval="H")
 
+    @staticmethod
+    def _reset_screen_metrics(token: TokenData):
+        token.ath_price_time = None
+        token.ath_price_usd = None
+        token.drawdown_price_usd = None
+        token.drawdown_price_time = None
+        token.drawdown_percent = None
+        token.drawdown_consecutive_days_start = None
+        token.candle_data = None
+
+    def rescreen_token_list(self, tokens: List[TokenData]):
+        """Screen tokens into token_list, only tokens that passed the last screen skip the full populate_token_list
+
+        Tokens that passed keep their daily candles of both passes in daily_series. Both are brought up to
+        date from the last days of candles and screened again by update_token_list. Tokens that failed either
+        pass, and new ones, are screened in full, from the CandleStore when one is configured. Tokens no
+        longer in tokens are forgotten.
+
+        Args:
+            tokens (List[TokenData]): verified tokens from TokenVolumes.get_tokens
+        """
+        mints = {x.mint_address for x in tokens}
+        self.screen_outcomes = {k: v for k, v in self.screen_outcomes.items() if k in mints}
+        survivors = [x for x in tokens if self.screen_outcomes.get(x.mint_address) == "passed"]
+        survivor_mints = {x.mint_address for x in survivors}
+        self.daily_series = {
+            k: {m: x for m, x in v.items() if m in survivor_mints} for k, v in self.daily_series.items()
+        }
+        rescreened = [
+            x for x in tokens if x.mint_address in self.screen_outcomes and x.mint_address not in survivor_mints
+        ]
+        newcomers = [x for x in tokens if x.mint_address not in self.screen_outcomes]
+        logger.info(
+            "Re-screen: {s} passed before, {f} failed before, {n} new".format(
+                s=len(survivors), f=len(rescreened), n=len(newcomers)
+            )
+        )
+
+        screened = list()
+        if rescreened or newcomers:
+            self.token_list = rescreened + newcomers
+            self.populate_token_list()
+            screened.extend(self.token_list)
+        if survivors:
+            self.token_list = survivors
+            with self.tracer.span("update_token_list", tokens=len(survivors)):
+                self.update_token_list()
+            screened.extend(self.token_list)
+
+        order = {x.mint_address: i for i, x in enumerate(tokens)}
+        self.token_list = sorted(screened, key=lambda x: order[x.mint_address])
+
+    def update_token_list(self):
+        """populate_token_list for tokens in daily_series, fetching only the newest days
+
+        Candles are fetched from the day before the last stored day, so the last stored day, which may have
+        been stored before it closed, is replaced by a complete one. Days older than candle_days are dropped
+        whole, where a full screen keeps the oldest hourly one partially.
+        """
+        for interval in ("D", "H"):
+            if not self.token_list:
+                return
+            for each in self.token_list:
+                self._reset_screen_metrics(token=each)
+            self._update_candle_data(interval=interval)
+            self._screen_token_list(interval=interval)
+
+    def _update_candle_data(self, interval: str):
+        """candle_data of token_list from the daily_series of interval and the candles since its last day"""
+        params = self.screen_params
+        stored_by_mint = self.daily_series[interval]
+        current_time = datetime.now(timezone.utc).replace(second=0, microsecond=0, minute=0)
+        if interval == "D":
+            current_time = current_time.replace(hour=0)
+        last_day = min(
+            self._get_last_day_start(series=stored_by_mint[x.mint_address], interval=interval) for x in self.token_list
+        )
+        candle_days = max(2, (current_time.timestamp() - last_day) // 86400 + 2)
+
+        with self.tracer.span("populate_candle_data", interval=interval, tokens=len(self.token_list)):
+            self.populate_candle_data(candle_days=int(candle_days), interval=interval)
+        since = int((current_time - timedelta(days=params.candle_days)).timestamp())
+        for token in self.token_list:
+            # None when the volume check failed, the token is dropped like in a full screen
+            if token.candle_data is None:
+                continue
+            stored = stored_by_mint[token.mint_address]
+            token.candle_data = stored.merge(
+                newer=CandleSeries.from_candles(candles=token.candle_data),
+                from_time=self._get_last_day_start(series=stored, interval=interval),
+            ).since(from_time=since)
+
+    @staticmethod
+    def _get_last_day_start(series: CandleSeries, interval: str) -> int:
+        """Start of the day of the last candle
+
+        Birdeye daily candles start at midnight UTC, days condensed from hourly candles at midnight in the
+        timezone DailyCandleAggregator split them in.
+        """
+        last_time = series.datetime_at(len(series) - 1)
+        if interval == "D":
+            return series.to_epoch(last_time)
+        return series.to_epoch(last_time.replace(hour=0, minute=0, second=0, microsecond=0))
+
     def populate_token_list_interval(self, interval: str):
         """Populates self.token_list: List[TokenData]"""
-        self.populate_candle_data(interval=interval)
+        params = self.screen_params
+        with self.tracer.span("populate_candle_data", interval=interval, tokens=len(self.token_list)):
+            self.populate_candle_data(candle_days=params.candle_days, interval=interval)
         logger.info("populate_candle_data done")
+        self._screen_token_list(interval=interval)
+
+    def _screen_token_list(self, interval: str):
+        """ATH and drawdown metrics from candle_data, token_list keeps the tokens passing screen_params"""
+        params = self.screen_params
+        self._report_token_memory(interval=interval)
         for token in self.token_list:
-            if token.candle_data is None or len(token.candle_data) < 14:
-                logger.info("Token {s} candle len < 14:".format(s=token.symbol))
+            if token.candle_data is None or len(token.candle_data) < params.min_candles:
+                logger.info("Token {s} candle len < {i}:".format(s=token.symbol, i=params.min_candles))
                 continue
 
-            self.populate_ath_metrics(token=token)
+            series = CandleSeries.from_candles(candles=token.candle_data)
+            self.populate_ath_metrics(token=token, series=series)
 
-            if not token.ath_price_usd or token.ath_price_usd < 0.006:
+            if not token.ath_price_usd or token.ath_price_usd < params.min_ath_price_usd:
                 logger.info("Token {s} ATH does not meet reqs: {l}".format(s=token.symbol, l=token.ath_price_usd))
                 continue
 
-            self.populate_drawdown_metrics(token=token)
+            self.populate_drawdown_metrics(token=token, series=series)
 
         filtered_list = list()
         for token in self.token_list:
@@ -85,25 +302,48 @@ class TokenCharts:
                 and token.drawdown_price_time
                 and token.drawdown_percent
                 and token.drawdown_consecutive_days_start
-                and token.drawdown_percent >= 0.7
-                and token.ath_price_usd >= 0.006
+                and token.drawdown_percent >= params.min_drawdown_percent
+                and token.ath_price_usd >= params.min_ath_price_usd
                 and token.candle_data
-                and len(token.candle_data) >= 14
+                and len(token.candle_data) >= params.min_candles
             ):
+                # Kept for update_token_list, only the hourly pass decides that a token passed
+                self.daily_series[interval][token.mint_address] = CandleSeries.from_candles(candles=token.candle_data)
+                if interval == "H":
+                    self.screen_outcomes[token.mint_address] = "passed"
                 token.candle_data = None
                 filtered_list.append(token)
-            elif token.drawdown_percent is None:
-                logger.info(token)
+                continue
+
+            self.screen_outcomes[token.mint_address] = interval
+            for series_by_mint in self.daily_series.values():
+                series_by_mint.pop(token.mint_address, None)
+            # The full token is only formatted when debug logging is on
+            if token.drawdown_percent is None:
+                logger.debug(token)
                 logger.info("Token {s} Drawdown is None".format(s=token.symbol))
-            elif token.drawdown_percent < 0.7:
-                logger.info(token)
+            elif token.drawdown_percent < params.min_drawdown_percent:
+                logger.debug(token)
                 logger.info("Token {s} Drawdown % not met: {l}".format(s=token.symbol, l=token.drawdown_percent))
             elif token.drawdown_consecutive_days_start is None:
-                logger.info(token)
+                logger.debug(token)
                 logger.info("Token {s} Drawdown consecutive days not met".format(s=token.symbol))
 
         self.token_list = filtered_list
 
+    def _report_token_memory(self, interval: str):
+        """Log and export the memory held by token_list while every token still has its candles"""
+        if not self.token_list:
+            return
+        total_bytes = get_deep_size(self.token_list)
+        candles = sum(len(x.candle_data) for x in self.token_list if x.candle_data is not None)
+        self.metrics.set("token_list_memory_bytes", total_bytes, interval=interval)
+        logger.info(
+            "{i} token_list memory: {m:.2f} MiB, {p:,.0f} bytes per token, {c} candles".format(
+                i=interval, m=total_bytes / 1024 / 1024, p=total_bytes / len(self.token_list), c=candles
+            )
+        )
+
     def populate_candle_data(self, candle_days: int = 365, interval="H") -> List[TokenData]:
         """_summary_
 
@@ -112,6 +352,9 @@ class TokenCharts:
             token (TokenData): _description_
             filter_days (int, optional): _description_. Defaults to 14.
         """
+        if self.use_async_candles:
+            self.populate_candle_data_async(candle_days=candle_days, interval=interval)
+            return
 
         i = 0
         for token in self.token_list:
@@ -119,52 +362,157 @@ class TokenCharts:
             logger.info(
                 "{a} of {b}: {x} {y}".format(a=i, b=len(self.token_list), x=token.symbol, y=token.mint_address)
             )
+            utc_from, current_time = self._get_candle_range(token=token, candle_days=candle_days, interval=interval)
+
+            with self.tracer.span("get_candle_data", mint=token.mint_address, symbol=token.symbol, interval=interval):
+                if interval == "H":
+                    aggregator = DailyCandleAggregator()
+                    self.get_candle_data_hourly(
+                        mint_address=token.mint_address,
+                        start_date=utc_from,
+                        end_date=current_time,
+                        on_page=aggregator.add_candles,
+                    )
+                    self._set_hourly_candle_data(token=token, aggregator=aggregator)
+                elif interval == "D":
+                    candle_data_response = self.get_candle_data_daily(
+                        mint_address=token.mint_address, start_date=utc_from, end_date=current_time
+                    )
+                    token.candle_data = CandleSeries.from_candles(candles=candle_data_response)
 
-            if interval == "H":
-                current_time = datetime.now(timezone.utc).replace(second=0, microsecond=0, minute=0)
+    def populate_candle_data_async(self, candle_days: int = 365, interval="H"):
+        """Same as populate_candle_data, with the OHLCV windows of all tokens fetched concurrently"""
+        if interval not in ("H", "D"):
+            return
 
-                utc_from = max(
-                    current_time - timedelta(days=candle_days),
-                    token.create_date.replace(minute=0, second=0, microsecond=0),
-                )
-                logger.info("H Create date: {t}".format(t=token.create_date))
-                logger.info("H Start date: {t}".format(t=utc_from))
-                logger.info("H End date: {t}".format(t=current_time))
+        candle_ranges = list()
+        candle_requests = list()
+        for token in self.token_list:
+            utc_from, current_time = self._get_candle_range(token=token, candle_days=candle_days, interval=interval)
+            fetch_start = self._get_fetch_start(
+                mint_address=token.mint_address, interval=interval, start_date=utc_from, end_date=current_time
+            )
+            candle_ranges.append((utc_from, current_time))
+            candle_requests.append(
+                CandleRequest(mint_address=token.mint_address, start_date=fetch_start, end_date=current_time)
+            )
 
-                candle_data_response = self.get_candle_data_hourly(
-                    mint_address=token.mint_address, start_date=utc_from, end_date=current_time
-                )
+        # Hourly pages go straight into a per token aggregator unless they have to be stored first
+        aggregators = dict()
+        if interval == "H":
+            aggregators = {token.mint_address: DailyCandleAggregator() for token in self.token_list}
 
-                if not self.verify_volume_authenticity(hourly_candles=candle_data_response[-24:]):
-                    logger.info("Volume volatility not met for {x} {y}".format(x=token.symbol, y=token.mint_address))
-                    continue
+        def on_page(mint_address: str, candles: List[CandleData]):
+            aggregators[mint_address].add_candles(candles)
 
-                calculated_results = self.condense_candles_to_days(candles_to_condense=candle_data_response)
+        logger.info("Fetching {i} candle sets, interval {x}".format(i=len(candle_requests), x=interval))
+        candle_results = self.CandleFetcher.fetch(
+            candle_requests=candle_requests,
+            interval=interval,
+            on_page=on_page if aggregators and self.CandleStore is None else None,
+        )
 
-                token.candle_data = calculated_results
-            elif interval == "D":
-                current_time = datetime.now(timezone.utc).replace(second=0, microsecond=0, minute=0, hour=0)
-                utc_from = max(
-                    current_time - timedelta(days=candle_days),
-                    token.create_date.replace(minute=0, second=0, microsecond=0, hour=0),
-                )
-                logger.info("D Create date: {t}".format(t=token.create_date))
-                logger.info("D Start date: {t}".format(t=utc_from))
-                logger.info("D End date: {t}".format(t=current_time))
+        for token, candle_request, candle_range in zip(self.token_list, candle_requests, candle_ranges):
+            aggregator = aggregators.get(token.mint_address)
+            candles = self._merge_stored_candles(
+                mint_address=token.mint_address,
+                interval=interval,
+                fetched=candle_results.pop(token.mint_address, []),
+                start_date=candle_range[0],
+                end_date=candle_range[1],
+                fetch_start=candle_request.start_date,
+                on_page=aggregator.add_candles if aggregator else None,
+            )
+            if aggregator:
+                self._set_hourly_candle_data(token=token, aggregator=aggregator)
+            else:
+                token.candle_data = CandleSeries.from_candles(candles=candles)
+
+    def _get_fetch_start(self, mint_address: str, interval: str, start_date: datetime, end_date: datetime) -> datetime:
+        """First candle time that has to come from Birdeye, candles before it are already stored
+
+        The last stored candle is always fetched again as it may have been stored before its period closed.
+        """
+        if self.CandleStore is None:
+            return start_date
+
+        coverage = self.CandleStore.get_coverage(mint=mint_address, interval=interval)
+        if coverage is None:
+            return start_date
 
-                candle_data_response = self.get_candle_data_daily(
-                    mint_address=token.mint_address, start_date=utc_from, end_date=current_time
+        covered_from, covered_to = coverage
+        if covered_from > int(start_date.timestamp()) or covered_to < int(start_date.timestamp()):
+            return start_date
+
+        step = timedelta(hours=1) if interval == "H" else timedelta(days=1)
+        fetch_start = min(datetime.fromtimestamp(covered_to, tz=timezone.utc), end_date - step)
+        return max(fetch_start, start_date)
+
+    def _merge_stored_candles(
+        self,
+        mint_address: str,
+        interval: str,
+        fetched: List[CandleData],
+        start_date: datetime,
+        end_date: datetime,
+        fetch_start: datetime,
+        on_page: Optional[Callable[[List[CandleData]], None]] = None,
+    ) -> List[CandleData]:
+        """Save freshly fetched candles and return the full start_date - end_date range from the store
+
+        With on_page the stored range is handed over page by page instead and an empty list is returned.
+        """
+        if self.CandleStore is None:
+            if on_page and fetched:
+                on_page(fetched)
+                return []
+            return fetched
+
+        self.CandleStore.save_candles(
+            mint=mint_address, interval=interval, candles=fetched, covered_from=int(fetch_start.timestamp())
+        )
+        if fetch_start > start_date:
+            logger.info(
+                "{i} stored candles reused for {t}, fetched {f} from {d}".format(
+                    i=interval, t=mint_address, f=len(fetched), d=fetch_start
                 )
-                token.candle_data = candle_data_response
+            )
+        if on_page:
+            for page in self.CandleStore.iter_candles(
+                mint=mint_address, interval=interval, start_date=start_date, end_date=end_date
+            ):
+                on_page(page)
+            return []
+        return self.CandleStore.get_candles(
+            mint=mint_address, interval=interval, start_date=start_date, end_date=end_date
+        )
 
-    @staticmethod
-    def _get_candle(candle_list: List[CandleData], time: datetime = None) -> CandleData:
-        if time:
-            value_list = [x for x in candle_list if x.time == time]
-        if len(value_list) != 1:
-            return None
+    def _get_candle_range(self, token: TokenData, candle_days: int, interval: str) -> Tuple[datetime, datetime]:
+        """Start and end time of the candles to request for token"""
+        if interval == "H":
+            current_time = datetime.now(timezone.utc).replace(second=0, microsecond=0, minute=0)
+            utc_from = max(
+                current_time - timedelta(days=candle_days),
+                token.create_date.replace(minute=0, second=0, microsecond=0),
+            )
+        else:
+            current_time = datetime.now(timezone.utc).replace(second=0, microsecond=0, minute=0, hour=0)
+            utc_from = max(
+                current_time - timedelta(days=candle_days),
+                token.create_date.replace(minute=0, second=0, microsecond=0, hour=0),
+            )
+        logger.info("{i} Create date: {t}".format(i=interval, t=token.create_date))
+        logger.info("{i} Start date: {t}".format(i=interval, t=utc_from))
+        logger.info("{i} End date: {t}".format(i=interval, t=current_time))
+        return utc_from, current_time
+
+    def _set_hourly_candle_data(self, token: TokenData, aggregator: DailyCandleAggregator):
+        """Attach the daily candles condensed from the hourly candles fed into aggregator"""
+        if not self.verify_volume_authenticity(hourly_candles=aggregator.get_last_hours()):
+            logger.info("Volume volatility not met for {x} {y}".format(x=token.symbol, y=token.mint_address))
+            return
 
-        return value_list[0]
+        token.candle_data = CandleSeries.from_candles(candles=aggregator.finish())
 
     @retry(
         stop=stop_after_attempt(3),  # Retry 3 times
@@ -172,26 +520,30 @@ class TokenCharts:
         retry=retry_if_exception_type((RequestException, HTTPError, SSLError)),  # Retry on RequestException
         reraise=True,  # Reraise the last exception after retries
     )
-    def get_candle_data_hourly(self, mint_address: str, start_date: datetime, end_date: datetime) -> List[CandleData]:
+    def get_candle_data_hourly(
+        self,
+        mint_address: str,
+        start_date: datetime,
+        end_date: datetime,
+        on_page: Optional[Callable[[List[CandleData]], None]] = None,
+    ) -> List[CandleData]:
         """_summary_
 
         Args:
             start_date (datetime): _description_
             end_date (datetime): _description_
-            interval_minutes (int): _description_
+            on_page (Callable, optional): receives the candles page by page instead of them being returned.
+                A retry replays pages from the start.
 
         Returns:
             List[CandleData]: _description_
         """
 
-        temp_end_time = start_date
+        fetch_start = self._get_fetch_start(
+            mint_address=mint_address, interval="H", start_date=start_date, end_date=end_date
+        )
         results = []
-        while temp_end_time < end_date:
-            temp_end_time = min(start_date + timedelta(hours=99), end_date)
-
-            time_from = int(start_date.timestamp())
-            time_to = int(temp_end_time.timestamp())
-
+        for time_from, time_to in get_candle_windows(start_date=fetch_start, end_date=end_date, interval="H"):
             params = {
                 "address": mint_address,
                 "type": "1H",
@@ -199,36 +551,35 @@ class TokenCharts:
                 "time_from": time_from,
                 "time_to": time_to,
             }
-            url = "https://public-api.birdeye.so/defi/v3/ohlcv"
-            response = requests.get(url, headers=self.headers, params=params)
-            sleep(0.2)
+            url = "{b}/defi/v3/ohlcv".format(b=self.base_url)
+            response = self.http.get("birdeye", url, headers=self.headers, params=params)
             # Check if the request was successful
             if response.status_code != 200:
                 logger.info("Response failed for {t}: {e}".format(t=mint_address, e=response.text))
-                return results
+                break
 
             # Parse the JSON response
             response_json = json.loads(response.text)
 
             if "data" not in response_json or "items" not in response_json["data"]:
                 logger.info("No OCLHV data for {t}: {e}".format(t=mint_address, e=response_json))
-                return results
-
-            for each in response_json["data"]["items"]:
-                dt = datetime.fromtimestamp(each["unix_time"])
-                results.append(
-                    CandleData(
-                        time=dt,
-                        open=each["o"],
-                        high=each["h"],
-                        low=each["l"],
-                        close=each["c"],
-                        volume=each["v_usd"],
-                    )
-                )
-            start_date = temp_end_time + timedelta(hours=1)
+                break
 
-        return results
+            page = parse_candle_items(items=response_json["data"]["items"])
+            if on_page and self.CandleStore is None:
+                on_page(page)
+            else:
+                results.extend(page)
+
+        return self._merge_stored_candles(
+            mint_address=mint_address,
+            interval="H",
+            fetched=results,
+            start_date=start_date,
+            end_date=end_date,
+            fetch_start=fetch_start,
+            on_page=on_page,
+        )
 
     @retry(
         stop=stop_after_attempt(3),  # Retry 3 times
@@ -248,14 +599,11 @@ class TokenCharts:
             List[CandleData]: _description_
         """
 
-        temp_end_time = start_date
+        fetch_start = self._get_fetch_start(
+            mint_address=mint_address, interval="D", start_date=start_date, end_date=end_date
+        )
         results = []
-        while temp_end_time < end_date:
-            temp_end_time = min(start_date + timedelta(days=99), end_date)
-
-            time_from = int(start_date.timestamp())
-            time_to = int(temp_end_time.timestamp())
-
+        for time_from, time_to in get_candle_windows(start_date=fetch_start, end_date=end_date, interval="D"):
             params = {
                 "address": mint_address,
                 "type": "1D",
@@ -263,91 +611,51 @@ class TokenCharts:
                 "time_from": time_from,
                 "time_to": time_to,
             }
-            url = "https://public-api.birdeye.so/defi/v3/ohlcv"
-            response = requests.get(url, headers=self.headers, params=params)
-            sleep(0.2)
+            url = "{b}/defi/v3/ohlcv".format(b=self.base_url)
+            response = self.http.get("birdeye", url, headers=self.headers, params=params)
             # Check if the request was successful
             if response.status_code != 200:
                 logger.info("Response failed for {t}: {e}".format(t=mint_address, e=response.text))
-                return results
+                break
 
             # Parse the JSON response
             response_json = json.loads(response.text)
 
             if "data" not in response_json or "items" not in response_json["data"]:
                 logger.info("No OCLHV data for {t}: {e}".format(t=mint_address, e=response_json))
-                return results
-
-            for each in response_json["data"]["items"]:
-                dt = datetime.fromtimestamp(each["unix_time"])
-                results.append(
-                    CandleData(
-                        time=dt,
-                        open=each["o"],
-                        high=each["h"],
-                        low=each["l"],
-                        close=each["c"],
-                        volume=each["v_usd"],
-                    )
-                )
-            start_date = temp_end_time + timedelta(days=1)
+                break
 
-        return results
+            results.extend(parse_candle_items(items=response_json["data"]["items"]))
+
+        return self._merge_stored_candles(
+            mint_address=mint_address,
+            interval="D",
+            fetched=results,
+            start_date=start_date,
+            end_date=end_date,
+            fetch_start=fetch_start,
+        )
 
     def condense_candles_to_days(self, candles_to_condense: List[CandleData]) -> List[CandleData]:
-        """ """
-        distinct_days = sorted({dt.time.date() for dt in candles_to_condense})
-
-        calculated_results = list()
-        for day in distinct_days:
-            candles_for_day = list()
-            for x in candles_to_condense:
-                if x.time.date() == day:
-                    candles_for_day.append(x)
-                if len(candles_for_day) == 24:
-                    break
-
-            high_close = max([x.close for x in candles_for_day])
-            high_open = max([x.open for x in candles_for_day])
-            high = max(high_close, high_open)
-
-            low_close = min([x.close for x in candles_for_day])
-            low_open = min([x.open for x in candles_for_day])
-            low = min(low_close, low_open)
-
-            min_hourly_candle = min([x.time for x in candles_for_day])
-            open_candle = self._get_candle(candle_list=candles_for_day, time=min_hourly_candle)
-
-            max_hourly_candle = max([x.time for x in candles_for_day])
-            close_candle = self._get_candle(candle_list=candles_for_day, time=max_hourly_candle)
-
-            volume_sum = round(sum([x.volume for x in candles_for_day]), 0)
-
-            calculated_results.append(
-                CandleData(
-                    time=open_candle.time,
-                    open=open_candle.open,
-                    high=high,
-                    low=low,
-                    close=close_candle.close,
-                    volume=volume_sum,
-                )
-            )
-        return calculated_results
+        """Condense hourly candles into daily candles"""
+        aggregator = DailyCandleAggregator()
+        aggregator.add_candles(sorted(candles_to_condense, key=lambda x: x.time))
+        return aggregator.finish()
 
-    def populate_ath_metrics(self, token: TokenData):
-        """_summary_
+    def populate_ath_metrics(self, token: TokenData, series: Optional[CandleSeries] = None):
+        """Set the ATH price and the time of its latest occurrence
 
         Args:
-            token_list (List[TokenData]): _description_
-
-        Returns:
-            List[TokenData]: _description_
+            token (TokenData): token with candle_data
+            series (CandleSeries, optional): token.candle_data as columns, built if not provided
         """
-        ath_price_usd = max([x.high for x in token.candle_data])
-        ath_price_time = max([x.time for x in token.candle_data if x.high == ath_price_usd])
+        if series is None:
+            series = CandleSeries.from_candles(candles=token.candle_data)
+        ath_price_usd, ath_index = series.get_ath()
+        if ath_index is None:
+            return
 
-        token.ath_price_time = ath_price_time
+        token.ath_price_time = series.datetime_at(ath_index)
         token.ath_price_usd = ath_price_usd
 
     def verify_volume_authenticity(self, hourly_candles: List[CandleData] = None) -> bool:
@@ -362,7 +670,7 @@ class TokenCharts:
         volumes = [x.volume for x in hourly_candles][:-1]
         co_eff = self.coefficient_of_variation(numbers=volumes)
         logger.info("Volume coefficiency of variation: {f}".format(f=round(co_eff, 6)))
-        if co_eff < 0.3:
+        if co_eff < self.screen_params.min_volume_variation:
             return False
         return True
 
@@ -372,49 +680,59 @@ class TokenCharts:
             return 0  # Handle empty lists or zero mean
         return stdev(numbers) / mean(numbers)
 
-    def populate_drawdown_metrics(self, token: TokenData):
-        """_summary_
+    def populate_drawdown_metrics(self, token: TokenData, series: Optional[CandleSeries] = None):
+        """Set the lowest price after the ATH, the drawdown percent and the start of the consecutive dip
 
         Args:
-            token_list (List[TokenData]): _description_
-
-        Returns:
-            List[TokenData]: _description_
+            token (TokenData): token with candle_data and ATH metrics
+            series (CandleSeries, optional): token.candle_data as columns, built if not provided
         """
         if not token.ath_price_time or not token.ath_price_usd:
             return
 
+        if series is None:
+            series = CandleSeries.from_candles(candles=token.candle_data)
+        ath_time = series.to_epoch(token.ath_price_time)
+
         # if ath is latest candle
-        if token.ath_price_time == max([x.time for x in token.candle_data]):
+        if ath_time == series.time.max():
             return
 
-        low_price_usd = min([x.low for x in token.candle_data if x.time > token.ath_price_time])
-        low_price_time = max([x.time for x in token.candle_data if x.low == low_price_usd])
+        low_price_usd, low_index = series.get_low_after(after_time=ath_time)
+        if low_index is None:
+            return
 
-        token.drawdown_price_time = low_price_time
+        token.drawdown_price_time = series.datetime_at(low_index)
         token.drawdown_price_usd = low_price_usd
-        token.drawdown_percent = (token.ath_price_usd - token.drawdown_price_usd) / token.ath_price_usd
+        token.drawdown_percent = series.get_drawdown_percent(
+            ath_price=token.ath_price_usd, low_price=token.drawdown_price_usd
+        )
         token.drawdown_consecutive_days_start = self.get_time_consecutive_below_percent(
-            candle_list=token.candle_data, time_greater_than=token.ath_price_time, ath_price_usd=token.ath_price_usd
+            series=series, time_greater_than=token.ath_price_time, ath_price_usd=token.ath_price_usd
         )
 
     def get_time_consecutive_below_percent(
         self,
-        percent_dip: float = 0.6,
+        percent_dip: Optional[float] = None,
         candle_list: List[CandleData] = None,
         time_greater_than: datetime = None,
         ath_price_usd: float = None,
+        series: Optional[CandleSeries] = None,
     ) -> datetime:
-        candles_in_scope = [x for x in candle_list if x.time > time_greater_than]
+        """Time of the first run of consecutive closes more than percent_dip below the ATH, see screen_params"""
+        if percent_dip is None:
+            percent_dip = self.screen_params.dip_percent
+        if series is None:
+            series = CandleSeries.from_candles(candles=candle_list)
         threshold_price = ath_price_usd * (1.0 - percent_dip)
-        for i in range(len(candles_in_scope) - 2):
-            if (
-                candles_in_scope[i].close < threshold_price
-                and candles_in_scope[i + 1].close < threshold_price
-                and candles_in_scope[i + 2].close < threshold_price
-            ):
-                return candles_in_scope[i].time
-        return None
+        index = series.get_first_consecutive_close_below(
+            threshold_price=threshold_price,
+            after_time=series.to_epoch(time_greater_than),
+            consecutive=self.screen_params.consecutive_closes,
+        )
+        if index is None:
+            return None
+        return series.datetime_at(index)
 
     def get_token_price_at_time(self, mint: str, start_time: datetime) -> float:
         """_summary_
@@ -438,8 +756,8 @@ class TokenCharts:
             "time_from": time_from,
             "time_to": time_from,
         }
-        url = "https://public-api.birdeye.so/defi/ohlcv"
-        response = requests.get(url, headers=self.headers, params=params)
+        url = "{b}/defi/ohlcv".format(b=self.base_url)
+        response = self.http.get("birdeye", url, headers=self.headers, params=params)
 
         # Check if the request was successful
         if response.status_code != 200:
@@ -470,48 +788,53 @@ class TokenCharts:
             return 160.0
 
     def update_current_prices(self):
-        """_summary_"""
+        """Quote the tokens that PriceScheduler has due, see PriceRefreshScheduler for the refresh tiers"""
         current_time = datetime.now(timezone.utc)
 
-        quotes_to_get = list()
-        for token in self.token_list:
-            if (
-                token.current_price_time is None
-                or token.current_price_usd is None
-                or token.current_per_from_ath is None
-            ):
-                quotes_to_get.append(token.mint_address)
-                continue
-            time_diff = current_time - token.current_price_time
-            if time_diff > timedelta(seconds=60) and token.current_per_from_ath <= 0.2:
-                quotes_to_get.append(token.mint_address)
-            elif time_diff > timedelta(seconds=120) and token.current_per_from_ath <= 0.3:
-                quotes_to_get.append(token.mint_address)
-            elif time_diff > timedelta(seconds=300) and token.current_per_from_ath <= 0.5:
-                quotes_to_get.append(token.mint_address)
-            elif time_diff > timedelta(seconds=600):
-                quotes_to_get.append(token.mint_address)
-
+        quotes_to_get = self.PriceScheduler.pop_due(now=current_time)
+        due_tokens = [self._tokens_by_mint[x] for x in quotes_to_get if x in self._tokens_by_mint]
         logger.info("Getting {x} quotes".format(x=len(quotes_to_get)))
-        quotes = self.get_quotes(mints=quotes_to_get)
-
-        for token in self.token_list:
-            if token.mint_address not in quotes_to_get:
-                continue
+        try:
+            quotes = self.get_quotes(mints=quotes_to_get)
+        except Exception:
+            # Tokens are quoted again after the retry wait
+            for token in due_tokens:
+                self.PriceScheduler.schedule_retry(token=token, now=current_time)
+            raise
+
+        missing = 0
+        for token in due_tokens:
             # Update time held
             quote_values = quotes.get(token.mint_address)
             if quote_values is None:
-                logger.info("Quote is None")
-                logger.info(token)
-                logger.info(quote_values)
+                # Only formatted, on the log writer thread, when debug logging is on
+                logger.debug(token)
+                missing += 1
+                self.PriceScheduler.schedule_retry(token=token, now=current_time)
                 continue
+            self._set_current_price(
+                token=token, price_usd=quote_values["current_price_per_token_usd"], price_time=current_time
+            )
+            self.PriceScheduler.schedule(token=token)
+        if missing:
+            logger.info("No quote for {m} of {n} tokens".format(m=missing, n=len(due_tokens)))
+
+    def get_seconds_until_next_quote(self, min_seconds: float = 5.0, max_seconds: float = 60.0) -> float:
+        """Seconds until the next quote is due, clamped to [min_seconds, max_seconds]"""
+        next_due = self.PriceScheduler.get_next_due()
+        if next_due is None:
+            return max_seconds
+        seconds = (next_due - datetime.now(timezone.utc)).total_seconds()
+        return min(max(seconds, min_seconds), max_seconds)
 
-            token.current_price_usd = quote_values["current_price_per_token_usd"]
-            token.current_price_time = current_time
-            if token.ath_price_usd and token.current_price_usd and token.ath_price_usd != 0:
-                token.current_per_from_ath = (token.ath_price_usd - token.current_price_usd) / token.ath_price_usd
-            else:
-                token.current_per_from_ath = 1.0
+    @staticmethod
+    def _set_current_price(token: TokenData, price_usd: float, price_time: datetime):
+        token.current_price_usd = price_usd
+        token.current_price_time = price_time
+        if token.ath_price_usd and token.current_price_usd and token.ath_price_usd != 0:
+            token.current_per_from_ath = (token.ath_price_usd - token.current_price_usd) / token.ath_price_usd
+        else:
+            token.current_per_from_ath = 1.0
 
     def get_quotes(self, mints: List[str]) -> dict:
         """_summary_
@@ -525,23 +848,55 @@ class TokenCharts:
         if not mints or len(mints) == 0:
             return dict()
 
+        mints = list(dict.fromkeys(mints))
+        chunks = list(chunked(mints, self.quote_chunk_size))
+        if len(chunks) == 1:
+            return self._get_quotes_chunk_safe(mints=chunks[0])
+
+        result_dict = dict()
+        with ThreadPoolExecutor(max_workers=min(self.max_quote_workers, len(chunks))) as executor:
+            get_chunk = self.tracer.wrap(self._get_quotes_chunk_safe)
+            for chunk_result in executor.map(lambda x: get_chunk(mints=x), chunks):
+                result_dict.update(chunk_result)
+        return result_dict
+
+    def _get_quotes_chunk_safe(self, mints: List[str]) -> dict:
+        """_get_quotes_chunk, a chunk that still fails after its retries returns no quotes"""
+        try:
+            with self.tracer.span("get_quotes_chunk", mints=len(mints)):
+                return self._get_quotes_chunk(mints=mints)
+        except Exception as e:
+            logger.info("Quotes failed for {i} mints: {e}".format(i=len(mints), e=e))
+            return dict()
+
+    @retry(
+        stop=stop_after_attempt(3),  # Retry 3 times
+        wait=wait_fixed(2),  # Wait 2 seconds between retries
+        retry=retry_if_exception_type((RequestException, HTTPError, SSLError)),  # Retry on RequestException
+        reraise=True,  # Reraise the last exception after retries
+    )
+    def _get_quotes_chunk(self, mints: List[str]) -> dict:
         comma_separated = ",".join(mints)
-        url = "https://public-api.birdeye.so/defi/multi_price?check_liquidity=40000&include_liquidity=false"
+        url = "{b}/defi/multi_price?check_liquidity=40000&include_liquidity=false".format(b=self.base_url)
 
         payload = {"list_address": comma_separated}
 
-        response = requests.post(url, json=payload, headers=self.headers)
+        response = self.http.post("birdeye", url, json=payload, headers=self.headers)
+
+        # Rate limited or provider error, worth another attempt
+        if response.status_code == 429 or response.status_code >= 500:
+            raise HTTPError("multi_price returned {s}".format(s=response.status_code), response=response)
 
         # Check if the request was successful
         if response.status_code != 200:
-            logger.info("Response failed for {t}: {e}".format(t=mints, e=response.text))
+            logger.info("Response failed for {i} mints: {e}".format(i=len(mints), e=response.text))
             return dict()
 
         # Parse the JSON response
         response_json = json.loads(response.text)
 
         if "data" not in response_json:
-            logger.info("No quotes data for {t}: {e}".format(t=mints, e=response_json))
+            logger.info("No quotes data for {i} mints: {e}".format(i=len(mints), e=response_json))
             return dict()
 
         result_dict = dict()
@@ -564,15 +919,16 @@ class TokenCharts:
         return result_dict
 
     def clean_token_list(self):
+        params = self.screen_params
         new_list = list()
         for each in self.token_list:
             if (
                 each.current_price_usd
-                and (each.ath_price_usd - each.current_price_usd > 0.2)
-                and each.current_price_usd < 0.1
+                and (each.ath_price_usd - each.current_price_usd > params.max_ath_gap_usd)
+                and each.current_price_usd < params.max_gap_price_usd
             ):
                 logger.info("Token removed, price too far from ATH: {s}".format(s=each.symbol))
-            elif each.current_price_usd and each.current_price_usd < 0.001:
+            elif each.current_price_usd and each.current_price_usd < params.min_price_usd:
                 logger.info("Token removed, price too low: {s}".format(s=each.symbol))
             else:
                 new_list.append(each)
@@ -588,12 +944,12 @@ class TokenCharts:
         current_time = datetime.now(timezone.utc)
         for each in self.token_list:
             if each.current_price_time is None or each.current_price_usd is None or each.current_per_from_ath is None:
-                logger.info(each.__short_str__())
+                logger.info(LazyMessage(each.__short_str__))
                 continue
 
             time_diff = current_time - each.current_price_time
             if time_diff < timedelta(seconds=60):
-                logger.info(each.__short_str__())
+                logger.info(LazyMessage(each.__short_str__))
 
         logger.info("Token Count: {f}".format(f=len(self.token_list)))
 
@@ -1,23 +1,51 @@
 import json
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from datetime import datetime, timedelta, timezone
-from time import sleep
-from typing import List, Tuple
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 
-import requests
-from heliuspy import HeliusAPI
 from requests.exceptions import HTTPError, RequestException, SSLError
 from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_fixed
 
+from spl_drawdown.modules.verification_cache import VerificationCache
 from spl_drawdown.types.token_data import TokenData
+from spl_drawdown.types.verdict_data import VerdictData
+from spl_drawdown.utils.http_client import get_http_client
 from spl_drawdown.utils.log import get_logger
+from spl_drawdown.utils.tracing import get_tracer
 
 logger = get_logger()
 
 
 class TokenVolumes:
-    def __init__(self, BIRDEYE_API_TOKEN: str, HELIUS_API_KEY: str):
+    def __init__(
+        self,
+        BIRDEYE_API_TOKEN: str,
+        HELIUS_API_KEY: str,
+        max_workers: int = 8,
+        verification_cache_path: Optional[str] = None,
+        static_ttl_hours: float = 24 * 30,
+        holder_ttl_hours: float = 72,
+        rpc_endpoint: Optional[str] = None,
+        asset_batch_size: int = 1000,
+        max_failed_pages: int = 3,
+        base_url: str = "https://public-api.birdeye.so",
+        helius_rpc_url: str = "https://mainnet.helius-rpc.com",
+    ):
         self.BIRDEYE_API_TOKEN = BIRDEYE_API_TOKEN
-        self.Helius = HeliusAPI(api_key=HELIUS_API_KEY)
+        self.base_url = base_url
+        self.max_workers = max_workers
+        self.VerificationCache = VerificationCache(path=verification_cache_path) if verification_cache_path else None
+        # creator, creation time, authorities and freeze authority rarely change, top 10 holder percent does
+        self.static_ttl = timedelta(hours=static_ttl_hours)
+        self.holder_ttl = timedelta(hours=holder_ttl_hours)
+        self.min_token_age = timedelta(days=14)
+        self.RPC_ENDPOINT = rpc_endpoint or f"{helius_rpc_url}/?api-key={HELIUS_API_KEY}"
+        # getAssetBatch accepts at most 1000 ids per call
+        self.asset_batch_size = asset_batch_size
+        self.max_failed_pages = max_failed_pages
+        self.http = get_http_client()
+        self.tracer = get_tracer()
 
         self.headers = {"accept": "application/json", "x-chain": "solana", "X-API-KEY": self.BIRDEYE_API_TOKEN}
         ignore_tokens_seed = [
@@ -35,47 +63,133 @@ class TokenVolumes:
         self.ignore_tokens_dict = {token: True for token in ignore_tokens_seed}
         self.last_run_date = None
 
-    def get_tokens(self, min_volume: int = 500000) -> List[TokenData]:
+    def get_tokens(self, min_volume: int = 500000, verified: Optional[Dict[str, TokenData]] = None) -> List[TokenData]:
         """_summary_
 
+        Pages of the token list are verified as they arrive, while the next page is being fetched.
+
         Args:
             min_volume (float, optional): _description_. Defaults to 1000000.0.
             timeframe_hours (int, optional): _description_. Defaults to 1.
+            verified (Dict[str, TokenData], optional): tokens that passed a previous get_tokens, by mint. Listed
+                tokens found here skip verification and take its create_date, market and dex, see is_reusable.
 
         Returns:
             List[TokenData]: _description_
         """
+        if self.VerificationCache:
+            self.VerificationCache.prune()
+        verified = verified or dict()
+
+        filtered_list = list()
+        futures = list()
+        reused = 0
+        # Tokens fan out over token_pool, the checks of each token over check_pool
+        with ThreadPoolExecutor(max_workers=self.max_workers * 3) as check_pool:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as token_pool:
+                for page in self.iter_token_pages(min_volume=min_volume):
+                    # Listing order is kept by handing reused tokens over as finished futures
+                    page_futures: Dict[str, Future] = dict()
+                    unverified = list()
+                    for token in page:
+                        previous = verified.get(token.mint_address)
+                        if previous is None or not self.is_reusable(token=previous):
+                            unverified.append(token)
+                            continue
+                        token.create_date = previous.create_date
+                        token.market = previous.market
+                        token.dex = previous.dex
+                        token.verified_date = previous.verified_date
+                        future = Future()
+                        future.set_result(token)
+                        page_futures[token.mint_address] = future
+                        reused += 1
+
+                    # Update authorities are resolved in bulk per page,
+                    # tokens missing from the map fall back on verify_update_authority
+                    update_authority_verdicts = self.get_update_authority_verdicts(tokens=unverified)
+                    for token in unverified:
+                        if not update_authority_verdicts.get(token.mint_address, True):
+                            continue
+                        page_futures[token.mint_address] = token_pool.submit(
+                            self.tracer.wrap(self.verify_token),
+                            token=token,
+                            check_pool=check_pool,
+                            check_update_authority=token.mint_address not in update_authority_verdicts,
+                        )
+                    futures.extend(page_futures[x.mint_address] for x in page if x.mint_address in page_futures)
+
+                self.last_run_date = datetime.now(timezone.utc)
+                logger.info(
+                    "Tokens passing update authority: {t}, verified before: {r}".format(t=len(futures), r=reused)
+                )
+                i = 0
+                for future in futures:
+                    i += 1
+                    if i % 100 == 0:
+                        logger.info("{a} of {b}".format(a=i, b=len(futures)))
+                    if future.result():
+                        filtered_list.append(future.result())
+
+        logger.info("Tokens returned: {t}".format(t=[x.symbol for x in filtered_list]))
+
+        return filtered_list
+
+    def is_reusable(self, token: TokenData) -> bool:
+        """Whether a token verified before can skip verification
+
+        The top 10 holder and market checks are trusted for holder_ttl after the token passed them, and not
+        past the cached security verdict, which may have been cached before that. Expired tokens go through
+        verify_token again, where checks still cached for static_ttl cost no request.
+        """
+        if token.verified_date is None or datetime.now(timezone.utc) - token.verified_date >= self.holder_ttl:
+            return False
+        if self.VerificationCache:
+            verdict = self.VerificationCache.get(mint=token.mint_address, check="security")
+            return verdict is not None and verdict.passed
+        return True
+
+    def iter_token_pages(self, min_volume: int = 500000) -> Iterator[List[TokenData]]:
+        """Yield /defi/v3/token/list page by page
+
+        A page that still fails after its retries is skipped, the listing stops after
+        max_failed_pages failed pages in a row.
+
+        Args:
+            min_volume (int, optional): minimum 24h volume in usd. Defaults to 500000.
+
+        Yields:
+            Iterator[List[TokenData]]: tokens of each page, ignored tokens removed
+        """
         has_next = True
         offset = 0
-        results = list()
+        failed_pages = 0
+        token_count = 0
         while has_next:
-            params = {
-                "sort_by": "volume_24h_usd",
-                "sort_type": "desc",
-                "min_volume_24h_usd": min_volume,
-                "offset": offset,
-                "limit": 100,
-            }
-            url = "https://public-api.birdeye.so/defi/v3/token/list"
-            response = requests.get(url, headers=self.headers, params=params)
+            try:
+                response_json = self._get_token_page(min_volume=min_volume, offset=offset)
+            except Exception as e:
+                failed_pages += 1
+                logger.info("Token page {o} failed: {e}".format(o=offset, e=e))
+                if failed_pages >= self.max_failed_pages:
+                    logger.info("{i} token pages failed in a row, stopping".format(i=failed_pages))
+                    break
+                offset += 100
+                continue
+            failed_pages = 0
             offset += 100
 
-            # Check if the request was successful
-            if response.status_code != 200:
-                logger.info("Response failed : {e}".format(e=response.text))
-                return list()
-            response_json = json.loads(response.text)
-
             if not response_json.get("data") or not response_json["data"].get("items"):
                 logger.info("No results found")
-                return list()
+                break
             has_next = response_json["data"]["has_next"]
 
+            page = list()
             for each in response_json["data"]["items"]:
                 if each["address"] in self.ignore_tokens_dict:
                     continue
 
-                results.append(
+                page.append(
                     TokenData(
                         name=each["name"],
                         symbol=each["symbol"],
@@ -86,47 +200,111 @@ class TokenVolumes:
                         market="",
                     )
                 )
+            token_count += len(page)
+            yield page
 
-        self.last_run_date = datetime.now(timezone.utc)
-        filtered_list = list()
-        logger.info("Tokens with volume: {t}".format(t=len(results)))
-        i = 0
-        for token in results:
-            i += 1
-            if i % 100 == 0:
-                logger.info("{a} of {b}".format(a=i, b=len(results)))
-
-            if not self.verify_update_authority(token=token):
-                continue
+        logger.info("Tokens with volume: {t}".format(t=token_count))
 
-            if not self.verify_ownership(token=token):
-                continue
+    @retry(
+        stop=stop_after_attempt(3),  # Retry 3 times
+        wait=wait_fixed(2),  # Wait 2 seconds between retries
+        retry=retry_if_exception_type((RequestException, HTTPError, SSLError)),  # Retry on RequestException
+        reraise=True,  # Reraise the last exception after retries
+    )
+    def _get_token_page(self, min_volume: int, offset: int) -> dict:
+        params = {
+            "sort_by": "volume_24h_usd",
+            "sort_type": "desc",
+            "min_volume_24h_usd": min_volume,
+            "offset": offset,
+            "limit": 100,
+        }
+        url = "{b}/defi/v3/token/list".format(b=self.base_url)
+        response = self.http.get("birdeye", url, headers=self.headers, params=params)
 
-            logger.info(
-                "{i} of {l} Checking {t}: {s} {a}".format(
-                    i=i, l=len(results), t=token.symbol, s=token.name, a=token.mint_address
-                )
+        # Check if the request was successful
+        if response.status_code != 200:
+            logger.info("Response failed : {e}".format(e=response.text))
+            raise HTTPError("Token list returned {s}".format(s=response.status_code), response=response)
+        return json.loads(response.text)
+
+    def verify_token(
+        self, token: TokenData, check_pool: ThreadPoolExecutor, check_update_authority: bool = True
+    ) -> Optional[TokenData]:
+        """Run all checks for token concurrently, the first failing check cancels the others
+
+        verify_ownership and verify_security share one chain since security falls back on the
+        create_date found by ownership.
+
+        Args:
+            token (TokenData): token to verify
+            check_pool (ThreadPoolExecutor): pool the checks run on
+            check_update_authority (bool, optional): False when get_update_authority_verdicts already passed it.
+                Defaults to True.
+
+        Returns:
+            Optional[TokenData]: token with create_date, market and dex populated, None if a check failed
+        """
+        with self.tracer.span("verify_token", mint=token.mint_address, symbol=token.symbol) as span:
+            is_valid = self._verify_token(
+                token=token, check_pool=check_pool, check_update_authority=check_update_authority
             )
-            if not self.verify_security(token=token):
-                continue
+            span.set(is_valid=is_valid)
+        if not is_valid:
+            return None
+        token.verified_date = datetime.now(timezone.utc)
+        return token
 
-            token, is_valid = self.verify_market(token=token)
-            if not is_valid:
-                logger.info("No Market passed for {x}: {a}".format(x=token.symbol, a=token.mint_address))
-                continue
+    def _verify_token(self, token: TokenData, check_pool: ThreadPoolExecutor, check_update_authority: bool) -> bool:
+        cancelled = threading.Event()
 
-            filtered_list.append(token)
+        def verify_creation() -> bool:
+            if not self.verify_ownership(token=token):
+                return False
+            if cancelled.is_set():
+                return False
+            logger.info("Checking {t}: {s} {a}".format(t=token.symbol, s=token.name, a=token.mint_address))
+            return self.verify_security(token=token)
 
-        logger.info("Tokens returned: {t}".format(t=[x.symbol for x in filtered_list]))
+        def verify_market() -> bool:
+            _, is_valid = self.verify_market(token=token)
+            if not is_valid:
+                logger.info("No Market passed for {x}: {a}".format(x=token.symbol, a=token.mint_address))
+            return is_valid
+
+        checks = [verify_creation, verify_market]
+        if check_update_authority:
+            checks.insert(0, lambda: self.verify_update_authority(token=token))
+        run_check = self.tracer.wrap(self._run_check)
+        pending = {check_pool.submit(run_check, check=x, cancelled=cancelled) for x in checks}
+        is_valid = True
+        while pending and is_valid:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            try:
+                is_valid = all(self._check_passed(future=x) for x in done)
+            finally:
+                if not is_valid or any(x.exception() for x in done):
+                    cancelled.set()
+                    for future in pending:
+                        future.cancel()
+                    # Wait on checks already running so no thread keeps writing to token
+                    wait(pending)
+
+        return is_valid
+
+    @staticmethod
+    def _run_check(check: Callable[[], bool], cancelled: threading.Event) -> bool:
+        if cancelled.is_set():
+            return False
+        return check()
 
-        return filtered_list
+    @staticmethod
+    def _check_passed(future: Future) -> bool:
+        """Result of a finished check, exceptions are raised as they would be from a sequential check"""
+        if future.cancelled():
+            return False
+        return bool(future.result())
 
-    @retry(
-        stop=stop_after_attempt(3),  # Retry 3 times
-        wait=wait_fixed(2),  # Wait 2 seconds between retries
-        retry=retry_if_exception_type((RequestException, HTTPError, SSLError)),  # Retry on RequestException
-        reraise=True,  # Reraise the last exception after retries
-    )
     def verify_update_authority(self, token: TokenData) -> bool:
         """Verify basic details such as ownership and create date
 
@@ -138,34 +316,129 @@ class TokenVolumes:
         Returns:
             bool: _description_
         """
+        return self._cached_check(token=token, check="update_authority", fetch=self._fetch_update_authority)
+
+    @retry(
+        stop=stop_after_attempt(3),  # Retry 3 times
+        wait=wait_fixed(2),  # Wait 2 seconds between retries
+        retry=retry_if_exception_type((RequestException, HTTPError, SSLError)),  # Retry on RequestException
+        reraise=True,  # Reraise the last exception after retries
+    )
+    def _fetch_update_authority(self, token: TokenData) -> Tuple[bool, Optional[timedelta]]:
+        """verify_update_authority without the cache, returns (is_valid, time to cache the result for)"""
+        payload = {"jsonrpc": "2.0", "id": "get-asset", "method": "getAsset", "params": {"id": token.mint_address}}
         try:
-            response = self.Helius.get_asset(id=token.mint_address)
+            response = self.http.post("helius", self.RPC_ENDPOINT, json=payload)
         except Exception as e:
             logger.info("Error getting token accounts: {e}".format(e=e))
             raise
 
+        if response.status_code != 200:
+            logger.error("Response failed : {e}".format(e=response.text))
+            return True, None
+
+        response_json = json.loads(response.text)
         expected_keys = sorted(["jsonrpc", "result", "id"])
-        response_keys = sorted(response.keys())
+        response_keys = sorted(response_json.keys())
 
         if expected_keys != response_keys:
-            return True
+            return True, None
 
-        results = response.get("result")
-        if results is None:
-            return True
+        return self._is_valid_update_authority(mint=token.mint_address, asset=response_json.get("result"))
 
-        authorities = results.get("authorities")
+    def get_update_authority_verdicts(self, tokens: List[TokenData]) -> Dict[str, bool]:
+        """verify_update_authority for many tokens with getAssetBatch, cached verdicts are used first
+
+        Args:
+            tokens (List[TokenData]): tokens to check
+
+        Returns:
+            Dict[str, bool]: is_valid keyed by mint address, mints whose batch failed are left out
+        """
+        verdicts = dict()
+        to_fetch = list()
+        for mint in dict.fromkeys(x.mint_address for x in tokens):
+            verdict = None
+            if self.VerificationCache:
+                verdict = self.VerificationCache.get(mint=mint, check="update_authority")
+            if verdict is not None:
+                verdicts[mint] = verdict.passed
+            else:
+                to_fetch.append(mint)
+
+        for i in range(0, len(to_fetch), self.asset_batch_size):
+            end = i + self.asset_batch_size
+            mints = to_fetch[i:end]
+            try:
+                assets = self._get_asset_batch(mints=mints)
+            except Exception as e:
+                logger.info("Error getting asset batch: {e}".format(e=e))
+                continue
+            if assets is None:
+                continue
+
+            for mint, asset in zip(mints, assets):
+                is_valid, ttl = self._is_valid_update_authority(mint=mint, asset=asset)
+                verdicts[mint] = is_valid
+                if self.VerificationCache and ttl is not None:
+                    self.VerificationCache.put(
+                        verdict=VerdictData(
+                            mint_address=mint,
+                            check="update_authority",
+                            passed=is_valid,
+                            expires_at=datetime.now(timezone.utc) + ttl,
+                        )
+                    )
+
+        logger.info("Update authority verdicts: {a} of {b}".format(a=len(verdicts), b=len(tokens)))
+        return verdicts
+
+    @retry(
+        stop=stop_after_attempt(3),  # Retry 3 times
+        wait=wait_fixed(2),  # Wait 2 seconds between retries
+        retry=retry_if_exception_type((RequestException, HTTPError, SSLError)),  # Retry on RequestException
+        reraise=True,  # Reraise the last exception after retries
+    )
+    def _get_asset_batch(self, mints: List[str]) -> Optional[List[Optional[dict]]]:
+        """getAssetBatch for mints, assets are returned in the order of mints, None if the response is not valid"""
+        payload = {"jsonrpc": "2.0", "id": "get-asset-batch", "method": "getAssetBatch", "params": {"ids": mints}}
+        response = self.http.post("helius", self.RPC_ENDPOINT, json=payload)
+        if response.status_code != 200:
+            logger.error("Response failed : {e}".format(e=response.text))
+            return None
+
+        response_json = json.loads(response.text)
+        assets = response_json.get("result")
+        if not isinstance(assets, list) or len(assets) != len(mints):
+            logger.error("Response not valid : {e}".format(e=response_json.get("error")))
+            return None
+        return assets
+
+    def _is_valid_update_authority(self, mint: str, asset: Optional[dict]) -> Tuple[bool, Optional[timedelta]]:
+        """Update authority rule shared by the single and batched lookups
+
+        Args:
+            mint (str): mint address of the asset
+            asset (Optional[dict]): getAsset result
+
+        Returns:
+            Tuple[bool, Optional[timedelta]]: is_valid and the time to cache it for, None when there was no asset
+        """
+        if asset is None:
+            return True, None
+
+        authorities = asset.get("authorities")
         if authorities and len(authorities) != 1:
-            logger.info("Len update authority > 1 {b} {a}".format(b=token.mint_address, a=authorities))
-            return False
+            logger.info("Len update authority > 1 {b} {a}".format(b=mint, a=authorities))
+            return False, self.static_ttl
 
         if not authorities:
-            return True
+            return True, self.static_ttl
 
         update_authority = authorities[0].get("address")
         scope_authority = authorities[0].get("scopes")
         if update_authority is None or scope_authority is None:
-            return True
+            return True, self.static_ttl
 
         if (
             update_authority
@@ -177,16 +450,10 @@ class TokenVolumes:
             and scope_authority
             and "full" in scope_authority
         ):
-            return True
+            return True, self.static_ttl
         else:
-            return False
+            return False, self.static_ttl
 
-    @retry(
-        stop=stop_after_attempt(3),  # Retry 3 times
-        wait=wait_fixed(2),  # Wait 2 seconds between retries
-        retry=retry_if_exception_type((RequestException, HTTPError, SSLError)),  # Retry on RequestException
-        reraise=True,  # Reraise the last exception after retries
-    )
     def verify_ownership(self, token: TokenData) -> bool:
         """Verify basic details such as ownership and create date
 
@@ -198,47 +465,50 @@ class TokenVolumes:
         Returns:
             bool: _description_
         """
+        return self._cached_check(token=token, check="ownership", fetch=self._fetch_ownership)
+
+    @retry(
+        stop=stop_after_attempt(3),  # Retry 3 times
+        wait=wait_fixed(2),  # Wait 2 seconds between retries
+        retry=retry_if_exception_type((RequestException, HTTPError, SSLError)),  # Retry on RequestException
+        reraise=True,  # Reraise the last exception after retries
+    )
+    def _fetch_ownership(self, token: TokenData) -> Tuple[bool, Optional[timedelta]]:
+        """verify_ownership without the cache, returns (is_valid, time to cache the result for)"""
         params = {"address": token.mint_address}
-        url = "https://public-api.birdeye.so/defi/token_creation_info"
+        url = "{b}/defi/token_creation_info".format(b=self.base_url)
 
-        response = requests.get(url, headers=self.headers, params=params)
-        sleep(0.2)
+        response = self.http.get("birdeye", url, headers=self.headers, params=params)
         # Check if the request was successful
         if response.status_code != 200:
             logger.error("Response failed : {e}".format(e=response.text))
-            return True
+            return True, None
 
         response_json = json.loads(response.text)
 
         if "data" not in response_json:
             logger.error("Response not valid : {e}".format(e=response_json))
-            return True
+            return True, None
 
         if response_json["data"] is None:
-            return True
+            return True, None
 
         owner = response_json["data"].get("owner")
         if owner is None or owner not in (
             "TSLvdd1pWpHVjahSpsvCXUbgwsL3JAcvokwaKt1eokM",
             "WLHv2UAZm6z4KyaaELi5pjdbJh6RESMva1Rnn8pJVVh",
         ):
-            return False
+            return False, self.static_ttl
 
         creation_unix_time = response_json["data"].get("blockUnixTime")
         create_date = datetime.fromtimestamp(creation_unix_time, tz=timezone.utc)
-        max_age = datetime.now(timezone.utc) - timedelta(days=14)
+        max_age = datetime.now(timezone.utc) - self.min_token_age
         if create_date > max_age:
-            return False
+            return False, create_date - max_age
         token.create_date = create_date
 
-        return True
+        return True, self.static_ttl
 
-    @retry(
-        stop=stop_after_attempt(3),  # Retry 3 times
-        wait=wait_fixed(2),  # Wait 2 seconds between retries
-        retry=retry_if_exception_type((RequestException, HTTPError, SSLError)),  # Retry on RequestException
-        reraise=True,  # Reraise the last exception after retries
-    )
     def verify_security(self, token: TokenData) -> bool:
         """_summary_redeploy
 
@@ -248,21 +518,30 @@ class TokenVolumes:
         Returns:
             bool: _description_
         """
+        return self._cached_check(token=token, check="security", fetch=self._fetch_security)
+
+    @retry(
+        stop=stop_after_attempt(3),  # Retry 3 times
+        wait=wait_fixed(2),  # Wait 2 seconds between retries
+        retry=retry_if_exception_type((RequestException, HTTPError, SSLError)),  # Retry on RequestException
+        reraise=True,  # Reraise the last exception after retries
+    )
+    def _fetch_security(self, token: TokenData) -> Tuple[bool, Optional[timedelta]]:
+        """verify_security without the cache, returns (is_valid, time to cache the result for)"""
         params = {"address": token.mint_address}
-        url = "https://public-api.birdeye.so/defi/token_security"
+        url = "{b}/defi/token_security".format(b=self.base_url)
 
-        response = requests.get(url, headers=self.headers, params=params)
-        sleep(0.5)
+        response = self.http.get("birdeye", url, headers=self.headers, params=params)
         # Check if the request was successful
         if response.status_code != 200:
             logger.error("Response failed : {e}".format(e=response.text))
-            return False
+            return False, None
 
         response_json = json.loads(response.text)
 
         if "data" not in response_json:
             logger.error("Response not valid : {e}".format(e=response_json))
-            return False
+            return False, None
 
         update_authority = response_json["data"].get("metaplexUpdateAuthority")
         if update_authority is None or update_authority not in (
@@ -270,34 +549,64 @@ class TokenVolumes:
             "WLHv2UAZm6z4KyaaELi5pjdbJh6RESMva1Rnn8pJVVh",
         ):
             logger.error("Update authority wrong value")
-            return False
+            return False, self.static_ttl
 
         creation_time = response_json["data"].get("creationTime")
         if creation_time:
-            max_age = datetime.now(timezone.utc) - timedelta(days=14)
+            max_age = datetime.now(timezone.utc) - self.min_token_age
             dt = datetime.fromtimestamp(creation_time, tz=timezone.utc)
             if not token.create_date:
                 token.create_date = dt
             if dt > max_age:
                 logger.error("Creation date not old enough")
-                return False
+                return False, dt - max_age
         elif token.create_date is None:
+            # Ownership leaves create_date unset when Birdeye did not answer, not cached so the next run retries
             logger.error("No creation date found")
-            return False
+            return False, None
 
         freezeable = response_json["data"].get("freezeable")
         if freezeable:
             logger.error("Freezable")
-            return False
+            return False, self.static_ttl
 
         top10_per = response_json["data"].get("top10HolderPercent")
         if top10_per:
             logger.info("top10 per = {x}".format(x=top10_per))
         if top10_per and top10_per > 0.5:
             logger.error("top10_per > 0.5")
-            return False
+            return False, self.holder_ttl
         logger.info("Passed security")
-        return True
+        return True, self.holder_ttl
+
+    def _cached_check(
+        self, token: TokenData, check: str, fetch: Callable[[TokenData], Tuple[bool, Optional[timedelta]]]
+    ) -> bool:
+        """Run fetch unless a verdict for token and check is cached, then cache its result
+
+        fetch returns (is_valid, ttl), a ttl of None marks a result that should not be cached,
+        e.g. when the provider did not answer.
+        """
+        if self.VerificationCache:
+            verdict = self.VerificationCache.get(mint=token.mint_address, check=check)
+            if verdict is not None:
+                if verdict.create_date and not token.create_date:
+                    token.create_date = verdict.create_date
+                return verdict.passed
+
+        is_valid, ttl = fetch(token=token)
+
+        if self.VerificationCache and ttl is not None and ttl > timedelta(0):
+            self.VerificationCache.put(
+                verdict=VerdictData(
+                    mint_address=token.mint_address,
+                    check=check,
+                    passed=is_valid,
+                    expires_at=datetime.now(timezone.utc) + ttl,
+                    create_date=token.create_date,
+                )
+            )
+        return is_valid
 
     def verify_market(self, token: TokenData, min_liquidity: int = 100000) -> Tuple[TokenData, bool]:
         """_summary_
@@ -318,9 +627,8 @@ class TokenVolumes:
             "offset": 0,
             "limit": 10,
         }
-        url = "https://public-api.birdeye.so/defi/v2/markets"
-        response = requests.get(url, headers=self.headers, params=params)
-        sleep(0.5)
+        url = "{b}/defi/v2/markets".format(b=self.base_url)
+        response = self.http.get("birdeye", url, headers=self.headers, params=params)
         # Check if the request was successful
         if response.status_code != 200:
             logger.error("Response failed : {e}".format(e=response.text))
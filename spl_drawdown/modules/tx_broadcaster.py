@@ -0,0 +1,146 @@
+import base64
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional
+
+from requests.exceptions import RequestException
+from solders.signature import Signature
+from solders.transaction import VersionedTransaction
+
+from spl_drawdown.utils.http_client import HttpClient, get_http_client
+from spl_drawdown.utils.log import get_logger
+
+logger = get_logger()
+
+
+class TransactionBroadcaster:
+    def __init__(self, endpoints: List[str], http: Optional[HttpClient] = None, timeout_seconds: float = 10.0):
+        """Sends the same signed transaction to a pool of rpc endpoints
+
+        The first endpoint, the primary one, runs the preflight simulation. The others are only sent to once
+        the primary accepted the transaction, and skip preflight, so a transaction the simulation rejects is
+        not paid for elsewhere. When the primary does not answer, the others are sent to with preflight.
+        A broadcast returns the signature once sent, the buy succeeds when ConfirmationTracker confirms it.
+
+        Accept latency is recorded per endpoint from its own send. getSignatureStatuses does not tell which
+        endpoint got the transaction to the leader, so landing latency (first send to confirmation, see
+        record_landing) is only known per transaction, not per endpoint.
+
+        Args:
+            endpoints (List[str]): rpc urls, the first one runs the preflight simulation
+            http (HttpClient, optional): Defaults to the shared client.
+            timeout_seconds (float, optional): timeout of one sendTransaction call. Defaults to 10.0.
+        """
+        self.endpoints = list(dict.fromkeys(endpoints))
+        self.http = http or get_http_client()
+        self.timeout_seconds = timeout_seconds
+        self.stats: Dict[str, Dict[str, float]] = {
+            x: {"sent": 0, "failed": 0, "latency_seconds": 0.0} for x in self.endpoints
+        }
+        self.landed = 0
+        self.landing_seconds = 0.0
+        # signature -> time of its first send
+        self._in_flight: Dict[Signature, float] = dict()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, len(self.endpoints)), thread_name_prefix="broadcast")
+        self._lock = threading.Lock()
+
+    def broadcast(self, signed_tx: VersionedTransaction) -> Signature:
+        """Send signed_tx to the primary endpoint, then to the others, and return its signature
+
+        Raises:
+            Exception: the primary rejected the transaction, or it did not answer and no other endpoint accepted it
+        """
+        encoded = base64.b64encode(bytes(signed_tx)).decode("utf-8")
+        signature = signed_tx.signatures[0]
+        primary, others = self.endpoints[0], self.endpoints[1:]
+        start = time.monotonic()
+        try:
+            self._send(endpoint=primary, encoded=encoded, skip_preflight=False)
+        except RequestException as e:
+            if not others:
+                raise
+            # Nothing was simulated, every other endpoint runs its own preflight
+            logger.info("Primary endpoint failed, sending with preflight to the others: {e}".format(e=e))
+            self._send_to_any(endpoints=others, encoded=encoded)
+        except Exception as e:
+            raise Exception("Transaction rejected by {u}: {e}".format(u=self._short_url(primary), e=e))
+        else:
+            # Sent in the background, the primary already accepted the transaction
+            for endpoint in others:
+                self._executor.submit(self._send, endpoint=endpoint, encoded=encoded, skip_preflight=True)
+
+        with self._lock:
+            self._in_flight[signature] = start
+        return signature
+
+    def _send_to_any(self, endpoints: List[str], encoded: str):
+        """Send to endpoints with preflight and return once one accepted, the others keep sending"""
+        pending = {
+            self._executor.submit(self._send, endpoint=x, encoded=encoded, skip_preflight=False): x for x in endpoints
+        }
+        errors = list()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                endpoint = pending.pop(future)
+                try:
+                    future.result()
+                except Exception as e:
+                    errors.append("{u}: {e}".format(u=self._short_url(endpoint), e=e))
+                    continue
+                logger.info("Transaction accepted by {u}".format(u=self._short_url(endpoint)))
+                return
+        raise Exception("Transaction rejected by every endpoint: {e}".format(e=errors))
+
+    def record_landing(self, signature: Signature, is_confirmed: bool):
+        """ConfirmationTracker callback, records the landing latency of a broadcast transaction"""
+        with self._lock:
+            start = self._in_flight.pop(signature, None)
+            if start is None or not is_confirmed:
+                return
+            self.landed += 1
+            self.landing_seconds += time.monotonic() - start
+
+    def _send(self, endpoint: str, encoded: str, skip_preflight: bool) -> str:
+        payload = {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "sendTransaction",
+            # The node keeps rebroadcasting until the blockhash expires, maxRetries is left at its default
+            "params": [encoded, {"encoding": "base64", "skipPreflight": skip_preflight}],
+        }
+        start = time.monotonic()
+        try:
+            response = self.http.post("rpc", endpoint, json=payload, timeout=self.timeout_seconds)
+            response.raise_for_status()
+            response_json = response.json()
+            if "result" not in response_json:
+                raise Exception(response_json.get("error"))
+        except Exception:
+            with self._lock:
+                self.stats[endpoint]["failed"] += 1
+            raise
+        with self._lock:
+            self.stats[endpoint]["sent"] += 1
+            self.stats[endpoint]["latency_seconds"] += time.monotonic() - start
+        return response_json["result"]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per endpoint counts and mean accept latency, plus the landings and their mean latency"""
+        with self._lock:
+            return {
+                "landed": self.landed,
+                "mean_landing_seconds": self.landing_seconds / self.landed if self.landed else None,
+                "endpoints": {
+                    self._short_url(k): dict(
+                        v, mean_latency_seconds=v["latency_seconds"] / v["sent"] if v["sent"] else None
+                    )
+                    for k, v in self.stats.items()
+                },
+            }
+
+    @staticmethod
+    def _short_url(endpoint: str) -> str:
+        """Endpoint without its query string, which usually holds the api key"""
+        return endpoint.split("?")[0]
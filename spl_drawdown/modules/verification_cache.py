@@ -0,0 +1,83 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Optional
+
+from spl_drawdown.types.verdict_data import VerdictData
+from spl_drawdown.utils.log import get_logger
+
+logger = get_logger()
+
+
+class VerificationCache:
+    def __init__(self, path: str):
+        """On-disk cache of TokenVolumes check results keyed by mint + check
+
+        Passed and rejected results are both kept until their expires_at.
+
+        Args:
+            path (str): sqlite file, created if missing
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS verdicts (
+                    mint TEXT NOT NULL,
+                    check_name TEXT NOT NULL,
+                    passed INTEGER NOT NULL,
+                    expires_at INTEGER NOT NULL,
+                    create_date INTEGER,
+                    PRIMARY KEY (mint, check_name)
+                )
+                """)
+
+    def get(self, mint: str, check: str) -> Optional[VerdictData]:
+        """Cached verdict, None if missing or expired"""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT passed, expires_at, create_date FROM verdicts WHERE mint = ? AND check_name = ?",
+                (mint, check),
+            ).fetchone()
+        if row is None:
+            return None
+
+        expires_at = datetime.fromtimestamp(row[1], tz=timezone.utc)
+        if expires_at <= datetime.now(timezone.utc):
+            return None
+
+        return VerdictData(
+            mint_address=mint,
+            check=check,
+            passed=bool(row[0]),
+            expires_at=expires_at,
+            create_date=datetime.fromtimestamp(row[2], tz=timezone.utc) if row[2] is not None else None,
+        )
+
+    def put(self, verdict: VerdictData):
+        create_date = int(verdict.create_date.timestamp()) if verdict.create_date else None
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO verdicts VALUES (?, ?, ?, ?, ?)",
+                (
+                    verdict.mint_address,
+                    verdict.check,
+                    int(verdict.passed),
+                    int(verdict.expires_at.timestamp()),
+                    create_date,
+                ),
+            )
+
+    def prune(self):
+        """Remove expired verdicts"""
+        now = int(datetime.now(timezone.utc).timestamp())
+        with self._lock, self._connection:
+            deleted = self._connection.execute("DELETE FROM verdicts WHERE expires_at <= ?", (now,)).rowcount
+        if deleted:
+            logger.info("Pruned {i} expired verdicts".format(i=deleted))
@@ -1,25 +1,26 @@
 from time import sleep
 from typing import List
 
-from heliuspy import HeliusAPI
-from solana.rpc.api import Client
-
 from spl_drawdown.types.holdings_data import HoldingData
+from spl_drawdown.utils.http_client import get_http_client
 from spl_drawdown.utils.log import get_logger
+from spl_drawdown.utils.rpc_client import get_rpc_client
 
 logger = get_logger()
 
 
 class Wallet:
-    def __init__(self, HELIUS_API_KEY: str, BIRDEYE_API_TOKEN: str):
+    def __init__(
+        self, HELIUS_API_KEY: str, BIRDEYE_API_TOKEN: str, helius_rpc_url: str = "https://mainnet.helius-rpc.com"
+    ):
         # Configuration
-        self.RPC_ENDPOINT = f"https://mainnet.helius-rpc.com/?api-key={HELIUS_API_KEY}"
+        self.RPC_ENDPOINT = f"{helius_rpc_url}/?api-key={HELIUS_API_KEY}"
         self.BIRDEYE_API_TOKEN = BIRDEYE_API_TOKEN
-        self.Helius = HeliusAPI(api_key=HELIUS_API_KEY)
+        self.http = get_http_client()
         self.COMMITMENT = "confirmed"  # Commitment level for RPC calls
-        # Initialize Solana client
+        # Initialize Solana client, on the pooled session
         try:
-            self.client = Client(self.RPC_ENDPOINT, commitment=self.COMMITMENT)
+            self.client = get_rpc_client(endpoint=self.RPC_ENDPOINT, commitment=self.COMMITMENT, http=self.http)
         except Exception as e:
             raise Exception(f"Failed to connect to Helius RPC: {e}")
 
@@ -40,13 +41,19 @@ class Wallet:
             "3MnqzEH6JrWeHL1MmZPSr81i9Tto7mbuctH5Hvv1pump",
             "8Pg897t8NFe9sxGWsnAfnxP6NPu1ACUsgedSBacHpump",
         ]
+        payload = {
+            "jsonrpc": "2.0",
+            "id": "get-token-accounts",
+            "method": "getTokenAccounts",
+            "params": {
+                "owner": pub_key,
+                "displayOptions": {"showZeroBalance": False},
+                "page": 1,
+                "limit": 100,  # Adjust limit as needed
+            },
+        }
         try:
-            token_accounts = self.Helius.get_token_accounts(
-                owner=pub_key,
-                displayOptions={"showZeroBalance": False},
-                page=1,
-                limit=100,  # Adjust limit as needed
-            )
+            token_accounts = self.http.post("helius", self.RPC_ENDPOINT, json=payload).json()
         except Exception as e:
             logger.info("Error getting token accounts: {e}".format(e=e))
             sleep(2)
@@ -0,0 +1,69 @@
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Set
+
+from spl_drawdown.modules.swap import Swapper
+from spl_drawdown.modules.wallet_info import Wallet
+from spl_drawdown.types.wallet_data import WalletInfo
+from spl_drawdown.utils.log import get_logger
+
+logger = get_logger()
+
+
+class WalletState:
+    def __init__(self, wallet: WalletInfo, Swap: Swapper, W: Wallet, resync_seconds: float = 300):
+        """Balance and holdings of a wallet, loaded from rpc once and then kept up to date locally
+
+        Sent buys debit the SOL spent and confirmed buys add the mint. The snapshot is reloaded after a failed buy
+        or once it is older than resync_seconds, which also picks up fees and sells made elsewhere.
+
+        Args:
+            wallet (WalletInfo): wallet to track
+            Swap (Swapper): used for the balance and to buy with this wallet
+            W (Wallet): used for the holdings
+            resync_seconds (float, optional): max age of the snapshot. Defaults to 300.
+        """
+        self.wallet = wallet
+        self.Swap = Swap
+        self.W = W
+        self.resync_interval = timedelta(seconds=resync_seconds)
+        self.balance_sol: float = 0.0
+        self.holdings: Set[str] = set()
+        self.synced_at: Optional[datetime] = None
+        self._lock = threading.Lock()
+
+    def sync(self):
+        """Reload balance and holdings from rpc"""
+        balance_sol = self.Swap.get_balance_with_retry(pubkey=self.wallet.key_pair.pubkey()) / 1e9
+        holdings = {x.mint for x in self.W.get_token_accounts(pub_key=self.wallet.public_key)}
+        with self._lock:
+            self.balance_sol = balance_sol
+            self.holdings = holdings
+            self.synced_at = datetime.now(timezone.utc)
+        logger.info("Wallet {w} balance: {b} SOL".format(w=self.wallet.public_key, b=balance_sol))
+        logger.info("Holding Tokens: {l}".format(l=sorted(holdings)))
+
+    def sync_if_stale(self):
+        if self.synced_at is None or datetime.now(timezone.utc) - self.synced_at > self.resync_interval:
+            self.sync()
+
+    def mark_stale(self):
+        """Reload on the next sync_if_stale"""
+        with self._lock:
+            self.synced_at = None
+
+    def record_spend(self, amount_sol: float):
+        with self._lock:
+            self.balance_sol -= amount_sol
+
+    def add_holding(self, mint_address: str):
+        with self._lock:
+            self.holdings.add(mint_address)
+
+    def holds(self, mint_address: str) -> bool:
+        with self._lock:
+            return mint_address in self.holdings
+
+    def get_holdings(self) -> Set[str]:
+        with self._lock:
+            return set(self.holdings)
@@ -0,0 +1,65 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from spl_drawdown.types.screen_params import ScreenParams
+
+
+@dataclass
+class BacktestTrade:
+    mint_address: str
+    screened_at: datetime
+    entry_time: datetime
+    entry_price_usd: float
+    ath_price_usd: float
+    drawdown_percent: float
+    # horizon hours -> return from the entry price, None if the data ends before the horizon
+    returns: Dict[int, Optional[float]] = field(default_factory=dict)
+    max_return: Optional[float] = None
+
+    def __str__(self):
+        parts = []
+        parts.append(f"mint_address: {self.mint_address}")
+        parts.append(f"entry_time: {self.entry_time.strftime('%Y-%m-%d %H:%M:%S')}")
+        parts.append(f"entry_price_usd: {self.entry_price_usd:.8f}")
+        parts.append(f"ath_price_usd: {self.ath_price_usd:.8f}")
+        for hours, value in self.returns.items():
+            parts.append(f"return_{hours}h: {value:.4f}" if value is not None else f"return_{hours}h: None")
+        return " - ".join(parts)
+
+
+@dataclass
+class BacktestResult:
+    params: ScreenParams
+    screens: int = 0
+    watched: int = 0
+    trades: List[BacktestTrade] = field(default_factory=list)
+
+    def get_returns(self, hours: int) -> List[float]:
+        return [x.returns[hours] for x in self.trades if x.returns.get(hours) is not None]
+
+    def get_mean_return(self, hours: int) -> Optional[float]:
+        returns = self.get_returns(hours=hours)
+        return sum(returns) / len(returns) if returns else None
+
+    def get_win_rate(self, hours: int) -> Optional[float]:
+        returns = self.get_returns(hours=hours)
+        return sum(1 for x in returns if x > 0) / len(returns) if returns else None
+
+    def __str__(self):
+        parts = []
+        parts.append(str(self.params))
+        parts.append(f"screens: {self.screens}")
+        parts.append(f"watched: {self.watched}")
+        parts.append(f"trades: {len(self.trades)}")
+        horizons = sorted({k for x in self.trades for k in x.returns})
+        for hours in horizons:
+            mean_return = self.get_mean_return(hours=hours)
+            win_rate = self.get_win_rate(hours=hours)
+            parts.append(
+                f"mean_return_{hours}h: {mean_return:.4f}"
+                if mean_return is not None
+                else f"mean_return_{hours}h: None"
+            )
+            parts.append(f"win_rate_{hours}h: {win_rate:.2f}" if win_rate is not None else f"win_rate_{hours}h: None")
+        return " - ".join(parts)
@@ -2,7 +2,11 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import Optional
 
+from spl_drawdown.utils.memory import add_slots
 
+
+# Slotted, a year of hourly candles is ~8,760 of these per token
+@add_slots
 @dataclass
 class CandleData:
     time: Optional[datetime] = None
@@ -0,0 +1,20 @@
+from dataclasses import dataclass
+from datetime import datetime
+
+
+@dataclass
+class PreparedSwap:
+    mint_address: str
+    public_key: str
+    amount_lamports: int
+    quote: dict
+    swap_transaction: str
+    built_at: datetime
+
+    def __str__(self):
+        parts = []
+        parts.append(f"mint_address: {self.mint_address}")
+        parts.append(f"public_key: {self.public_key[-10:]}")
+        parts.append(f"amount_lamports: {self.amount_lamports}")
+        parts.append(f"built_at: {self.built_at.strftime('%Y-%m-%d %H:%M:%S')}")
+        return " - ".join(parts)
@@ -0,0 +1,24 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class ScreenParams:
+    candle_days: int = 365
+    min_candles: int = 14
+    min_ath_price_usd: float = 0.006
+    min_drawdown_percent: float = 0.7
+    dip_percent: float = 0.6
+    consecutive_closes: int = 3
+    min_volume_variation: float = 0.3
+    max_ath_gap_usd: float = 0.2
+    max_gap_price_usd: float = 0.1
+    min_price_usd: float = 0.001
+
+    def __str__(self):
+        parts = []
+        parts.append(f"min_ath_price_usd: {self.min_ath_price_usd}")
+        parts.append(f"min_drawdown_percent: {self.min_drawdown_percent}")
+        parts.append(f"dip_percent: {self.dip_percent}")
+        parts.append(f"consecutive_closes: {self.consecutive_closes}")
+        parts.append(f"min_volume_variation: {self.min_volume_variation}")
+        return " - ".join(parts)
@@ -1,10 +1,31 @@
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Optional, Sequence
 
 from spl_drawdown.types.candle_data import CandleData
+from spl_drawdown.utils.memory import add_slots
 
+# Labels of the printed fields are fixed, so their padding is worked out once per label
+_STR_LABEL_WIDTH = len("  drawdown_consecutive_days_start")
+_SHORT_STR_LABEL_WIDTH = len("  current_per_from_ath")
+_padded_labels = dict()
 
+
+def _align(header: str, fields: List[str], width: int) -> str:
+    """Block of header and "  label: value" fields with the colons lined up at width"""
+    final_parts = ["\n--", header]
+    for each in fields:
+        label, value = each.split(":", 1)
+        padded = _padded_labels.get((label, width))
+        if padded is None:
+            padded = _padded_labels[(label, width)] = label.ljust(width)
+        final_parts.append(padded + ":" + value)
+    final_parts.append("--\n")
+    # Join all parts with newlines
+    return "\n".join(final_parts)
+
+
+@add_slots
 @dataclass
 class TokenData:
     name: Optional[str] = None
@@ -21,10 +42,13 @@ class TokenData:
     drawdown_price_time: Optional[datetime] = None
     drawdown_percent: Optional[float] = None
     drawdown_consecutive_days_start: Optional[datetime] = None
-    candle_data: List[CandleData] = field(default_factory=list)
+    # A CandleSeries once fetched, it reads like a list of CandleData
+    candle_data: Optional[Sequence[CandleData]] = field(default_factory=list)
     current_price_usd: Optional[float] = None
     current_price_time: Optional[datetime] = None
     current_per_from_ath: Optional[float] = None
+    # When the token last passed TokenVolumes.verify_token
+    verified_date: Optional[datetime] = None
 
     def __str__(self):
         parts = []
@@ -71,16 +95,7 @@ class TokenData:
         parts.append(f"  current_price_usd: {current_price_usd}")
         parts.append(f"  current_price_time: {current_price_time}")
 
-        max_colon = max([text.find(":") for text in parts[1:]])
-
-        final_parts = ["\n--", parts[0]]
-        for each in parts[1:]:
-            colon_placement = each.find(":")
-            new_string = each[:colon_placement] + (" " * (max_colon - colon_placement)) + each[colon_placement:]
-            final_parts.append(new_string)
-        final_parts.append("--\n")
-        # Join all parts with newlines
-        return "\n".join(final_parts)
+        return _align(header=parts[0], fields=parts[1:], width=_STR_LABEL_WIDTH)
 
     def __short_str__(self):
         parts = []
@@ -103,13 +118,4 @@ class TokenData:
         parts.append(f"  current_price_usd: {current_price_usd}")
         parts.append(f"  current_price_time: {current_price_time}")
         parts.append(f"  current_per_from_ath: {current_per_from_ath}")
-        max_colon = max([text.find(":") for text in parts[1:]])
-
-        final_parts = ["\n--", parts[0]]
-        for each in parts[1:]:
-            colon_placement = each.find(":")
-            new_string = each[:colon_placement] + (" " * (max_colon - colon_placement)) + each[colon_placement:]
-            final_parts.append(new_string)
-        final_parts.append("--\n")
-        # Join all parts with newlines
-        return "\n".join(final_parts)
+        return _align(header=parts[0], fields=parts[1:], width=_SHORT_STR_LABEL_WIDTH)
@@ -0,0 +1,20 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+
+@dataclass
+class VerdictData:
+    mint_address: str
+    check: str
+    passed: bool
+    expires_at: datetime
+    create_date: Optional[datetime] = None
+
+    def __str__(self):
+        parts = []
+        parts.append(f"mint_address: {self.mint_address}")
+        parts.append(f"check: {self.check}")
+        parts.append(f"passed: {self.passed}")
+        parts.append(f"expires_at: {self.expires_at.strftime('%Y-%m-%d %H:%M:%S')}")
+        return " - ".join(parts)
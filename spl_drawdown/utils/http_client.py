@@ -0,0 +1,161 @@
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from spl_drawdown.utils.metrics import get_metrics
+from spl_drawdown.utils.tracing import get_tracer
+
+
+def get_endpoint(url: str, body: Any = None) -> str:
+    """Name a request is measured under, the JSON-RPC method or else the url path"""
+    if isinstance(body, list) and body:
+        body = body[0]
+    if isinstance(body, dict) and "method" in body:
+        return str(body["method"])
+    return urlsplit(url).path or "/"
+
+
+class RateLimiter:
+    def __init__(self, requests_per_second: float, burst: Optional[float] = None):
+        """Token bucket shared by every caller of one provider
+
+        Callers that find the bucket empty reserve the next token and wait for it,
+        so requests go out at exactly requests_per_second once the burst is spent.
+
+        Args:
+            requests_per_second (float): sustained rate
+            burst (float, optional): bucket size. Defaults to one second worth of requests.
+        """
+        self.requests_per_second = requests_per_second
+        self.capacity = burst if burst is not None else max(1.0, requests_per_second)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token and return how many seconds to wait before using it"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.requests_per_second)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.requests_per_second
+
+    def acquire(self):
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class HttpClient:
+    def __init__(self, timeout: Tuple[float, float] = (5.0, 30.0), pool_maxsize: int = 32):
+        """Pooled keep-alive session with per provider rate limits
+
+        Args:
+            timeout (Tuple[float, float], optional): (connect, read) seconds. Defaults to (5.0, 30.0).
+            pool_maxsize (int, optional): connections kept per host. Defaults to 32.
+        """
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.rate_limiters: Dict[str, RateLimiter] = dict()
+        self.metrics = get_metrics()
+        self.metrics.describe(name="http_request_seconds", help_text="Provider request latency per endpoint")
+        self.metrics.describe(name="http_requests_total", help_text="Provider requests per endpoint")
+        self.metrics.describe(name="http_errors_total", help_text="Provider requests that raised or returned >= 400")
+        self.tracer = get_tracer()
+
+    def set_rate_limit(self, provider: str, requests_per_second: float, burst: Optional[float] = None):
+        """Limit provider to requests_per_second, a value <= 0 removes the limit"""
+        if requests_per_second and requests_per_second > 0:
+            self.rate_limiters[provider] = RateLimiter(requests_per_second=requests_per_second, burst=burst)
+        else:
+            self.rate_limiters.pop(provider, None)
+
+    def limit(self, provider: str):
+        """Block until provider allows another request, for calls made outside this client"""
+        rate_limiter = self.rate_limiters.get(provider)
+        if rate_limiter:
+            rate_limiter.acquire()
+
+    async def limit_async(self, provider: str):
+        rate_limiter = self.rate_limiters.get(provider)
+        if rate_limiter:
+            await rate_limiter.acquire_async()
+
+    @contextmanager
+    def track(self, provider: str, endpoint: str, **attributes) -> Iterator[Any]:
+        """Record latency, request and error counts of the block, for calls made outside this client
+
+        The block also runs in a trace span named after provider and endpoint, attributes such as mint
+        are added to it.
+        """
+        start = time.perf_counter()
+        failed = True
+        try:
+            with self.tracer.span(
+                "{p} {e}".format(p=provider, e=endpoint), provider=provider, endpoint=endpoint, **attributes
+            ) as span:
+                yield span
+            failed = False
+        finally:
+            self.metrics.observe(
+                "http_request_seconds", time.perf_counter() - start, provider=provider, endpoint=endpoint
+            )
+            self.metrics.inc("http_requests_total", provider=provider, endpoint=endpoint)
+            if failed:
+                self.metrics.inc("http_errors_total", provider=provider, endpoint=endpoint)
+
+    def request(self, method: str, provider: str, url: str, **kwargs) -> requests.Response:
+        self.limit(provider)
+        kwargs.setdefault("timeout", self.timeout)
+        endpoint = get_endpoint(url=url, body=kwargs.get("json"))
+        attributes = dict()
+        params = kwargs.get("params")
+        if isinstance(params, dict) and "address" in params:
+            attributes["mint"] = params["address"]
+        with self.track(provider=provider, endpoint=endpoint, **attributes) as span:
+            response = self.session.request(method, url, **kwargs)
+            span.set(status=response.status_code)
+        if response.status_code >= 400:
+            self.metrics.inc("http_errors_total", provider=provider, endpoint=endpoint)
+        return response
+
+    def get(self, provider: str, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", provider, url, **kwargs)
+
+    def post(self, provider: str, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", provider, url, **kwargs)
+
+
+_http_client = None
+_http_client_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """
+    Returns the process wide HttpClient, created on first use.
+
+    Returns:
+        HttpClient: shared client instance.
+    """
+    global _http_client
+    with _http_client_lock:
+        if _http_client is None:
+            _http_client = HttpClient()
+    return _http_client
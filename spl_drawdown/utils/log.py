@@ -1,12 +1,137 @@
+import atexit
+import json
 import logging
+import os
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Callable, Dict, Optional, Tuple
 
+# Read straight from the environment since every module creates its logger on import, before settings
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_QUEUE = os.environ.get("LOG_QUEUE", "true").lower() == "true"
+LOG_JSON = os.environ.get("LOG_JSON", "false").lower() == "true"
+LOG_RATE_LIMIT = int(os.environ.get("LOG_RATE_LIMIT", 0))
+LOG_RATE_LIMIT_SECONDS = float(os.environ.get("LOG_RATE_LIMIT_SECONDS", 10))
 
-def get_logger(name: str = "spl-drawdown") -> logging.Logger:
+_listeners = list()
+
+
+class LazyMessage:
+    def __init__(self, func: Callable[..., str], *args, **kwargs):
+        """Message built by func(*args, **kwargs) only when a handler formats it
+
+        logger.info(LazyMessage("{a} of {b}".format, a=i, b=n)) costs nothing when info is disabled, and with
+        the queue handler it is the only message built on the writer thread. That happens after the log call
+        returns, so pass values rather than objects another thread may still change, or the line can show the
+        later state.
+        """
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+
+    def __str__(self) -> str:
+        return self.func(*self.args, **self.kwargs)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """QueueHandler that leaves building LazyMessage to the listener thread
+
+    The stock handler formats every record on the calling thread before queueing it. Records stay in
+    this process, so they are queued as they are and the background writer adds the time and layout.
+    Other messages are turned into their string here, a logged TokenData or %-style args could
+    otherwise change before the writer gets to them.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if not isinstance(record.msg, LazyMessage) and (record.args or not isinstance(record.msg, str)):
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, for log collectors that parse structured output"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "module": record.module,
+            "function": record.funcName,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    def __init__(self, rate: int, per_seconds: float = 10.0, max_level: int = logging.INFO):
+        """Let at most rate records per call site through every per_seconds
+
+        Call sites are keyed by file and line since messages are built with str.format. The first record
+        after a window with drops reports how many were dropped. Records above max_level always pass.
+
+        Args:
+            rate (int): records per call site per window
+            per_seconds (float, optional): window length. Defaults to 10.0.
+            max_level (int, optional): highest level that is rate limited. Defaults to logging.INFO.
+        """
+        super().__init__()
+        self.rate = rate
+        self.per_seconds = per_seconds
+        self.max_level = max_level
+        # (window start, records in window, records dropped) per call site
+        self._windows: Dict[Tuple[str, int], list] = dict()
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > self.max_level:
+            return True
+        key = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.per_seconds:
+                dropped = window[2] if window else 0
+                self._windows[key] = [now, 1, 0]
+            elif window[1] < self.rate:
+                window[1] += 1
+                return True
+            else:
+                window[2] += 1
+                return False
+        if dropped:
+            record.msg = "{m} ({d} similar messages dropped)".format(m=record.getMessage(), d=dropped)
+            record.args = None
+        return True
+
+
+def get_logger(
+    name: str = "spl-drawdown",
+    level: Optional[str] = None,
+    use_queue: Optional[bool] = None,
+    json_output: Optional[bool] = None,
+    rate_limit: Optional[int] = None,
+) -> logging.Logger:
     """
     Creates and configures a custom logger with the specified name.
 
+    Records are handed to a queue and written by a background thread, so the calling thread only pays
+    for building the record and its message string. A LazyMessage is built on the writer thread, and no
+    message is built when the level is disabled. Options default to the LOG_* environment variables
+    and only apply when the logger is first configured.
+
     Args:
         name (str): Name of the logger (default: 'spl-drawdown').
+        level (str, optional): log level. Defaults to LOG_LEVEL, INFO.
+        use_queue (bool, optional): write from a background thread. Defaults to LOG_QUEUE, true.
+        json_output (bool, optional): one JSON object per record. Defaults to LOG_JSON, false.
+        rate_limit (int, optional): records per call site per LOG_RATE_LIMIT_SECONDS, 0 for no limit.
+            Defaults to LOG_RATE_LIMIT, 0.
 
     Returns:
         logging.Logger: Configured logger instance.
@@ -18,22 +143,41 @@ def get_logger(name: str = "spl-drawdown") -> logging.Logger:
     if logger.hasHandlers():
         return logger
 
+    level = level or LOG_LEVEL
+    use_queue = LOG_QUEUE if use_queue is None else use_queue
+    json_output = LOG_JSON if json_output is None else json_output
+    rate_limit = LOG_RATE_LIMIT if rate_limit is None else rate_limit
+
     # Set default log level
-    logger.setLevel(logging.INFO)
+    logger.setLevel(level)
 
     # Formatter for console
-    console_formatter = logging.Formatter(
-        fmt="%(asctime)s - %(module)s - %(funcName)s - %(message)s",
-        # datefmt="%Y-%m-%d %H:%M:%S.%f",  # Use decimal for milliseconds
-    )
+    if json_output:
+        console_formatter = JsonFormatter()
+    else:
+        console_formatter = logging.Formatter(
+            fmt="%(asctime)s - %(module)s - %(funcName)s - %(message)s",
+            # datefmt="%Y-%m-%d %H:%M:%S.%f",  # Use decimal for milliseconds
+        )
 
     # Console handler
     console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
+    console_handler.setLevel(level)
     console_handler.setFormatter(console_formatter)
 
     # Add handlers to logger
-    logger.addHandler(console_handler)
+    if use_queue:
+        log_queue = queue.SimpleQueue()
+        listener = QueueListener(log_queue, console_handler, respect_handler_level=True)
+        listener.start()
+        _listeners.append(listener)
+        logger.addHandler(DeferredQueueHandler(log_queue))
+    else:
+        logger.addHandler(console_handler)
+
+    # Dropped before a record is queued
+    if rate_limit and rate_limit > 0:
+        logger.addFilter(RateLimitFilter(rate=rate_limit, per_seconds=LOG_RATE_LIMIT_SECONDS))
 
     # Prevent propagation to root logger to avoid duplicate logs
     logger.propagate = False
@@ -41,6 +185,14 @@ def get_logger(name: str = "spl-drawdown") -> logging.Logger:
     return logger
 
 
+@atexit.register
+def _stop_listeners():
+    """Write out queued records before the interpreter exits"""
+    for listener in _listeners:
+        listener.stop()
+    _listeners.clear()
+
+
 # Example usage (for testing)
 if __name__ == "__main__":
     logger = get_logger()
@@ -0,0 +1,63 @@
+import sys
+from dataclasses import fields
+from typing import Any, Optional, Set
+
+import numpy as np
+
+
+def add_slots(cls: type) -> type:
+    """Rebuild a dataclass with __slots__, for Python versions without dataclass(slots=True)
+
+    Instances drop their __dict__, which saves about 100 bytes per object and speeds up attribute access.
+    Defaults stay on the generated __init__, so attributes keep the same names and defaults.
+
+    Args:
+        cls (type): class decorated with @dataclass
+
+    Returns:
+        type: the same class with __slots__
+    """
+    field_names = tuple(x.name for x in fields(cls))
+    namespace = dict(cls.__dict__)
+    namespace["__slots__"] = field_names
+    for name in field_names:
+        namespace.pop(name, None)
+    namespace.pop("__dict__", None)
+    namespace.pop("__weakref__", None)
+    return type(cls)(cls.__name__, cls.__bases__, namespace)
+
+
+def get_deep_size(value: Any, seen: Optional[Set[int]] = None) -> int:
+    """Bytes held by value and everything it references, objects shared within value are counted once
+
+    Args:
+        value (Any): object to measure
+        seen (Set[int], optional): ids already counted, pass one set to measure several objects without
+            counting what they share twice
+
+    Returns:
+        int: bytes
+    """
+    if seen is None:
+        seen = set()
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+
+    size = sys.getsizeof(value)
+    if isinstance(value, (str, bytes, int, float, bool, type(None))):
+        return size
+    if isinstance(value, np.ndarray):
+        # getsizeof only includes the buffer of arrays that own their data
+        return size if value.base is None else size + value.nbytes
+    if isinstance(value, dict):
+        return size + sum(get_deep_size(k, seen) + get_deep_size(v, seen) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return size + sum(get_deep_size(x, seen) for x in value)
+
+    for slot in getattr(type(value), "__slots__", ()):
+        if hasattr(value, slot):
+            size += get_deep_size(getattr(value, slot), seen)
+    if hasattr(value, "__dict__"):
+        size += get_deep_size(vars(value), seen)
+    return size
@@ -0,0 +1,183 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Seconds, covers a cached quote up to a slow paged candle fetch
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        """Cumulative bucket counts, sum and count of observed values, one lock held for a bisect and two adds"""
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        """(cumulative count per bucket with +Inf last, sum, count)"""
+        with self._lock:
+            counts = list(self.counts)
+            total, count = self.sum, self.count
+        cumulative = list()
+        running = 0
+        for each in counts:
+            running += each
+            cumulative.append(running)
+        return cumulative, total, count
+
+
+class MetricsRegistry:
+    def __init__(self, prefix: str = "spl_drawdown"):
+        """Counters, gauges and histograms keyed by name and labels, rendered in the Prometheus text format
+
+        Series are created on first use, so call sites need no registration.
+
+        Args:
+            prefix (str, optional): prepended to every metric name. Defaults to "spl_drawdown".
+        """
+        self.prefix = prefix
+        self._counters: Dict[str, Dict[LabelKey, float]] = dict()
+        self._gauges: Dict[str, Dict[LabelKey, float]] = dict()
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = dict()
+        self._buckets: Dict[str, Tuple[float, ...]] = dict()
+        self._help: Dict[str, str] = dict()
+        self._lock = threading.Lock()
+
+    def describe(self, name: str, help_text: str, buckets: Optional[Tuple[float, ...]] = None):
+        """Optional HELP text and histogram buckets of name"""
+        with self._lock:
+            self._help[name] = help_text
+            if buckets is not None:
+                self._buckets[name] = buckets
+
+    @staticmethod
+    def _key(labels: Dict[str, str]) -> LabelKey:
+        return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, dict())
+            series[key] = series.get(key, 0.0) + value
+
+    def set(self, name: str, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._gauges.setdefault(name, dict())[key] = value
+
+    def observe(self, name: str, value: float, **labels):
+        key = self._key(labels)
+        histogram = self._histograms.get(name, dict()).get(key)
+        if histogram is None:
+            with self._lock:
+                series = self._histograms.setdefault(name, dict())
+                histogram = series.get(key)
+                if histogram is None:
+                    histogram = series[key] = Histogram(buckets=self._buckets.get(name, DEFAULT_BUCKETS))
+        histogram.observe(value)
+
+    @contextmanager
+    def time(self, name: str, **labels) -> Iterator[None]:
+        """Observe the seconds spent in the block into histogram name"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def render(self) -> str:
+        """Every series in the Prometheus text exposition format"""
+        with self._lock:
+            counters = {k: dict(v) for k, v in self._counters.items()}
+            gauges = {k: dict(v) for k, v in self._gauges.items()}
+            histograms = {k: dict(v) for k, v in self._histograms.items()}
+            help_texts = dict(self._help)
+
+        lines = list()
+
+        def header(name: str, kind: str):
+            full_name = "{p}_{n}".format(p=self.prefix, n=name)
+            if name in help_texts:
+                lines.append("# HELP {f} {h}".format(f=full_name, h=help_texts[name]))
+            lines.append("# TYPE {f} {k}".format(f=full_name, k=kind))
+            return full_name
+
+        for kind, metrics in (("counter", counters), ("gauge", gauges)):
+            for name in sorted(metrics):
+                full_name = header(name=name, kind=kind)
+                for key, value in sorted(metrics[name].items()):
+                    lines.append("{f}{l} {v}".format(f=full_name, l=self._format_labels(key), v=repr(float(value))))
+
+        for name in sorted(histograms):
+            full_name = header(name=name, kind="histogram")
+            for key, histogram in sorted(histograms[name].items()):
+                cumulative, total, count = histogram.snapshot()
+                bounds = [repr(x) for x in histogram.buckets] + ["+Inf"]
+                for bound, bucket_count in zip(bounds, cumulative):
+                    labels = self._format_labels(key + (("le", bound),))
+                    lines.append("{f}_bucket{l} {c}".format(f=full_name, l=labels, c=bucket_count))
+                labels = self._format_labels(key)
+                lines.append("{f}_sum{l} {s}".format(f=full_name, l=labels, s=repr(total)))
+                lines.append("{f}_count{l} {c}".format(f=full_name, l=labels, c=count))
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _format_labels(key: LabelKey) -> str:
+        if not key:
+            return ""
+        escaped = (
+            '{k}="{v}"'.format(k=k, v=v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for k, v in key
+        )
+        return "{" + ",".join(escaped) + "}"
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """/metrics in the Prometheus text format, any other path answers ok as a health check"""
+
+    def do_GET(self):
+        if self.path.split("?")[0] == "/metrics":
+            content = get_metrics().render().encode("utf-8")
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            content = b"ok\n"
+            content_type = "text/plain; charset=utf-8"
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> MetricsRegistry:
+    """
+    Returns the process wide MetricsRegistry, created on first use.
+
+    Returns:
+        MetricsRegistry: shared registry instance.
+    """
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = MetricsRegistry()
+    return _metrics
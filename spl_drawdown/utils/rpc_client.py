@@ -0,0 +1,55 @@
+from typing import Any, Dict, Optional, Tuple
+
+from solana.rpc.api import Client
+from solana.rpc.providers.http import HTTPProvider
+from solders.rpc.requests import Body
+
+from spl_drawdown.utils.http_client import HttpClient, get_http_client
+
+
+class PooledHTTPProvider(HTTPProvider):
+    def __init__(self, endpoint: str, http: HttpClient):
+        """solana-py provider posting through the keep-alive session of http
+
+        The stock sync provider calls httpx.post, which opens a new connection for every rpc call. Rate
+        limits and metrics stay with the callers, which wrap client calls in http.limit and http.track.
+
+        Args:
+            endpoint (str): rpc url
+            http (HttpClient): client whose session and timeout are used
+        """
+        super().__init__(endpoint)
+        self.http = http
+
+    def make_request_unparsed(self, body: Body) -> str:
+        return self._post(request_kwargs=self._before_request(body=body))
+
+    def make_batch_request_unparsed(self, reqs: Tuple[Body, ...]) -> str:
+        return self._post(request_kwargs=self._before_batch_request(reqs))
+
+    def _post(self, request_kwargs: Dict[str, Any]) -> str:
+        response = self.http.session.post(
+            request_kwargs["url"],
+            data=request_kwargs["content"],
+            headers=request_kwargs["headers"],
+            timeout=self.http.timeout,
+        )
+        response.raise_for_status()
+        return response.text
+
+
+def get_rpc_client(endpoint: str, commitment: str = "confirmed", http: Optional[HttpClient] = None) -> Client:
+    """solana-py Client for endpoint sharing the pooled session of http
+
+    Args:
+        endpoint (str): rpc url
+        commitment (str, optional): default commitment of the client. Defaults to "confirmed".
+        http (HttpClient, optional): Defaults to the shared client.
+
+    Returns:
+        Client: rpc client
+    """
+    client = Client(endpoint, commitment=commitment)
+    # Client has no provider argument, the provider is swapped after construction
+    client._provider = PooledHTTPProvider(endpoint=endpoint, http=http or get_http_client())
+    return client
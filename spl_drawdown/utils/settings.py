@@ -34,5 +34,40 @@ try:
     settings_key_values["BET_AMOUNT_SOL"] = float(os.environ.get("BET_AMOUNT_SOL"))
     settings_key_values["MIN_24HR_VOLUME"] = float(os.environ.get("MIN_24HR_VOLUME"))
     settings_key_values["BIRDEYE_API_TOKEN"] = os.environ.get("BIRDEYE_API_TOKEN")
+    settings_key_values["ASYNC_CANDLES"] = os.environ.get("ASYNC_CANDLES", "false").lower() == "true"
+    settings_key_values["CANDLE_MAX_CONCURRENT_TOKENS"] = int(os.environ.get("CANDLE_MAX_CONCURRENT_TOKENS", 8))
+    settings_key_values["CANDLE_MAX_CONCURRENT_WINDOWS"] = int(os.environ.get("CANDLE_MAX_CONCURRENT_WINDOWS", 4))
+    settings_key_values["BIRDEYE_RPS"] = float(os.environ.get("BIRDEYE_RPS", 15))
+    settings_key_values["HELIUS_RPS"] = float(os.environ.get("HELIUS_RPS", 10))
+    settings_key_values["JUPITER_RPS"] = float(os.environ.get("JUPITER_RPS", 10))
+    settings_key_values["HTTP_CONNECT_TIMEOUT"] = float(os.environ.get("HTTP_CONNECT_TIMEOUT", 5))
+    settings_key_values["HTTP_READ_TIMEOUT"] = float(os.environ.get("HTTP_READ_TIMEOUT", 30))
+    settings_key_values["VERIFY_MAX_WORKERS"] = int(os.environ.get("VERIFY_MAX_WORKERS", 8))
+    settings_key_values["PRICE_STREAM"] = os.environ.get("PRICE_STREAM", "false").lower() == "true"
+    settings_key_values["PRICE_STREAM_URL"] = os.environ.get("PRICE_STREAM_URL", "")
+    settings_key_values["WALLET_RESYNC_SECONDS"] = float(os.environ.get("WALLET_RESYNC_SECONDS", 300))
+    settings_key_values["SWAP_STANDBY"] = os.environ.get("SWAP_STANDBY", "false").lower() == "true"
+    settings_key_values["SWAP_STANDBY_BAND"] = float(os.environ.get("SWAP_STANDBY_BAND", 0.05))
+    settings_key_values["SWAP_STANDBY_MAX_AGE_SECONDS"] = float(os.environ.get("SWAP_STANDBY_MAX_AGE_SECONDS", 45))
+    settings_key_values["SWAP_STANDBY_REFRESH_SECONDS"] = float(os.environ.get("SWAP_STANDBY_REFRESH_SECONDS", 15))
+    settings_key_values["SEND_RPC_ENDPOINTS"] = [
+        x.strip() for x in os.environ.get("SEND_RPC_ENDPOINTS", "").split(",") if x.strip()
+    ]
+    settings_key_values["VERIFICATION_CACHE_PATH"] = os.environ.get(
+        "VERIFICATION_CACHE_PATH", "spl_drawdown/data/verification_cache.sqlite"
+    )
+    settings_key_values["VERDICT_STATIC_TTL_HOURS"] = float(os.environ.get("VERDICT_STATIC_TTL_HOURS", 24 * 30))
+    settings_key_values["VERDICT_HOLDER_TTL_HOURS"] = float(os.environ.get("VERDICT_HOLDER_TTL_HOURS", 72))
+    settings_key_values["CANDLE_STORE_PATH"] = os.environ.get(
+        "CANDLE_STORE_PATH", "spl_drawdown/data/candle_store.sqlite"
+    )
+    # Point at a local stand-in such as modules/mock_providers.py for load tests
+    settings_key_values["BIRDEYE_BASE_URL"] = os.environ.get("BIRDEYE_BASE_URL", "https://public-api.birdeye.so")
+    settings_key_values["HELIUS_RPC_URL"] = os.environ.get("HELIUS_RPC_URL", "https://mainnet.helius-rpc.com")
+    settings_key_values["JUPITER_BASE_URL"] = os.environ.get("JUPITER_BASE_URL", "https://quote-api.jup.ag")
+    # Chrome trace of the last run, and a cProfile of the first run, both off when empty. The screen the first
+    # run starts is profiled next to it, run.prof -> run.screen.prof
+    settings_key_values["TRACE_PATH"] = os.environ.get("TRACE_PATH", "")
+    settings_key_values["PROFILE_RUN_PATH"] = os.environ.get("PROFILE_RUN_PATH", "")
 except KeyError:
     raise ValueError("Environment variable is required but not set")
@@ -0,0 +1,182 @@
+import cProfile
+import contextvars
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional
+
+from spl_drawdown.utils.log import get_logger
+
+logger = get_logger()
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    def __init__(self, tracer: "Tracer", name: str, attributes: dict):
+        """One timed block, recorded on exit as a Chrome trace complete event"""
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.span_id = next(tracer._ids)
+        self.parent_id = None
+        self._start = 0.0
+        self._token = None
+
+    def set(self, **attributes):
+        """Add attributes known only inside the block, e.g. a result count"""
+        self.attributes.update(attributes)
+
+    def __enter__(self) -> "Span":
+        self.parent_id = _current_span.get()
+        self._token = _current_span.set(self.span_id)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        _current_span.reset(self._token)
+        args = dict(self.attributes)
+        args["span_id"] = self.span_id
+        if self.parent_id is not None:
+            args["parent_id"] = self.parent_id
+        if exc_type is not None:
+            args["error"] = exc_type.__name__
+        self.tracer._record(
+            {
+                "name": self.name,
+                "ph": "X",
+                "ts": (self._start - self.tracer._origin) * 1e6,
+                "dur": (end - self._start) * 1e6,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": args,
+            }
+        )
+        return False
+
+
+class _NoopSpan:
+    def set(self, **attributes):
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    def __init__(self, enabled: bool = False, max_spans: int = 200000):
+        """Nested timing spans, exported in the Chrome trace event format
+
+        Open the file in https://ui.perfetto.dev or chrome://tracing. A span started inside another one on
+        the same thread, or in a function passed through wrap, records it as its parent. While disabled,
+        span returns a shared no-op so call sites can stay in the hot loop.
+
+        Args:
+            enabled (bool, optional): record spans. Defaults to False.
+            max_spans (int, optional): spans kept until the next export, the oldest are dropped. Defaults to 200000.
+        """
+        self.enabled = enabled
+        self._spans = deque(maxlen=max_spans)
+        self._ids = itertools.count(1)
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def span(self, name: str, **attributes):
+        """with tracer.span("name", mint=...): times the block"""
+        if not self.enabled:
+            return _NOOP_SPAN
+        return Span(tracer=self, name=name, attributes=attributes)
+
+    def wrap(self, func: Callable) -> Callable:
+        """func bound to the current span, for work handed to a thread pool"""
+        if not self.enabled:
+            return func
+        context = contextvars.copy_context()
+
+        def run(*args, **kwargs):
+            return context.copy().run(func, *args, **kwargs)
+
+        return run
+
+    def _record(self, event: dict):
+        with self._lock:
+            self._spans.append(event)
+
+    def get_spans(self) -> List[dict]:
+        with self._lock:
+            return list(self._spans)
+
+    def export(self, path: str, clear: bool = True):
+        """Write the recorded spans to path as a Chrome trace file
+
+        Args:
+            path (str): trace file, overwritten
+            clear (bool, optional): drop the exported spans. Defaults to True.
+        """
+        with self._lock:
+            events = list(self._spans)
+            if clear:
+                self._spans.clear()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        logger.info("Wrote {n} spans to {p}".format(n=len(events), p=path))
+
+
+@contextmanager
+def profile_to(path: Optional[str]) -> Iterator[None]:
+    """cProfile the block and dump the stats to path, read with python -m pstats or snakeviz. No-op without a path
+
+    Only the calling thread is profiled, work handed to another thread needs a profile_to of its own there.
+    """
+    if not path:
+        yield
+        return
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError as e:
+        # Python 3.12+ allows a single active profiler per process
+        logger.warning("Not profiling to {p}: {e}".format(p=path, e=e))
+        yield
+        return
+    try:
+        yield
+    finally:
+        profiler.disable()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        profiler.dump_stats(path)
+        logger.info("Wrote profile to {p}".format(p=path))
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """
+    Returns the process wide Tracer, created disabled on first use.
+
+    Returns:
+        Tracer: shared tracer instance.
+    """
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer()
+    return _tracer
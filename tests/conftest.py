@@ -0,0 +1,145 @@
+"""Benchmarks replaying synthetic Birdeye, Helius and Jupiter responses
+
+The fixtures are generated by tests/make_fixtures.py, not recorded from the live APIs. Each benchmark reports
+wall time, CPU time, peak traced memory and requests per endpoint, and fails when an endpoint is called more
+often than in baselines/request_counts.json.
+
+    python -m pytest                                   # replay and gate
+    UPDATE_REQUEST_BASELINES=1 python -m pytest        # accept the current request counts
+    python tests/make_fixtures.py                      # rewrite the fixtures after changing a scenario
+    BENCHMARK_JSON=benchmarks.json python -m pytest    # also write the measurements to a file
+"""
+
+import json
+import os
+
+import pytest
+from solders.keypair import Keypair
+
+UPDATE_REQUEST_BASELINES = os.environ.get("UPDATE_REQUEST_BASELINES", "false").lower() in ("1", "true")
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+BASELINES_PATH = os.path.join(os.path.dirname(__file__), "baselines", "request_counts.json")
+
+# Settings are read on import, set them before spl_drawdown is imported. Test wallets always replace real ones.
+os.environ["BIRDEYE_API_TOKEN"] = "replay"
+os.environ["HELIUS_API_KEY"] = "replay"
+for i in range(1, 5):
+    os.environ.pop("SOLANA_PRIVATE_KEY{i}".format(i=i), None)
+os.environ["SOLANA_PRIVATE_KEY1"] = str(Keypair.from_seed(bytes([1] * 32)))
+os.environ["SOLANA_PRIVATE_KEY2"] = str(Keypair.from_seed(bytes([2] * 32)))
+os.environ["BET_AMOUNT_SOL"] = "0.5"
+os.environ["MIN_24HR_VOLUME"] = "500000"
+os.environ["ASYNC_CANDLES"] = "false"
+os.environ["PRICE_STREAM"] = "false"
+os.environ["SWAP_STANDBY"] = "false"
+os.environ["SEND_RPC_ENDPOINTS"] = ""
+os.environ["VERIFICATION_CACHE_PATH"] = ""
+os.environ["CANDLE_STORE_PATH"] = ""
+# Measure the code, not the rate limiter
+os.environ["BIRDEYE_RPS"] = "0"
+os.environ["HELIUS_RPS"] = "0"
+os.environ["JUPITER_RPS"] = "0"
+
+from replay import Recording, get_count_regressions, install, measure  # noqa: E402
+
+from spl_drawdown.modules.mock_providers import MockProviderServer  # noqa: E402
+
+BENCHMARK_RESULTS = list()
+
+
+@pytest.fixture(scope="session")
+def request_baselines():
+    if os.path.exists(BASELINES_PATH):
+        with open(BASELINES_PATH) as f:
+            baselines = json.load(f)
+    else:
+        baselines = dict()
+    yield baselines
+    if UPDATE_REQUEST_BASELINES:
+        os.makedirs(os.path.dirname(BASELINES_PATH), exist_ok=True)
+        with open(BASELINES_PATH, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+
+@pytest.fixture
+def replay(monkeypatch):
+    """replay(name) routes every request of the test through fixtures/<name>.json"""
+
+    def start(name: str) -> Recording:
+        recording = Recording(path=os.path.join(FIXTURES_DIR, "{n}.json".format(n=name)))
+        install(monkeypatch=monkeypatch, recording=recording)
+        return recording
+
+    return start
+
+
+@pytest.fixture
+def mock_server():
+    """mock_server(**kwargs) starts a MockProviderServer on a free port, stopped after the test"""
+    servers = list()
+
+    def start(**kwargs) -> MockProviderServer:
+        server = MockProviderServer(**kwargs).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+@pytest.fixture
+def benchmark(request, request_baselines):
+    """with benchmark(recording): measures the block and gates its request counts, recording is a Recording or
+    the ServedCounts of a mock server"""
+
+    def run(recording: Recording, name: str = None):
+        name = name or request.node.name
+        return _Benchmark(name=name, recording=recording, baselines=request_baselines)
+
+    return run
+
+
+class _Benchmark:
+    def __init__(self, name: str, recording: Recording, baselines: dict):
+        self.name = name
+        self.recording = recording
+        self.baselines = baselines
+        self._measure = None
+
+    def __enter__(self):
+        self._measure = measure(name=self.name, recording=self.recording)
+        self.result = self._measure.__enter__()
+        return self.result
+
+    def __exit__(self, exc_type, exc, tb):
+        self._measure.__exit__(exc_type, exc, tb)
+        BENCHMARK_RESULTS.append(self.result)
+        if exc_type is not None:
+            return False
+
+        assert not self.recording.unmatched, "Requests without a response in the fixture: {u}".format(
+            u=self.recording.unmatched
+        )
+        if UPDATE_REQUEST_BASELINES:
+            self.baselines[self.name] = dict(sorted(self.result.request_counts.items()))
+            return False
+        regressions = get_count_regressions(result=self.result, baseline=self.baselines.get(self.name))
+        assert not regressions, "Request count regression in {n}: {r}".format(n=self.name, r=regressions)
+        return False
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not BENCHMARK_RESULTS:
+        return
+    terminalreporter.section("benchmarks")
+    for result in BENCHMARK_RESULTS:
+        terminalreporter.write_line(str(result))
+        for endpoint, count in sorted(result.request_counts.items()):
+            terminalreporter.write_line("    {c:>5}  {e}".format(c=count, e=endpoint))
+
+    path = os.environ.get("BENCHMARK_JSON")
+    if path:
+        with open(path, "w") as f:
+            json.dump([vars(x) for x in BENCHMARK_RESULTS], f, indent=2)
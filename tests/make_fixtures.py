@@ -0,0 +1,446 @@
+"""Writes the synthetic provider responses in tests/fixtures
+
+The fixtures are not recorded from Birdeye, Helius or Jupiter. Mints come from seeded keypairs and every
+volume, candle and quote is generated here, shaped like the live responses, so each benchmark screens a known
+scenario. Run it after changing a scenario, then accept the new request counts:
+
+    python tests/make_fixtures.py
+    UPDATE_REQUEST_BASELINES=1 python -m pytest
+"""
+
+import base64
+import json
+import math
+import os
+import random
+import time
+from typing import List
+
+from solders.hash import Hash
+from solders.keypair import Keypair
+from solders.message import MessageV0
+from solders.signature import Signature
+from solders.system_program import TransferParams, transfer
+from solders.transaction import VersionedTransaction
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+BIRDEYE = "https://public-api.birdeye.so"
+HELIUS = "https://mainnet.helius-rpc.com/"
+JUPITER = "https://quote-api.jup.ag"
+MULTI_PRICE = BIRDEYE + "/defi/multi_price?check_liquidity=40000&include_liquidity=false"
+VALID_AUTHORITY = "TSLvdd1pWpHVjahSpsvCXUbgwsL3JAcvokwaKt1eokM"
+SOL = "So11111111111111111111111111111111111111112"
+
+
+def get_mint(seed: int) -> str:
+    """Same derivation as the tests"""
+    return str(Keypair.from_seed(bytes([seed % 256, seed // 256] + [7] * 30)).pubkey())
+
+
+def get_url(url: str, **params) -> str:
+    return url + "?" + "&".join("{k}={v}".format(k=k, v=v) for k, v in params.items())
+
+
+def get_iso_time(unix_time: int) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime(unix_time))
+
+
+def get_json(method: str, url: str, body: dict, payload: dict = None, status: int = 200) -> dict:
+    """One interaction in the format tests/replay.py loads"""
+    return {"method": method, "url": url, "json": payload, "status": status, "body": body}
+
+
+def save(name: str, now: int, interactions: List[dict]):
+    with open(os.path.join(FIXTURES_DIR, "{n}.json".format(n=name)), "w") as f:
+        json.dump({"recorded_at": now, "interactions": interactions}, f, indent=1)
+
+
+def make_token_volumes(now: int) -> List[dict]:
+    """Two list pages of A-H plus SOL. C fails the update authority, D the ownership and E the top 10 holders"""
+    tokens = {x: get_mint(seed=100 + i) for i, x in enumerate("ABCDEFGH")}
+
+    def get_item(symbol: str) -> dict:
+        return {
+            "address": tokens[symbol],
+            "name": "Token " + symbol,
+            "symbol": symbol,
+            "decimals": 6,
+            "volume_24h_usd": 750000.0 + ord(symbol) * 1000.5,
+            "trade_24h_count": 5000 + ord(symbol),
+            "liquidity": 250000.0,
+            "price": 0.02,
+            "market_cap": 20000000.0,
+            "recent_listing_time": now - 90 * 86400,
+        }
+
+    sol = {
+        "address": SOL,
+        "name": "Wrapped SOL",
+        "symbol": "SOL",
+        "decimals": 9,
+        "volume_24h_usd": 900000000.0,
+        "trade_24h_count": 9000000,
+        "liquidity": 1e9,
+        "price": 150.0,
+        "market_cap": 8e10,
+        "recent_listing_time": None,
+    }
+    pages = [[sol] + [get_item(x) for x in "ABCDE"], [get_item(x) for x in "FGH"]]
+
+    interactions = list()
+    for i, page in enumerate(pages):
+        url = get_url(
+            BIRDEYE + "/defi/v3/token/list",
+            sort_by="volume_24h_usd",
+            sort_type="desc",
+            min_volume_24h_usd=500000,
+            offset=i * 100,
+            limit=100,
+        )
+        body = {"success": True, "data": {"items": page, "has_next": i == 0}}
+        interactions.append(get_json(method="GET", url=url, body=body))
+
+    for page in pages:
+        assets = list()
+        for item in page:
+            if item["symbol"] == "SOL":
+                continue
+            authorities = [{"address": VALID_AUTHORITY, "scopes": ["full"]}]
+            if item["symbol"] == "C":
+                authorities.append({"address": get_mint(seed=999), "scopes": ["metadata"]})
+            assets.append(
+                {
+                    "interface": "FungibleToken",
+                    "id": item["address"],
+                    "authorities": authorities,
+                    "content": {"metadata": {"name": item["name"], "symbol": item["symbol"]}},
+                    "mutable": True,
+                    "burnt": False,
+                }
+            )
+        payload = {
+            "jsonrpc": "2.0",
+            "id": "get-asset-batch",
+            "method": "getAssetBatch",
+            "params": {"ids": [x["id"] for x in assets]},
+        }
+        body = {"jsonrpc": "2.0", "result": assets, "id": "get-asset-batch"}
+        interactions.append(get_json(method="POST", url=HELIUS, body=body, payload=payload))
+
+    created = now - 60 * 86400
+    for symbol, address in tokens.items():
+        owner = get_mint(seed=998) if symbol == "D" else VALID_AUTHORITY
+        creation_info = {
+            "txHash": "synthetic",
+            "slot": 280000000,
+            "tokenAddress": address,
+            "decimals": 6,
+            "owner": owner,
+            "blockUnixTime": created,
+            "blockHumanTime": get_iso_time(created),
+        }
+        security = {
+            "creatorAddress": VALID_AUTHORITY,
+            "ownerAddress": None,
+            "creationTime": created,
+            "metaplexUpdateAuthority": VALID_AUTHORITY,
+            "freezeable": False,
+            "freezeAuthority": None,
+            "top10HolderPercent": 0.71 if symbol == "E" else 0.18,
+            "mutableMetadata": True,
+        }
+        markets = [
+            {
+                "address": get_mint(seed=500 + ord(symbol)),
+                "name": symbol + "-SOL",
+                "source": "Orca",
+                "liquidity": 90000.0,
+                "volume24h": 120000.0,
+                "createdAt": get_iso_time(now - 50 * 86400),
+            },
+            {
+                "address": get_mint(seed=600 + ord(symbol)),
+                "name": symbol + "-SOL",
+                "source": "Raydium",
+                "liquidity": 400000.0,
+                "volume24h": 800000.0,
+                "createdAt": get_iso_time(now - 59 * 86400),
+            },
+        ]
+        interactions.append(
+            get_json(
+                method="GET",
+                url=get_url(BIRDEYE + "/defi/token_creation_info", address=address),
+                body={"success": True, "data": creation_info},
+            )
+        )
+        interactions.append(
+            get_json(
+                method="GET",
+                url=get_url(BIRDEYE + "/defi/token_security", address=address),
+                body={"success": True, "data": security},
+            )
+        )
+        url = get_url(
+            BIRDEYE + "/defi/v2/markets",
+            address=address,
+            time_frame="1h",
+            sort_type="desc",
+            sort_by="liquidity",
+            offset=0,
+            limit=10,
+        )
+        interactions.append(
+            get_json(method="GET", url=url, body={"success": True, "data": {"items": markets, "total": 2}})
+        )
+    return interactions
+
+
+def get_hour_windows(start: int, now: int) -> List[tuple]:
+    """Hourly windows as get_candle_windows splits them"""
+    windows = list()
+    window_start = start
+    while window_start < now:
+        window_end = min(window_start + 99 * 3600, now)
+        windows.append((window_start, window_end))
+        window_start = window_end + 3600
+    return windows
+
+
+def get_hourly_ohlcv(address: str, time_from: int, time_to: int, hourly: List[dict]) -> dict:
+    """/defi/v3/ohlcv interaction of one hourly window"""
+    url = get_url(
+        BIRDEYE + "/defi/v3/ohlcv", address=address, type="1H", currency="usd", time_from=time_from, time_to=time_to
+    )
+    items = [x for x in hourly if time_from <= x["unix_time"] <= time_to]
+    return get_json(
+        method="GET", url=url, body={"success": True, "data": {"items": items, "is_scaled_ui_token": False}}
+    )
+
+
+def get_chart_price(symbol: str, hour: int) -> float:
+    """DIP rises for 3 days, falls 70% and flattens, FLAT keeps rising and TINY is DIP at 1% of the price"""
+    day = hour / 24
+    if symbol == "FLAT":
+        return 0.02 + 0.001 * day + 0.00001 * hour
+    if day < 3:
+        price = 0.02 + 0.01 * day
+    elif day < 6:
+        price = 0.05 - 0.0133 * (day - 3)
+    else:
+        price = 0.011 + 0.001 * math.sin(hour / 5)
+    return price * 0.01 if symbol == "TINY" else price
+
+
+def make_token_charts(now: int, rng: random.Random) -> List[dict]:
+    """16 days of candles for DIP, FLAT and TINY, only DIP reaches the hourly pass"""
+    tokens = {"DIP": get_mint(seed=201), "FLAT": get_mint(seed=202), "TINY": get_mint(seed=203)}
+    hours = 384
+    start = now - hours * 3600
+
+    windows = get_hour_windows(start=start, now=now)
+    interactions = list()
+    for symbol, address in tokens.items():
+        previous = get_chart_price(symbol=symbol, hour=0)
+        hourly = list()
+        for hour in range(hours + 1):
+            close = get_chart_price(symbol=symbol, hour=hour + 1) * (1 + rng.gauss(0, 0.01))
+            hourly.append(
+                {
+                    "o": previous,
+                    "h": max(previous, close) * 1.01,
+                    "l": min(previous, close) * 0.99,
+                    "c": close,
+                    "v": 1000.0,
+                    "v_usd": rng.choice([800.0, 2500.0, 12000.0]),
+                    "unix_time": start + hour * 3600,
+                    "address": address,
+                    "type": "1H",
+                    "currency": "usd",
+                }
+            )
+            previous = close
+
+        daily = list()
+        for first_hour in range(0, hours, 24):
+            end = first_hour + 24
+            day = hourly[first_hour:end]
+            daily.append(
+                {
+                    "o": day[0]["o"],
+                    "h": max(x["h"] for x in day),
+                    "l": min(x["l"] for x in day),
+                    "c": day[-1]["c"],
+                    "v": 24000.0,
+                    "v_usd": sum(x["v_usd"] for x in day),
+                    "unix_time": start + first_hour * 3600,
+                    "address": address,
+                    "type": "1D",
+                    "currency": "usd",
+                }
+            )
+        url = get_url(
+            BIRDEYE + "/defi/v3/ohlcv", address=address, type="1D", currency="usd", time_from=start, time_to=now
+        )
+        body = {"success": True, "data": {"items": daily, "is_scaled_ui_token": False}}
+        interactions.append(get_json(method="GET", url=url, body=body))
+
+        if symbol != "DIP":
+            continue
+        for time_from, time_to in windows:
+            interactions.append(get_hourly_ohlcv(address=address, time_from=time_from, time_to=time_to, hourly=hourly))
+
+    quote = {"value": 0.0112, "updateUnixTime": now - 30, "priceInNative": 0.000075, "priceChange24h": -1.2}
+    interactions.append(
+        get_json(
+            method="POST",
+            url=MULTI_PRICE,
+            body={"success": True, "data": {tokens["DIP"]: quote}},
+            payload={"list_address": tokens["DIP"]},
+        )
+    )
+    return interactions
+
+
+def make_update_current_prices(now: int) -> List[dict]:
+    """250 mints quoted at 0.5 in chunks of 100"""
+    mints = sorted(get_mint(seed=1000 + i) for i in range(250))
+    interactions = list()
+    for i in range(0, len(mints), 100):
+        end = i + 100
+        chunk = mints[i:end]
+        quote = {"value": 0.5, "updateUnixTime": now - 30, "priceInNative": 0.0033, "priceChange24h": 3.1}
+        interactions.append(
+            get_json(
+                method="POST",
+                url=MULTI_PRICE,
+                body={"success": True, "data": {x: quote for x in chunk}},
+                payload={"list_address": ",".join(chunk)},
+            )
+        )
+    return interactions
+
+
+def make_buy_tokens() -> List[dict]:
+    """Two wallets buying X and Y, the second wallet already holds X. Swaps are transfers signed by the wallet"""
+    wallets = [Keypair.from_seed(bytes([1] * 32)), Keypair.from_seed(bytes([2] * 32))]
+    x_mint, y_mint = get_mint(seed=301), get_mint(seed=302)
+
+    interactions = list()
+    body = {"jsonrpc": "2.0", "result": {"context": {"slot": 300000000}, "value": 10000000000}, "id": 0}
+    payload = {"jsonrpc": "2.0", "id": 0, "method": "getBalance", "params": []}
+    interactions.append(get_json(method="POST", url=HELIUS, body=body, payload=payload))
+    for i, key_pair in enumerate(wallets):
+        held = list()
+        if i == 1:
+            held.append(
+                {
+                    "address": get_mint(seed=400 + i),
+                    "mint": x_mint,
+                    "owner": str(key_pair.pubkey()),
+                    "amount": 125000000,
+                    "delegated_amount": 0,
+                    "frozen": False,
+                }
+            )
+        payload = {
+            "jsonrpc": "2.0",
+            "id": "RPC20-1",
+            "method": "getTokenAccounts",
+            "params": {
+                "owner": str(key_pair.pubkey()),
+                "displayOptions": {"showZeroBalance": False},
+                "page": 1,
+                "limit": 100,
+            },
+        }
+        result = {"total": len(held), "limit": 100, "page": 1, "token_accounts": held}
+        body = {"jsonrpc": "2.0", "result": result, "id": "RPC20-1"}
+        interactions.append(get_json(method="POST", url=HELIUS, body=body, payload=payload))
+
+    for key_pair, output_mint, amount in [
+        (wallets[0], x_mint, 2500000000),
+        (wallets[0], y_mint, 1880000000),
+        (wallets[1], y_mint, 2500000000),
+    ]:
+        swap_info = {
+            "ammKey": get_mint(seed=700),
+            "label": "Raydium",
+            "inputMint": SOL,
+            "outputMint": output_mint,
+            "inAmount": str(amount),
+            "outAmount": str(amount * 90),
+            "feeAmount": "0",
+            "feeMint": SOL,
+        }
+        quote = {
+            "inputMint": SOL,
+            "inAmount": str(amount),
+            "outputMint": output_mint,
+            "outAmount": str(amount * 90),
+            "otherAmountThreshold": str(amount * 88),
+            "swapMode": "ExactIn",
+            "slippageBps": 200,
+            "platformFee": None,
+            "priceImpactPct": "0.001",
+            "routePlan": [{"swapInfo": swap_info, "percent": 100}],
+            "contextSlot": 300000000,
+            "timeTaken": 0.002,
+        }
+        url = get_url(JUPITER + "/v6/quote", inputMint=SOL, outputMint=output_mint, amount=amount, slippageBps=200)
+        interactions.append(get_json(method="GET", url=url, body=quote))
+
+        ix = transfer(
+            TransferParams(
+                from_pubkey=key_pair.pubkey(),
+                to_pubkey=Keypair.from_seed(bytes([9] * 32)).pubkey(),
+                lamports=amount,
+            )
+        )
+        message = MessageV0.try_compile(key_pair.pubkey(), [ix], [], Hash.default())
+        unsigned_tx = VersionedTransaction.populate(message, [Signature.default()])
+        payload = {
+            "quoteResponse": quote,
+            "userPublicKey": str(key_pair.pubkey()),
+            "wrapAndUnwrapSol": True,
+            "prioritizationFeeLamports": {
+                "priorityLevelWithMaxLamports": {
+                    "maxLamports": 100000000,
+                    "global": False,
+                    "priorityLevel": "veryHigh",
+                }
+            },
+        }
+        body = {
+            "swapTransaction": base64.b64encode(bytes(unsigned_tx)).decode(),
+            "lastValidBlockHeight": 280000150,
+            "prioritizationFeeLamports": 50000,
+        }
+        interactions.append(get_json(method="POST", url=JUPITER + "/v6/swap", body=body, payload=payload))
+
+    # Params of these methods hold per-run signatures, replay.py matches them by method only
+    payload = {"jsonrpc": "2.0", "id": 0, "method": "sendTransaction", "params": []}
+    body = {"jsonrpc": "2.0", "result": "$signature", "id": 0}
+    interactions.append(get_json(method="POST", url=HELIUS, body=body, payload=payload))
+    status = {
+        "slot": 300000001,
+        "confirmations": None,
+        "err": None,
+        "status": {"Ok": None},
+        "confirmationStatus": "confirmed",
+    }
+    payload = {"jsonrpc": "2.0", "id": 0, "method": "getSignatureStatuses", "params": []}
+    body = {"jsonrpc": "2.0", "result": {"context": {"slot": 300000002}, "value": [status] * 16}, "id": 0}
+    interactions.append(get_json(method="POST", url=HELIUS, body=body, payload=payload))
+    return interactions
+
+
+if __name__ == "__main__":
+    # Whole hours, replay.py shifts times by the hours passed since
+    now = int(time.time())
+    now -= now % 3600
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    save(name="token_volumes", now=now, interactions=make_token_volumes(now=now))
+    save(name="token_charts", now=now, interactions=make_token_charts(now=now, rng=random.Random(19)))
+    save(name="update_current_prices", now=now, interactions=make_update_current_prices(now=now))
+    save(name="buy_tokens", now=now, interactions=make_buy_tokens())
@@ -0,0 +1,219 @@
+import base64
+import json
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from requests import PreparedRequest, Response
+from requests.adapters import BaseAdapter
+
+# Query parameters that change from run to run and never select a different response
+VOLATILE_PARAMS = {"time_from", "time_to", "api-key"}
+# JSON-RPC methods issued by solana-py, their params are encoded by the library and hold per-run signatures
+VOLATILE_RPC_METHODS = {"getBalance", "getLatestBlockhash", "getSignatureStatuses", "sendTransaction"}
+# Response fields holding unix times, shifted by the hours passed since the fixture was written
+TIME_KEYS = {"unix_time", "blockUnixTime", "creationTime", "updateUnixTime"}
+# Replaced with the signature of the transaction in a replayed sendTransaction
+SIGNATURE_PLACEHOLDER = "$signature"
+
+
+def get_endpoint(method: str, url: str, body: Any = None) -> str:
+    """Name requests are counted under: method, host and path, plus the JSON-RPC method"""
+    parts = urlsplit(url)
+    endpoint = "{m} {h}{p}".format(m=method, h=parts.netloc, p=parts.path)
+    if isinstance(body, dict) and "jsonrpc" in body:
+        endpoint += " {r}".format(r=body.get("method"))
+    return endpoint
+
+
+def get_match_key(method: str, url: str, body: Any = None) -> str:
+    """Key a request is replayed by, volatile query parameters and JSON-RPC ids are left out"""
+    params = sorted((k, v) for k, v in parse_qsl(urlsplit(url).query) if k not in VOLATILE_PARAMS)
+    if isinstance(body, dict) and "jsonrpc" in body:
+        rpc_method = body.get("method")
+        body = {"method": rpc_method, "params": None if rpc_method in VOLATILE_RPC_METHODS else body.get("params")}
+    return json.dumps([get_endpoint(method=method, url=url, body=body), params, body], sort_keys=True)
+
+
+def shift_times(value: Any, seconds: int) -> Any:
+    if isinstance(value, dict):
+        return {
+            k: v + seconds if k in TIME_KEYS and isinstance(v, int) else shift_times(value=v, seconds=seconds)
+            for k, v in value.items()
+        }
+    if isinstance(value, list):
+        return [shift_times(value=x, seconds=seconds) for x in value]
+    return value
+
+
+def decode_body(content: Optional[bytes]) -> Any:
+    if not content:
+        return None
+    try:
+        return json.loads(content)
+    except (TypeError, ValueError):
+        return content.decode("utf-8", errors="replace") if isinstance(content, bytes) else content
+
+
+def get_transaction_signature(body: dict) -> str:
+    """First signature of the transaction in a sendTransaction request"""
+    from solders.transaction import VersionedTransaction
+
+    encoded = body["params"][0]
+    return str(VersionedTransaction.from_bytes(base64.b64decode(encoded)).signatures[0])
+
+
+class Recording:
+    def __init__(self, path: str):
+        """Synthetic provider responses of one benchmark, written by tests/make_fixtures.py, replayed by request
+
+        Responses stored for the same request are replayed in order, the last one is repeated once they run
+        out. Unix times in responses move forward by the whole hours passed since the fixture was written,
+        so date ranges computed from them request the same number of windows on every run.
+
+        Args:
+            path (str): fixture file
+        """
+        self.path = path
+        self.counts: Counter = Counter()
+        self.unmatched: List[str] = list()
+        self._responses: Dict[str, List[Tuple[int, str]]] = defaultdict(list)
+        self._served: Counter = Counter()
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        with open(self.path) as f:
+            recording = json.load(f)
+        now = int(time.time())
+        shift = (now - now % 3600) - (recording["recorded_at"] - recording["recorded_at"] % 3600)
+        for each in recording["interactions"]:
+            key = get_match_key(method=each["method"], url=each["url"], body=each.get("json"))
+            body = shift_times(value=each["body"], seconds=shift)
+            self._responses[key].append((each["status"], json.dumps(body)))
+
+    def respond(self, method: str, url: str, body: Any) -> Tuple[int, str]:
+        """Status and body stored for a request, 404 for a request the fixture has no response for"""
+        key = get_match_key(method=method, url=url, body=body)
+        with self._lock:
+            self.counts[get_endpoint(method=method, url=url, body=body)] += 1
+            responses = self._responses.get(key)
+            if not responses:
+                self.unmatched.append(key)
+                return 404, json.dumps({"error": "No response in the fixture"})
+            index = min(self._served[key], len(responses) - 1)
+            self._served[key] += 1
+        status, content = responses[index]
+        if SIGNATURE_PLACEHOLDER in content and isinstance(body, dict) and body.get("method") == "sendTransaction":
+            content = content.replace(SIGNATURE_PLACEHOLDER, get_transaction_signature(body=body))
+        return status, content
+
+
+class ServedCounts:
+    def __init__(self, server: Any):
+        """Requests answered by a MockProviderServer, measured and gated by the benchmark fixture like a Recording
+
+        Args:
+            server (MockProviderServer): running mock
+        """
+        self.server = server
+        self.unmatched: List[str] = list()
+
+    @property
+    def counts(self) -> Counter:
+        return Counter({k: v["requests"] for k, v in self.server.get_stats().items() if k != "total"})
+
+
+class ReplayAdapter(BaseAdapter):
+    def __init__(self, recording: Recording):
+        """requests transport adapter answering from a Recording, mounted for every session"""
+        super().__init__()
+        self.recording = recording
+
+    def send(self, request: PreparedRequest, **kwargs) -> Response:
+        body = decode_body(content=request.body.encode() if isinstance(request.body, str) else request.body)
+        status, content = self.recording.respond(method=request.method, url=request.url, body=body)
+        response = Response()
+        response.status_code = status
+        response._content = content.encode("utf-8")
+        response.encoding = "utf-8"
+        response.headers["Content-Type"] = "application/json"
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def install(monkeypatch, recording: Recording):
+    """Route requests, and httpx when installed (solana-py), through recording"""
+    adapter = ReplayAdapter(recording=recording)
+    monkeypatch.setattr("requests.Session.get_adapter", lambda self, url: adapter)
+
+    try:
+        import httpx
+    except ImportError:
+        return
+
+    def replay_request(transport, request):
+        body = decode_body(content=request.read())
+        status, content = recording.respond(method=request.method, url=str(request.url), body=body)
+        return httpx.Response(
+            status, content=content.encode("utf-8"), headers={"Content-Type": "application/json"}, request=request
+        )
+
+    monkeypatch.setattr(httpx.HTTPTransport, "handle_request", replay_request)
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    peak_memory_bytes: int = 0
+    request_counts: Dict[str, int] = field(default_factory=dict)
+
+    def __str__(self):
+        parts = []
+        parts.append(f"{self.name}")
+        parts.append(f"wall: {self.wall_seconds:.3f}s")
+        parts.append(f"cpu: {self.cpu_seconds:.3f}s")
+        parts.append(f"peak_memory: {self.peak_memory_bytes / 1024 / 1024:.2f} MiB")
+        parts.append(f"requests: {sum(self.request_counts.values())}")
+        return " - ".join(parts)
+
+
+@contextmanager
+def measure(name: str, recording: Recording) -> Iterator[BenchmarkResult]:
+    """Wall time, process CPU time, peak traced memory and requests per endpoint of the block"""
+    result = BenchmarkResult(name=name)
+    counts_before = Counter(recording.counts)
+    tracemalloc.start()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        yield result
+    finally:
+        result.wall_seconds = time.perf_counter() - wall_start
+        result.cpu_seconds = time.process_time() - cpu_start
+        result.peak_memory_bytes = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        result.request_counts = dict(recording.counts - counts_before)
+
+
+def get_count_regressions(result: BenchmarkResult, baseline: Optional[Dict[str, int]]) -> List[str]:
+    """Endpoints called more often than in baseline, or not in it at all"""
+    if baseline is None:
+        return ["No request count baseline for {n}".format(n=result.name)]
+    regressions = list()
+    for endpoint, count in sorted(result.request_counts.items()):
+        allowed = baseline.get(endpoint, 0)
+        if count > allowed:
+            regressions.append("{e}: {c} requests, baseline {a}".format(e=endpoint, c=count, a=allowed))
+    return regressions
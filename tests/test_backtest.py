@@ -0,0 +1,124 @@
+import os
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+import spl_drawdown.modules.token_charts as token_charts
+from spl_drawdown.modules.async_candles import parse_candle_items
+from spl_drawdown.modules.backtest import ReplayData, ReplayEngine
+from spl_drawdown.modules.candle_aggregator import DailyCandleAggregator
+from spl_drawdown.modules.mock_providers import SyntheticUniverse
+from spl_drawdown.modules.token_charts import TokenCharts
+from spl_drawdown.types.screen_params import ScreenParams
+from spl_drawdown.types.token_data import TokenData
+
+
+@pytest.fixture(params=["UTC0", "EST5EDT,M3.2.0,M11.1.0", "IST-5:30"])
+def local_timezone(request, monkeypatch):
+    """Candle times and the days of DailyCandleAggregator are local, POSIX rules need no tz database"""
+    monkeypatch.setenv("TZ", request.param)
+    time.tzset()
+    yield request.param
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_screen_matches_token_charts(mock_server, monkeypatch, local_timezone):
+    universe = SyntheticUniverse(size=60, seed=35, reject_rate=0.0)
+    # Midnight UTC, the window holds the end of daylight saving time of EST5EDT
+    universe.created_at = screen_time = int(datetime(2025, 11, 15, tzinfo=timezone.utc).timestamp())
+    server = mock_server(universe=universe)
+    params = ScreenParams(candle_days=60)
+    get_candles = universe.get_candles
+
+    wicked = set(universe.mints[::3])
+
+    # ReplayEngine screens at midnight UTC, candles opened at or after it are still in progress then
+    def get_completed_candles(mint: str, interval: str, time_from: int, time_to: int):
+        items = get_candles(mint=mint, interval=interval, time_from=time_from, time_to=min(time_to, screen_time - 1))
+        # An intraday spike the hourly opens and closes miss, a new ATH for the daily pass
+        if interval == "1D" and mint in wicked and items and items[-1]["unix_time"] == screen_time - 86400:
+            items[-1] = dict(items[-1], h=items[-1]["h"] * 10)
+        return items
+
+    class ScreenTime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime.fromtimestamp(screen_time, tz=tz)
+
+    monkeypatch.setattr(universe, "get_candles", get_completed_candles)
+    monkeypatch.setattr(token_charts, "datetime", ScreenTime)
+    tokens = [
+        TokenData(
+            symbol=str(i),
+            mint_address=x,
+            create_date=datetime.fromtimestamp(universe.get_creation_time(mint=x), tz=timezone.utc),
+        )
+        for i, x in enumerate(universe.mints)
+    ]
+    TokenCharter = TokenCharts(BIRDEYE_API_TOKEN=os.environ["BIRDEYE_API_TOKEN"], base_url=server.url)
+    TokenCharter.screen_params = params
+    TokenCharter.token_list = list(tokens)
+    TokenCharter.populate_token_list()
+
+    # Stored candles reach further back than the screen window
+    time_from = screen_time - 75 * 86400
+    data = ReplayData.from_candles(
+        candles_by_mint={
+            x: parse_candle_items(items=get_completed_candles(x, "1H", time_from, screen_time)) for x in universe.mints
+        },
+        daily_candles_by_mint={
+            x: parse_candle_items(items=get_completed_candles(x, "1D", time_from, screen_time)) for x in universe.mints
+        },
+    )
+    day = data.get_hour(datetime.fromtimestamp(screen_time, tz=timezone.utc)) // 24
+
+    def get_screened(engine: ReplayEngine) -> dict:
+        passed, ath, drawdown = engine.screen(day=day, params=params)
+        return {data.mints[x]: (ath[x], drawdown[x]) for x in np.flatnonzero(passed)}
+
+    screened = get_screened(engine=ReplayEngine(data=data))
+    assert day == data.days
+    assert 0 < len(screened) < len(tokens)
+    assert set(screened) == {x.mint_address for x in TokenCharter.token_list}
+    for token in TokenCharter.token_list:
+        assert screened[token.mint_address] == pytest.approx((token.ath_price_usd, token.drawdown_percent))
+
+    # The daily pass drops tokens the hourly pass alone would keep
+    assert set(screened) < set(get_screened(engine=ReplayEngine(data=data, hourly_only=True)))
+
+
+def test_days_match_daily_candle_aggregator(local_timezone):
+    universe = SyntheticUniverse(size=5, seed=36)
+    screen_time = int(datetime(2025, 11, 15, tzinfo=timezone.utc).timestamp())
+    window_start = screen_time - 60 * 86400
+
+    def get_hourly(mint: str, time_from: int) -> list:
+        return parse_candle_items(items=universe.get_candles(mint, "1H", time_from, screen_time - 1))
+
+    data = ReplayData.from_candles(
+        candles_by_mint={x: get_hourly(mint=x, time_from=window_start - 86400) for x in universe.mints}
+    )
+    engine = ReplayEngine(data=data, hourly_only=True)
+    high, low, close = engine._get_days(day=data.days, candle_days=60)
+
+    for row, mint in enumerate(data.mints):
+        aggregator = DailyCandleAggregator()
+        aggregator.add_candles(get_hourly(mint=mint, time_from=window_start))
+        days = aggregator.finish()
+        # The window starts within a local day except in UTC, the fall back day of EST5EDT has 25 hours
+        assert len(days) == (60 if local_timezone == "UTC0" else 61)
+        assert high[row].tolist() == [x.high for x in days]
+        assert low[row].tolist() == [x.low for x in days]
+        assert close[row].tolist() == [x.close for x in days]
+
+
+def test_daily_pass_needs_daily_candles():
+    candles = parse_candle_items(items=SyntheticUniverse(size=1).get_candles("mint", "1H", 0, 86400))
+    data = ReplayData.from_candles(candles_by_mint={"mint": candles})
+
+    with pytest.raises(ValueError):
+        ReplayEngine(data=data)
+    assert ReplayEngine(data=data, hourly_only=True).data.days == 2
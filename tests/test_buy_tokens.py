@@ -0,0 +1,37 @@
+import time
+
+from solders.keypair import Keypair
+
+from spl_drawdown.main_buyer import SplDrawdown
+from spl_drawdown.types.token_data import TokenData
+
+
+def get_mint(seed: int) -> str:
+    return str(Keypair.from_seed(bytes([seed % 256, seed // 256] + [7] * 30)).pubkey())
+
+
+def test_buy_tokens(replay, benchmark):
+    recording = replay("buy_tokens")
+    S = SplDrawdown()
+    S.Confirmations.poll_interval_seconds = 0.05
+    # The second wallet already holds X
+    tokens_to_buy = [
+        TokenData(name="X", symbol="X", mint_address=get_mint(seed=301)),
+        TokenData(name="Y", symbol="Y", mint_address=get_mint(seed=302)),
+    ]
+
+    expected_holdings = {x.mint_address for x in tokens_to_buy}
+
+    def is_confirmed() -> bool:
+        return all(S.wallet_states[x.public_key].get_holdings() == expected_holdings for x in S.wallets)
+
+    with benchmark(recording):
+        S.buy_tokens(tokens_to_buy=tokens_to_buy)
+        deadline = time.monotonic() + 10
+        while not is_confirmed() and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    first, second = S.wallets
+    assert set(S.bought_tokens[first.public_key]) == expected_holdings
+    assert set(S.bought_tokens[second.public_key]) == {tokens_to_buy[1].mint_address}
+    assert is_confirmed()
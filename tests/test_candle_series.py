@@ -0,0 +1,97 @@
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+import pytest
+
+from spl_drawdown.types.candle_data import CandleData
+from spl_drawdown.types.candle_series import CandleSeries
+from spl_drawdown.types.token_data import TokenData
+from spl_drawdown.utils.memory import add_slots
+
+
+def get_candles(count: int) -> List[CandleData]:
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return [
+        CandleData(
+            time=start + timedelta(days=i), open=1.0 + i, high=2.0 + i, low=0.5 + i, close=1.5 + i, volume=100.0 * i
+        )
+        for i in range(count)
+    ]
+
+
+def test_indexing_returns_candle_data():
+    candles = get_candles(count=5)
+    series = CandleSeries.from_candles(candles=candles)
+
+    assert len(series) == 5
+    assert series[0] == candles[0]
+    assert series[-1] == candles[-1]
+    assert series[2].time.tzinfo == timezone.utc
+    assert list(series) == candles
+    assert series.to_candles() == candles
+    assert candles[3] in series
+    with pytest.raises(IndexError):
+        series[5]
+    with pytest.raises(IndexError):
+        series[-6]
+
+
+def test_slicing_returns_a_series():
+    candles = get_candles(count=5)
+    series = CandleSeries.from_candles(candles=candles)
+
+    tail = series[2:]
+    assert isinstance(tail, CandleSeries)
+    assert list(tail) == candles[2:]
+    assert tail[0] == candles[2]
+    assert list(series[1:4:2]) == candles[1:4:2]
+    assert len(series[5:]) == 0
+    assert CandleSeries.from_candles(candles=series) is series
+    assert len(CandleSeries.from_candles(candles=None)) == 0
+
+
+def test_add_slots_keeps_defaults_and_eq():
+    @add_slots
+    @dataclass
+    class Example:
+        name: Optional[str] = None
+        count: int = 3
+        tags: list = field(default_factory=list)
+
+    example = Example(name="a")
+    assert (example.name, example.count, example.tags) == ("a", 3, [])
+    assert Example.__slots__ == ("name", "count", "tags")
+    assert not hasattr(example, "__dict__")
+    with pytest.raises(AttributeError):
+        example.other = 1
+    assert example == Example(name="a")
+    assert example != Example(name="a", count=4)
+    # Default lists are not shared between instances
+    example.tags.append("x")
+    assert Example().tags == []
+
+    token = TokenData(mint_address="mint")
+    assert token.current_price_usd is None
+    assert token == TokenData(mint_address="mint")
+    assert not hasattr(token, "__dict__")
+
+
+def test_since_and_merge():
+    candles = get_candles(count=6)
+    stored = CandleSeries.from_candles(candles=candles[:4])
+    day_three = stored.to_epoch(candles[3].time)
+
+    assert list(stored.since(from_time=day_three)) == candles[3:4]
+    # Between two candles and past the last one
+    assert list(stored.since(from_time=day_three - 3600)) == candles[3:4]
+    assert len(stored.since(from_time=day_three + 3600)) == 0
+
+    # The last stored day is replaced by the newer, complete one
+    newer = [CandleData(time=candles[3].time, open=9.0, high=9.0, low=9.0, close=9.0, volume=9.0)] + candles[4:]
+    merged = stored.merge(newer=CandleSeries.from_candles(candles=newer), from_time=day_three)
+    assert list(merged) == candles[:3] + newer
+    # Newer candles before from_time are ignored
+    merged = stored.merge(newer=CandleSeries.from_candles(candles=candles), from_time=day_three)
+    assert list(merged) == candles
+    assert merged.tz == timezone.utc
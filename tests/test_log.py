@@ -0,0 +1,87 @@
+import json
+import logging
+import queue
+import sys
+import time
+
+from spl_drawdown.types.token_data import TokenData
+from spl_drawdown.utils.log import DeferredQueueHandler, JsonFormatter, LazyMessage, RateLimitFilter
+
+
+def get_record(msg: str, lineno: int = 10, level: int = logging.INFO, args: tuple = (), exc_info=None):
+    return logging.LogRecord(
+        name="test", level=level, pathname="module.py", lineno=lineno, msg=msg, args=args, exc_info=exc_info
+    )
+
+
+def test_lazy_message_is_built_only_when_formatted():
+    calls = list()
+
+    def build(a: int, b: int) -> str:
+        calls.append((a, b))
+        return "{a} of {b}".format(a=a, b=b)
+
+    logger = logging.getLogger("test-lazy-message")
+    logger.setLevel(logging.WARNING)
+    logger.info(LazyMessage(build, 1, b=2))
+    assert calls == []
+
+    message = LazyMessage(build, 1, b=2)
+    assert get_record(msg=message).getMessage() == "1 of 2"
+    assert calls == [(1, 2)]
+
+
+def test_json_formatter():
+    record = get_record(msg="Getting %s quotes", args=(3,))
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["message"] == "Getting 3 quotes"
+    assert entry["level"] == "INFO"
+    assert entry["module"] == "module"
+    assert "exception" not in entry
+
+    try:
+        raise ValueError("bad quote")
+    except ValueError:
+        record = get_record(msg="Failed", level=logging.ERROR, exc_info=sys.exc_info())
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["level"] == "ERROR"
+    assert "ValueError: bad quote" in entry["exception"]
+
+
+def test_rate_limit_filter():
+    rate_limit = RateLimitFilter(rate=2, per_seconds=0.2)
+    records = [get_record(msg="Quote {i}".format(i=i)) for i in range(5)]
+    assert [rate_limit.filter(x) for x in records] == [True, True, False, False, False]
+    # Other call sites and records above max_level have their own allowance
+    assert rate_limit.filter(get_record(msg="Other", lineno=11))
+    assert rate_limit.filter(get_record(msg="Error", level=logging.ERROR))
+
+    time.sleep(0.25)
+    record = get_record(msg="Quote %s", args=(5,))
+    assert rate_limit.filter(record)
+    assert record.getMessage() == "Quote 5 (3 similar messages dropped)"
+    record = get_record(msg="Quote 6")
+    assert rate_limit.filter(record)
+    assert record.getMessage() == "Quote 6"
+
+
+def test_queued_messages_keep_the_state_at_the_log_call():
+    log_queue = queue.SimpleQueue()
+    logger = logging.getLogger("test-deferred-queue")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    logger.addHandler(DeferredQueueHandler(log_queue))
+    token = TokenData(symbol="A", mint_address="mint-a", current_price_usd=1.0)
+    prices = [1.0]
+
+    logger.info(token)
+    logger.info("Prices %s", prices)
+    logger.info(LazyMessage("Last price {p}".format, p=prices))
+    token.current_price_usd = 2.0
+    prices.append(2.0)
+
+    messages = [log_queue.get_nowait().getMessage() for _ in range(3)]
+    assert messages[0] == str(TokenData(symbol="A", mint_address="mint-a", current_price_usd=1.0))
+    assert messages[1] == "Prices [1.0]"
+    # Built on the writer thread, from the later state
+    assert messages[2] == "Last price [1.0, 2.0]"
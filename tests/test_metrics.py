@@ -0,0 +1,46 @@
+from spl_drawdown.utils.metrics import MetricsRegistry
+
+
+def test_render_counters_and_gauges():
+    metrics = MetricsRegistry(prefix="test")
+    metrics.describe(name="requests_total", help_text="Requests per endpoint")
+    metrics.inc("requests_total", endpoint="b")
+    metrics.inc("requests_total", 2, endpoint="a")
+    metrics.inc("requests_total", endpoint="a")
+    metrics.set("tokens", 12)
+
+    assert metrics.render() == (
+        "# HELP test_requests_total Requests per endpoint\n"
+        "# TYPE test_requests_total counter\n"
+        'test_requests_total{endpoint="a"} 3.0\n'
+        'test_requests_total{endpoint="b"} 1.0\n'
+        "# TYPE test_tokens gauge\n"
+        "test_tokens 12.0\n"
+    )
+
+
+def test_render_escapes_label_values():
+    metrics = MetricsRegistry(prefix="test")
+    metrics.set("up", 1, path='C:\\dir "x"\nnext', kind="a")
+
+    # Labels are sorted by name
+    assert 'test_up{kind="a",path="C:\\\\dir \\"x\\"\\nnext"} 1.0' in metrics.render().splitlines()
+
+
+def test_render_cumulative_buckets():
+    metrics = MetricsRegistry(prefix="test")
+    metrics.describe(name="latency_seconds", help_text="Latency", buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        metrics.observe("latency_seconds", value, provider="birdeye")
+
+    lines = metrics.render().splitlines()
+    # A value on a bound counts in that bucket, every bucket holds the ones below it
+    assert lines == [
+        "# HELP test_latency_seconds Latency",
+        "# TYPE test_latency_seconds histogram",
+        'test_latency_seconds_bucket{provider="birdeye",le="0.1"} 2',
+        'test_latency_seconds_bucket{provider="birdeye",le="1.0"} 3',
+        'test_latency_seconds_bucket{provider="birdeye",le="+Inf"} 4',
+        'test_latency_seconds_sum{provider="birdeye"} 2.65',
+        'test_latency_seconds_count{provider="birdeye"} 4',
+    ]
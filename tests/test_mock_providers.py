@@ -0,0 +1,104 @@
+import os
+
+from solders.keypair import Keypair
+
+from spl_drawdown.modules.mock_providers import MockProviderServer, SyntheticUniverse
+from spl_drawdown.modules.swap import Swapper
+from spl_drawdown.modules.token_charts import TokenCharts
+from spl_drawdown.modules.token_volumes import TokenVolumes
+from spl_drawdown.modules.wallet_info import Wallet
+from spl_drawdown.utils.http_client import get_http_client
+
+
+def test_synthetic_universe_is_deterministic():
+    first, second = SyntheticUniverse(size=500, seed=5), SyntheticUniverse(size=500, seed=5)
+    second.created_at = first.created_at
+    mint = first.mints[7]
+
+    assert first.mints == second.mints
+    assert first.get_asset(mint=mint) == second.get_asset(mint=mint)
+    assert first.get_candles(
+        mint=mint, interval="1H", time_from=first.created_at - 86400, time_to=first.created_at
+    ) == (second.get_candles(mint=mint, interval="1H", time_from=first.created_at - 86400, time_to=first.created_at))
+    assert not set(first.mints) & set(SyntheticUniverse(size=500, seed=6).mints)
+
+    failed_checks = [first.get_failed_check(mint=x) for x in first.mints]
+    rejected = [x for x in failed_checks if x is not None]
+    assert abs(len(rejected) / len(failed_checks) - first.reject_rate) < 0.05
+    assert set(rejected) == {"update_authority", "ownership", "security", "market"}
+
+
+def test_get_stats_percentiles():
+    summary = MockProviderServer._summarize(
+        status_counts={200: 95, 429: 5}, latencies=[x / 1000 for x in range(1, 101)]
+    )
+    assert summary == {
+        "requests": 100,
+        "statuses": {200: 95, 429: 5},
+        "p50_ms": 51.0,
+        "p95_ms": 96.0,
+        "p99_ms": 100.0,
+    }
+    assert MockProviderServer._summarize(status_counts={}, latencies=[])["p50_ms"] is None
+
+
+def test_injected_faults(mock_server):
+    server = mock_server(universe=SyntheticUniverse(size=10), rate_limit_rate=0.1, error_rate=0.1, seed=3)
+    http = get_http_client()
+    url = "{u}/defi/token_security".format(u=server.url)
+    statuses = [http.get("birdeye", url, params={"address": server.universe.mints[0]}).status_code for _ in range(500)]
+
+    stats = server.get_stats()
+    endpoint = stats["GET /defi/token_security"]
+    assert endpoint["requests"] == stats["total"]["requests"] == 500
+    assert endpoint["statuses"] == {x: statuses.count(x) for x in set(statuses)}
+    assert set(statuses) == {200, 429, 500, 502, 503}
+    assert abs(statuses.count(429) / 500 - 0.1) < 0.05
+    assert abs(sum(statuses.count(x) for x in (500, 502, 503)) / 500 - 0.1) < 0.05
+    assert endpoint["p50_ms"] <= endpoint["p95_ms"] <= endpoint["p99_ms"]
+
+
+def test_screen_against_mock(mock_server):
+    universe = SyntheticUniverse(size=60, seed=20)
+    server = mock_server(universe=universe)
+    TokenVols = TokenVolumes(
+        BIRDEYE_API_TOKEN=os.environ["BIRDEYE_API_TOKEN"],
+        HELIUS_API_KEY=os.environ["HELIUS_API_KEY"],
+        base_url=server.url,
+        helius_rpc_url=server.url,
+    )
+
+    tokens = TokenVols.get_tokens(min_volume=500000)
+
+    listed = [x for x in universe.mints if universe.get_volume(mint=x) >= 500000]
+    passing = [x for x in listed if universe.get_failed_check(mint=x) is None]
+    assert [x.mint_address for x in tokens] == passing
+    assert 0 < len(listed) - len(passing) < len(listed) / 2
+    assert server.get_stats()["GET /defi/v3/token/list"]["statuses"] == {200: 1}
+
+    TokenCharter = TokenCharts(BIRDEYE_API_TOKEN=os.environ["BIRDEYE_API_TOKEN"], base_url=server.url)
+    TokenCharter.token_list = tokens
+    TokenCharter.populate_token_list()
+
+    params = TokenCharter.screen_params
+    assert 0 < len(TokenCharter.token_list) < len(tokens)
+    for token in TokenCharter.token_list:
+        assert token.drawdown_percent >= params.min_drawdown_percent
+        assert token.ath_price_usd >= params.min_ath_price_usd
+    assert set(server.get_stats()["GET /defi/v3/ohlcv"]["statuses"]) == {200}
+
+
+def test_buy_against_mock(mock_server):
+    universe = SyntheticUniverse(size=10, seed=21)
+    server = mock_server(universe=universe)
+    key_pair = Keypair.from_seed(bytes([3] * 32))
+    mint = universe.mints[4]
+    Swap = Swapper(HELIUS_API_KEY="test", helius_rpc_url=server.url, jupiter_base_url=server.url)
+
+    assert Swap.place_buy_order(OUTPUT_MINT=mint, AMOUNT_IN_SOL=0.05, KEY_PAIR=key_pair)
+
+    stats = server.get_stats()
+    for endpoint in ["GET /v6/quote", "POST /v6/swap", "POST / sendTransaction", "POST / getSignatureStatuses"]:
+        assert stats[endpoint]["statuses"] == {200: stats[endpoint]["requests"]}
+    WalletInfo = Wallet(HELIUS_API_KEY="test", BIRDEYE_API_TOKEN="test", helius_rpc_url=server.url)
+    assert [x.mint for x in WalletInfo.get_token_accounts(pub_key=str(key_pair.pubkey()))] == [mint]
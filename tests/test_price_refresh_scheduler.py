@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta, timezone
+
+from spl_drawdown.modules.price_refresh_scheduler import PriceRefreshScheduler
+from spl_drawdown.modules.token_charts import TokenCharts
+from spl_drawdown.types.token_data import TokenData
+
+
+def test_missing_quote_is_retried_later():
+    scheduler = PriceRefreshScheduler()
+    now = datetime.now(timezone.utc)
+    quoted = TokenData(mint_address="quoted", current_price_usd=0.9, current_price_time=now, current_per_from_ath=0.1)
+    missing = TokenData(mint_address="missing")
+    scheduler.sync(tokens=[quoted, missing])
+    # Without a price a token is due right away
+    assert scheduler.pop_due(now=now) == ["missing"]
+
+    scheduler.schedule_retry(token=missing, now=now)
+    assert scheduler.get_next_due() == now + timedelta(seconds=scheduler.retry_seconds)
+    # Syncing the list again keeps the wait
+    scheduler.sync(tokens=[quoted, missing])
+    assert scheduler.pop_due(now=now + timedelta(seconds=30)) == []
+    assert scheduler.pop_due(now=now + timedelta(seconds=61)) == ["missing", "quoted"]
+
+
+def test_update_current_prices_backs_off_unquoted_tokens():
+    TokenCharter = TokenCharts(BIRDEYE_API_TOKEN="replay")
+    TokenCharter.token_list = [
+        TokenData(symbol="A", mint_address="mint-a", ath_price_usd=1.0),
+        TokenData(symbol="B", mint_address="mint-b", ath_price_usd=1.0),
+    ]
+    # mint-b is left out of the response
+    TokenCharter.get_quotes = lambda mints: {
+        "mint-a": {"current_price_per_token_usd": 0.95, "current_price_per_token_sol": 0.01}
+    }
+
+    TokenCharter.update_current_prices()
+
+    assert TokenCharter.token_list[0].current_price_usd == 0.95
+    assert TokenCharter.token_list[1].current_price_usd is None
+    # The loop sleeps until the retry instead of its 5 second minimum
+    assert TokenCharter.get_seconds_until_next_quote() > 55
+    TokenCharter.remove_from_token_list(mints_to_remove=["mint-a"])
+    assert TokenCharter.get_seconds_until_next_quote() > 55
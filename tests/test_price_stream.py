@@ -0,0 +1,42 @@
+import time
+
+from spl_drawdown.modules.price_stream import LocalPriceFeed
+from spl_drawdown.modules.token_charts import TokenCharts
+from spl_drawdown.types.token_data import TokenData
+
+
+def wait_for(condition, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_local_price_feed_breakouts():
+    TokenCharter = TokenCharts(BIRDEYE_API_TOKEN="replay")
+    TokenCharter.token_list = [
+        TokenData(symbol="A", mint_address="mint-a", ath_price_usd=1.0),
+        TokenData(symbol="B", mint_address="mint-b", ath_price_usd=3.0),
+    ]
+    breakouts = list()
+    feed = LocalPriceFeed()
+    TokenCharter.start_price_stream(price_feed=feed, on_breakout=lambda token: breakouts.append(token.symbol))
+    try:
+        feed.push(mint_address="mint-a", price_usd=0.9)
+        # At the ATH is not above it
+        feed.push(mint_address="mint-a", price_usd=1.0)
+        feed.push(mint_address="mint-a", price_usd=1.1)
+        # Not followed, dropped by the feed
+        feed.push(mint_address="mint-c", price_usd=100.0)
+        feed.push(mint_address="mint-b", price_usd=2.0)
+        token_b = TokenCharter.token_list[1]
+        assert wait_for(lambda: token_b.current_price_usd == 2.0)
+    finally:
+        TokenCharter.stop_price_stream()
+
+    token_a = TokenCharter.token_list[0]
+    assert breakouts == ["A"]
+    assert token_a.current_price_usd == 1.1
+    assert token_a.current_per_from_ath < 0
+    assert token_b.current_per_from_ath > 0
+    assert feed.is_live()
@@ -0,0 +1,48 @@
+from concurrent.futures import Future
+
+from solders.keypair import Keypair
+
+from spl_drawdown.modules.mock_providers import SyntheticUniverse
+from spl_drawdown.modules.swap import Swapper
+
+
+def test_partly_sent_buy_resolves_on_the_sent_chunks(mock_server):
+    universe = SyntheticUniverse(size=10, seed=15)
+    server = mock_server(universe=universe)
+    key_pair = Keypair.from_seed(bytes([4] * 32))
+    Swap = Swapper(HELIUS_API_KEY="test", helius_rpc_url=server.url, jupiter_base_url=server.url)
+    Swap.Confirmations.poll_interval_seconds = 0.05
+    Swap.MAX_SOL_CHUNK = 0.02
+    send_swap = Swap.send_swap
+    sent = list()
+
+    def send_two(quote: dict, key_pair: Keypair):
+        if len(sent) == 2:
+            raise Exception("Failed to create swap")
+        sent.append(send_swap(quote=quote, key_pair=key_pair))
+        return sent[-1]
+
+    Swap.send_swap = send_two
+    outcomes = list()
+    confirmation = Swap.submit_buy_order(
+        OUTPUT_MINT=universe.mints[2], AMOUNT_IN_SOL=0.05, KEY_PAIR=key_pair, on_done=outcomes.append
+    )
+
+    # Two of three chunks went out and landed, the token is held
+    assert confirmation.result(timeout=10)
+    assert outcomes == [True]
+    assert server.get_stats()["POST / sendTransaction"]["requests"] == 2
+
+
+def test_combine_confirmations():
+    def settled(*results: bool) -> bool:
+        confirmations = [Future() for _ in results]
+        combined = Swapper._combine_confirmations(confirmations=confirmations)
+        for future, result in zip(confirmations, results):
+            assert not combined.done()
+            future.set_result(result)
+        return combined.result(timeout=1)
+
+    assert settled(True, True)
+    assert settled(False, True)
+    assert not settled(False, False)
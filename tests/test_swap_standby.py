@@ -0,0 +1,41 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from spl_drawdown.modules.swap_standby import SwapStandby
+from spl_drawdown.types.prepared_swap import PreparedSwap
+from spl_drawdown.types.token_data import TokenData
+from spl_drawdown.utils.metrics import MetricsRegistry
+
+
+class PreparingSwap:
+    def prepare_buy(self, OUTPUT_MINT: str, AMOUNT_IN_SOL: float, public_key: str) -> PreparedSwap:
+        if OUTPUT_MINT == "mint-c":
+            raise Exception("Failed to get quote")
+        return PreparedSwap(
+            mint_address=OUTPUT_MINT,
+            public_key=public_key,
+            amount_lamports=int(AMOUNT_IN_SOL * 1_000_000_000),
+            quote=dict(),
+            swap_transaction="",
+            built_at=datetime.now(timezone.utc),
+        )
+
+
+def test_standby_outcomes_are_exported():
+    Standby = SwapStandby()
+    Standby.metrics = MetricsRegistry(prefix="test")
+    state = SimpleNamespace(wallet=SimpleNamespace(public_key="wallet-1"), Swap=PreparingSwap())
+    tokens = [TokenData(symbol=x.upper(), mint_address="mint-{x}".format(x=x)) for x in "abc"]
+
+    Standby.refresh(candidates=[(x, state, 0.5) for x in tokens])
+    assert Standby.take(mint_address="mint-a", public_key="wallet-1", amount_sol=0.5) is not None
+    # Prepared for another amount
+    assert Standby.take(mint_address="mint-b", public_key="wallet-1", amount_sol=0.6) is None
+
+    lines = Standby.metrics.render().splitlines()
+    assert 'test_swap_standby_total{outcome="built"} 2.0' in lines
+    assert 'test_swap_standby_total{outcome="failed"} 1.0' in lines
+    assert 'test_swap_standby_total{outcome="used"} 1.0' in lines
+    assert 'test_swap_standby_total{outcome="missed"} 1.0' in lines
+    assert "test_swap_standby_prepared 2.0" in lines
+    assert Standby.get_stats() == {"built": 2, "rebuilt": 0, "failed": 1, "used": 1, "missed": 1, "expired": 0}
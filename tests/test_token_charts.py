@@ -0,0 +1,117 @@
+import os
+import time
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from replay import ServedCounts
+from solders.keypair import Keypair
+
+from spl_drawdown.modules.mock_providers import SyntheticUniverse
+from spl_drawdown.modules.token_charts import TokenCharts
+from spl_drawdown.modules.token_volumes import TokenVolumes
+from spl_drawdown.types.token_data import TokenData
+
+
+def get_mint(seed: int) -> str:
+    return str(Keypair.from_seed(bytes([seed % 256, seed // 256] + [7] * 30)).pubkey())
+
+
+def test_populate_token_list(replay, benchmark):
+    recording = replay("token_charts")
+    TokenCharter = TokenCharts(BIRDEYE_API_TOKEN=os.environ["BIRDEYE_API_TOKEN"])
+    create_date = datetime.now(timezone.utc) - timedelta(days=16)
+    TokenCharter.token_list = [
+        TokenData(name=x, symbol=x, mint_address=get_mint(seed=201 + i), create_date=create_date)
+        for i, x in enumerate(["DIP", "FLAT", "TINY"])
+    ]
+
+    with benchmark(recording):
+        TokenCharter.populate_token_list()
+        TokenCharter.update_current_prices()
+        TokenCharter.clean_token_list()
+
+    # FLAT is still at its ATH, TINY's ATH is below min_ath_price_usd
+    assert [x.symbol for x in TokenCharter.token_list] == ["DIP"]
+    token = TokenCharter.token_list[0]
+    assert token.drawdown_percent >= 0.7
+    assert token.current_price_usd == 0.0112
+
+
+def test_update_current_prices(replay, benchmark):
+    recording = replay("update_current_prices")
+    TokenCharter = TokenCharts(BIRDEYE_API_TOKEN=os.environ["BIRDEYE_API_TOKEN"])
+    TokenCharter.token_list = [
+        TokenData(symbol=str(i), mint_address=get_mint(seed=1000 + i), ath_price_usd=1.0) for i in range(250)
+    ]
+
+    with benchmark(recording):
+        TokenCharter.update_current_prices()
+        # Nothing is due again right after a refresh
+        TokenCharter.update_current_prices()
+
+    assert all(x.current_price_usd == 0.5 for x in TokenCharter.token_list)
+
+
+class DayLater(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return datetime.now(tz) + timedelta(days=1)
+
+
+def test_rescreen_token_list(mock_server, monkeypatch, benchmark):
+    universe = SyntheticUniverse(size=30, seed=25)
+    server = mock_server(universe=universe)
+    TokenVols = TokenVolumes(
+        BIRDEYE_API_TOKEN=os.environ["BIRDEYE_API_TOKEN"],
+        HELIUS_API_KEY=os.environ["HELIUS_API_KEY"],
+        base_url=server.url,
+        helius_rpc_url=server.url,
+    )
+    tokens = TokenVols.get_tokens(min_volume=500000)
+    TokenCharter = TokenCharts(BIRDEYE_API_TOKEN=os.environ["BIRDEYE_API_TOKEN"], base_url=server.url)
+    TokenCharter.rescreen_token_list(tokens=[replace(x) for x in tokens])
+    survivors = {x.mint_address for x in TokenCharter.token_list}
+    # Every screened mint has its outcome, only the tokens that passed keep candles
+    assert set(TokenCharter.screen_outcomes) == {x.mint_address for x in tokens}
+    assert set(TokenCharter.daily_series["D"]) == set(TokenCharter.daily_series["H"]) == survivors
+    wicked = sorted(survivors)[0]
+    wick_day = int(time.time()) // 86400 * 86400
+    get_candles = universe.get_candles
+
+    # A new daily high on the day closed since, missed by the hourly candles, the daily pass drops the token
+    def get_wicked_candles(mint: str, interval: str, time_from: int, time_to: int):
+        items = get_candles(mint=mint, interval=interval, time_from=time_from, time_to=time_to)
+        if interval == "1D" and mint == wicked:
+            items = [dict(x, h=x["h"] * 10) if x["unix_time"] == wick_day else x for x in items]
+        return items
+
+    monkeypatch.setattr(universe, "get_candles", get_wicked_candles)
+
+    # One day later, for the screen and the candles the mock serves
+    monkeypatch.setattr("spl_drawdown.modules.token_charts.datetime", DayLater)
+    monkeypatch.setattr(
+        "spl_drawdown.modules.mock_providers.time",
+        SimpleNamespace(time=lambda: time.time() + 86400, monotonic=time.monotonic, sleep=time.sleep),
+    )
+    with benchmark(ServedCounts(server=server)) as result:
+        TokenCharter.rescreen_token_list(tokens=[replace(x) for x in tokens])
+    FreshCharter = TokenCharts(BIRDEYE_API_TOKEN=os.environ["BIRDEYE_API_TOKEN"], base_url=server.url)
+    FreshCharter.token_list = [replace(x) for x in tokens]
+    served = ServedCounts(server=server).counts
+    FreshCharter.populate_token_list()
+    fresh_requests = sum((ServedCounts(server=server).counts - served).values())
+
+    assert len(survivors) > 1 and wicked not in {x.mint_address for x in TokenCharter.token_list}
+    assert TokenCharter.screen_outcomes[wicked] == "D"
+    assert set(TokenCharter.daily_series["H"]) == {x.mint_address for x in TokenCharter.token_list}
+    # Survivors fetch the last days only
+    assert sum(result.request_counts.values()) * 4 < fresh_requests
+    assert 0 < len(FreshCharter.token_list) < len(tokens)
+    assert [x.mint_address for x in TokenCharter.token_list] == [x.mint_address for x in FreshCharter.token_list]
+    for token, fresh in zip(TokenCharter.token_list, FreshCharter.token_list):
+        assert token.ath_price_usd == pytest.approx(fresh.ath_price_usd)
+        assert token.ath_price_time == fresh.ath_price_time
+        assert token.drawdown_percent == pytest.approx(fresh.drawdown_percent)
+        assert token.drawdown_consecutive_days_start == fresh.drawdown_consecutive_days_start
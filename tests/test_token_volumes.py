@@ -0,0 +1,87 @@
+import os
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from replay import ServedCounts
+
+from spl_drawdown.modules.mock_providers import SyntheticUniverse
+from spl_drawdown.modules.token_volumes import TokenVolumes
+from spl_drawdown.types.token_data import TokenData
+from spl_drawdown.types.verdict_data import VerdictData
+
+
+def test_get_tokens(replay, benchmark):
+    recording = replay("token_volumes")
+    TokenVols = TokenVolumes(
+        BIRDEYE_API_TOKEN=os.environ["BIRDEYE_API_TOKEN"], HELIUS_API_KEY=os.environ["HELIUS_API_KEY"]
+    )
+
+    with benchmark(recording):
+        tokens = TokenVols.get_tokens(min_volume=500000)
+
+    # C fails the update authority, D the ownership and E the top 10 holder check
+    assert sorted(x.symbol for x in tokens) == ["A", "B", "F", "G", "H"]
+    assert all(x.create_date and x.dex == "Raydium" and x.market for x in tokens)
+
+
+def test_get_tokens_reverifies_expired_tokens(mock_server, tmp_path):
+    server = mock_server(universe=SyntheticUniverse(size=20, seed=26, reject_rate=0.0))
+    TokenVols = TokenVolumes(
+        BIRDEYE_API_TOKEN=os.environ["BIRDEYE_API_TOKEN"],
+        HELIUS_API_KEY=os.environ["HELIUS_API_KEY"],
+        verification_cache_path=str(tmp_path / "verdicts.sqlite"),
+        base_url=server.url,
+        helius_rpc_url=server.url,
+    )
+    tokens = TokenVols.get_tokens(min_volume=500000)
+    verified = {x.mint_address: x for x in tokens}
+    assert len(tokens) > 2 and all(x.verified_date for x in tokens)
+
+    def get_requests() -> Counter:
+        served = ServedCounts(server=server).counts
+        again = TokenVols.get_tokens(min_volume=500000, verified=verified)
+        assert [x.mint_address for x in again] == [x.mint_address for x in tokens]
+        return ServedCounts(server=server).counts - served
+
+    requests = get_requests()
+    assert not requests["GET /defi/token_security"] and not requests["GET /defi/v2/markets"]
+
+    # Past holder_ttl, and a security verdict that expired before it
+    tokens[0].verified_date -= TokenVols.holder_ttl
+    TokenVols.VerificationCache.put(
+        verdict=VerdictData(
+            mint_address=tokens[1].mint_address,
+            check="security",
+            passed=True,
+            expires_at=datetime.now(timezone.utc) - timedelta(seconds=1),
+        )
+    )
+    requests = get_requests()
+    assert requests["GET /defi/token_security"] == 1
+    assert requests["GET /defi/v2/markets"] == 2
+    # Ownership is still cached for static_ttl
+    assert requests["GET /defi/token_creation_info"] == 0
+
+
+def test_missing_create_date_is_not_cached(mock_server, tmp_path, monkeypatch):
+    server = mock_server(universe=SyntheticUniverse(size=5, seed=7, reject_rate=0.0))
+    TokenVols = TokenVolumes(
+        BIRDEYE_API_TOKEN=os.environ["BIRDEYE_API_TOKEN"],
+        HELIUS_API_KEY=os.environ["HELIUS_API_KEY"],
+        verification_cache_path=str(tmp_path / "verdicts.sqlite"),
+        base_url=server.url,
+        helius_rpc_url=server.url,
+    )
+    token = TokenData(symbol="A", mint_address=server.universe._get_mint(index=0))
+    get_security = server.universe.get_security
+
+    # Birdeye failed the creation info and left out the creation time of the security check
+    with monkeypatch.context() as m:
+        m.setattr(TokenVols, "_fetch_ownership", lambda token: (True, None))
+        m.setattr(server.universe, "get_security", lambda mint: dict(get_security(mint=mint), creationTime=None))
+        assert TokenVols.verify_ownership(token=token) and token.create_date is None
+        assert not TokenVols.verify_security(token=token)
+    assert TokenVols.VerificationCache.get(mint=token.mint_address, check="security") is None
+
+    assert TokenVols.verify_ownership(token=token) and TokenVols.verify_security(token=token)
+    assert TokenVols.VerificationCache.get(mint=token.mint_address, check="security").passed
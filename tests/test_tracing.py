@@ -0,0 +1,66 @@
+import json
+import pstats
+from concurrent.futures import ThreadPoolExecutor
+
+from spl_drawdown.utils.tracing import Tracer, profile_to
+
+
+def test_spans_nest_across_wrap(tmp_path):
+    tracer = Tracer(enabled=True)
+
+    def fetch(mint: str):
+        with tracer.span("fetch", mint=mint) as span:
+            span.set(candles=10)
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        with tracer.span("screen") as screen:
+            futures = [pool.submit(tracer.wrap(fetch), mint=x) for x in ("a", "b")]
+            [x.result() for x in futures]
+        # Without wrap the pool thread has no current span
+        pool.submit(fetch, mint="c").result()
+
+    spans = {x["args"]["mint"]: x for x in tracer.get_spans() if x["name"] == "fetch"}
+    assert spans["a"]["args"]["parent_id"] == spans["b"]["args"]["parent_id"] == screen.span_id
+    assert "parent_id" not in spans["c"]["args"]
+    assert spans["a"]["args"]["candles"] == 10
+
+    path = tmp_path / "traces" / "run.json"
+    tracer.export(path=str(path))
+    with open(path) as f:
+        trace = json.load(f)
+    assert [x["name"] for x in trace["traceEvents"]] == ["fetch", "fetch", "screen", "fetch"]
+    assert all(x["ph"] == "X" and x["dur"] >= 0 for x in trace["traceEvents"])
+    # Exported spans are cleared
+    assert tracer.get_spans() == []
+
+
+def test_disabled_tracer_records_nothing():
+    tracer = Tracer(enabled=False)
+
+    def fetch():
+        return 1
+
+    with tracer.span("screen") as span:
+        span.set(tokens=3)
+    assert tracer.wrap(fetch) is fetch
+    assert tracer.get_spans() == []
+
+
+def test_profile_covers_only_the_calling_thread(tmp_path):
+    def get_tokens() -> int:
+        return sum(range(1000))
+
+    def screen_tokens(path: str) -> int:
+        with profile_to(path=path):
+            return get_tokens()
+
+    run_path, screen_path = tmp_path / "run.prof", tmp_path / "run.screen.prof"
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        with profile_to(path=str(run_path)):
+            assert pool.submit(screen_tokens, path=str(screen_path)).result() == 499500
+
+    def get_functions(path) -> set:
+        return {x[2] for x in pstats.Stats(str(path)).stats}
+
+    assert "get_tokens" in get_functions(path=screen_path)
+    assert "get_tokens" not in get_functions(path=run_path)
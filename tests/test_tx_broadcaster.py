@@ -0,0 +1,125 @@
+import pytest
+from solders.hash import Hash
+from solders.keypair import Keypair
+from solders.message import MessageV0
+from solders.system_program import TransferParams, transfer
+from solders.transaction import VersionedTransaction
+
+from spl_drawdown.modules.mock_providers import SyntheticUniverse
+from spl_drawdown.modules.swap import Swapper
+from spl_drawdown.modules.tx_broadcaster import TransactionBroadcaster
+from spl_drawdown.utils.http_client import HttpClient
+
+
+class RecordingHttpClient(HttpClient):
+    def __init__(self):
+        super().__init__()
+        self.payloads = list()
+
+    def post(self, provider: str, url: str, **kwargs):
+        self.payloads.append((url, kwargs.get("json")))
+        return super().post(provider, url, **kwargs)
+
+
+def get_unknown_transaction(seed: int) -> VersionedTransaction:
+    """Not built by /v6/swap, the mock answers with an unknown transaction error as a failed preflight would"""
+    key_pair = Keypair.from_seed(bytes([seed] * 32))
+    ix = transfer(TransferParams(from_pubkey=key_pair.pubkey(), to_pubkey=key_pair.pubkey(), lamports=1))
+    message = MessageV0.try_compile(key_pair.pubkey(), [ix], [], Hash.default())
+    return VersionedTransaction(message, [key_pair])
+
+
+@pytest.fixture
+def broadcast_setup(mock_server):
+    """broadcast_setup(down_first) builds a Swapper broadcasting to a primary, an extra and a failing endpoint"""
+    universe = SyntheticUniverse(size=20, seed=17)
+    server = mock_server(universe=universe)
+    # Every request fails with a 5xx
+    failing = mock_server(universe=universe, error_rate=1.0)
+
+    def setup(down_first: bool = False):
+        endpoints = ["{u}/?api-key=test".format(u=server.url), "{u}/extra".format(u=server.url)]
+        down = "{u}/".format(u=failing.url)
+        endpoints = [down] + endpoints if down_first else endpoints + [down]
+        Broadcaster = TransactionBroadcaster(endpoints=endpoints, http=RecordingHttpClient())
+        Swap = Swapper(
+            HELIUS_API_KEY="test", Broadcaster=Broadcaster, helius_rpc_url=server.url, jupiter_base_url=server.url
+        )
+        return universe, server, failing, Swap, Broadcaster
+
+    return setup
+
+
+def buy(universe: SyntheticUniverse, Swap: Swapper, seed: int) -> bool:
+    key_pair = Keypair.from_seed(bytes([seed] * 32))
+    quote = Swap.get_quote(input_mint=Swap.sol_mint, output_mint=universe.mints[0], amount=10**7)
+    swap_transaction = Swap.create_swap(quote=quote, user_public_key=str(key_pair.pubkey()))
+    txid = Swap.sign_and_send(swap_transaction=swap_transaction, key_pair=key_pair)
+    is_confirmed = Swap._track(txid=txid).result(timeout=10)
+    # Sends to the other endpoints may still be running
+    Swap.Broadcaster._executor.shutdown(wait=True)
+    return is_confirmed
+
+
+def get_preflights(Broadcaster: TransactionBroadcaster) -> dict:
+    return {url: payload["params"][1]["skipPreflight"] is False for url, payload in Broadcaster.http.payloads}
+
+
+def test_broadcast_fans_out_after_the_primary_preflight(broadcast_setup):
+    universe, server, _, Swap, Broadcaster = broadcast_setup()
+    primary, extra, down = Broadcaster.endpoints
+
+    assert buy(universe=universe, Swap=Swap, seed=7)
+
+    # Preflight only runs on the primary endpoint, the nodes keep their default rebroadcasting
+    assert Broadcaster.http.payloads[0][0] == primary
+    assert get_preflights(Broadcaster=Broadcaster) == {primary: True, extra: False, down: False}
+    stats = Broadcaster.stats
+    assert stats[primary]["sent"] == stats[extra]["sent"] == 1
+    assert stats[down]["failed"] == 1
+    assert all(x["latency_seconds"] > 0 for x in (stats[primary], stats[extra]))
+    # Which endpoint delivered it is unknown, the landing is counted once per transaction
+    assert Broadcaster.landed == 1 and Broadcaster.landing_seconds > 0
+    assert not Broadcaster._in_flight
+    assert server.get_stats()["POST /extra sendTransaction"]["requests"] == 1
+
+
+def test_broadcast_rejected_by_the_primary_preflight(broadcast_setup):
+    _, server, failing, _, Broadcaster = broadcast_setup()
+    primary = Broadcaster.endpoints[0]
+    signed_tx = get_unknown_transaction(seed=8)
+
+    with pytest.raises(Exception, match="rejected by"):
+        Broadcaster.broadcast(signed_tx=signed_tx)
+
+    # Not sent anywhere else
+    assert [x[0] for x in Broadcaster.http.payloads] == [primary]
+    assert "POST /extra sendTransaction" not in server.get_stats()
+    assert failing.get_stats()["total"]["requests"] == 0
+    assert Broadcaster.stats[primary]["failed"] == 1
+    assert not Broadcaster._in_flight
+    Broadcaster.record_landing(signature=signed_tx.signatures[0], is_confirmed=True)
+    assert Broadcaster.landed == 0
+
+
+def test_broadcast_without_the_primary(broadcast_setup):
+    universe, _, _, Swap, Broadcaster = broadcast_setup(down_first=True)
+    down, primary, extra = Broadcaster.endpoints
+
+    assert buy(universe=universe, Swap=Swap, seed=9)
+
+    # The primary did not simulate it, so the others run their own preflight
+    assert get_preflights(Broadcaster=Broadcaster) == {down: True, primary: True, extra: True}
+    assert Broadcaster.stats[down]["failed"] == 1
+    assert Broadcaster.stats[primary]["sent"] + Broadcaster.stats[extra]["sent"] >= 1
+    assert Broadcaster.landed == 1
+
+
+def test_broadcast_rejected_by_every_endpoint(broadcast_setup):
+    _, _, _, _, Broadcaster = broadcast_setup(down_first=True)
+
+    with pytest.raises(Exception, match="rejected by every endpoint"):
+        Broadcaster.broadcast(signed_tx=get_unknown_transaction(seed=10))
+
+    assert all(x["failed"] == 1 and x["sent"] == 0 for x in Broadcaster.stats.values())
+    assert not Broadcaster._in_flight